@@ -0,0 +1,9 @@
+"""Benchmarks for the CTM model, chart rendering, reports and exports.
+
+Benchmarks follow the asv conventions: classes with an optional ``setup``,
+``params``/``param_names``, and ``time_*``, ``peakmem_*`` and ``track_*``
+methods. They run with the bundled runner (no extra dependencies) or asv:
+
+    python -m benchmarks run -o benchmarks/baselines/main.json
+    python -m benchmarks compare benchmarks/baselines/main.json benchmarks/results/latest.json
+"""
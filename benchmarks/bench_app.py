@@ -0,0 +1,38 @@
+"""Full reruns of the Streamlit script, the path every widget change takes."""
+import os
+
+import ctm.store
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit_app.py")
+
+
+class AppRerun:
+    repeat = 3
+
+    def setup(self):
+        # Keep benchmark reruns out of the user's results store. ctm.store reads
+        # the variable at import, so an already imported module is switched off too.
+        self.saved_db = os.environ.get("CTM_RESULTS_DB"), ctm.store.STORE_PATH
+        os.environ["CTM_RESULTS_DB"] = ""
+        ctm.store.STORE_PATH = ""
+
+        from streamlit.testing.v1 import AppTest
+
+        self.app = AppTest.from_file(APP_PATH, default_timeout=120)
+        self.app.run()
+        self.step = 0
+
+    def time_rerun(self):
+        self.app.run()
+
+    def time_rerun_changed_input(self):
+        # A new ribbon width each call, so every process-wide cache misses
+        self.step += 1
+        self.app.sidebar.number_input[6].set_value(round(0.1 + self.step % 44 * 0.1, 1)).run()
+
+    def teardown(self):
+        environment, ctm.store.STORE_PATH = self.saved_db
+        if environment is None:
+            os.environ.pop("CTM_RESULTS_DB", None)
+        else:
+            os.environ["CTM_RESULTS_DB"] = environment
@@ -0,0 +1,52 @@
+"""Loss model latency and batch throughput."""
+import numpy as np
+
+from ctm import DEFAULT_PARAMS, compute_ctm, compute_ctm_cached, compute_ctm_point, params_key
+from ctm.model import BUSBAR_OPTIONS
+
+
+class SinglePoint:
+    def setup(self):
+        self.key = params_key(DEFAULT_PARAMS)
+        compute_ctm_cached(self.key)
+
+    def time_compute_ctm_point(self):
+        compute_ctm_point(num_busbars=16, ribbon_width=1.2)
+
+    def time_compute_ctm_cached_hit(self):
+        compute_ctm_cached(self.key)
+
+    def time_compute_ctm_cached_miss(self):
+        compute_ctm_cached.__wrapped__(self.key)
+
+
+class Batch:
+    params = [1_000, 100_000, 1_000_000]
+    param_names = ["designs"]
+    repeat = 3
+
+    def setup(self, designs):
+        rng = np.random.default_rng(0)
+        self.designs = {
+            "num_busbars": rng.choice(BUSBAR_OPTIONS, designs).astype(np.float64),
+            "ribbon_width": rng.uniform(0.3, 2.0, designs),
+            "ribbon_thickness": rng.uniform(0.15, 0.4, designs),
+            "glass_transmission": rng.uniform(90.0, 96.0, designs),
+            "cell_binning_tolerance": rng.uniform(0.5, 3.0, designs),
+        }
+
+    def time_compute_ctm(self, designs):
+        compute_ctm(self.designs)
+
+    def track_designs_per_second(self, designs):
+        import time
+
+        start = time.perf_counter()
+        compute_ctm(self.designs)
+        return designs / (time.perf_counter() - start)
+
+    track_designs_per_second.unit = "designs/s"
+    track_designs_per_second.higher_is_better = True
+
+    def peakmem_compute_ctm(self, designs):
+        compute_ctm(self.designs)
@@ -0,0 +1,69 @@
+"""Pie chart rendering, PDF reports and CSV exports."""
+import io
+
+from ctm import DEFAULT_PARAMS, compute_ctm_point, loss_values, params_key
+from ctm.charts import pie_image, pie_values
+from ctm.model import BUSBAR_OPTIONS
+from ctm.tables import loss_table, loss_table_csv
+
+
+class PieChart:
+    params = ["png", "svg"]
+    param_names = ["fmt"]
+
+    def setup(self, fmt):
+        result = compute_ctm_point()
+        self.values = pie_values(loss_values(result), result["total_ctm_loss"])
+
+    def time_pie_image(self, fmt):
+        # Bypass the image cache so every call renders
+        pie_image.__wrapped__(self.values, fmt)
+
+    def peakmem_pie_image(self, fmt):
+        pie_image.__wrapped__(self.values, fmt)
+
+    def track_pie_image_bytes(self, fmt):
+        return len(pie_image.__wrapped__(self.values, fmt))
+
+    track_pie_image_bytes.unit = "bytes"
+
+
+class PdfReport:
+    repeat = 3
+
+    def setup(self):
+        result = compute_ctm_point()
+        self.args = (
+            result["total_cell_power"], result["module_pmax"], result["module_efficiency"],
+            loss_table(params_key(DEFAULT_PARAMS)), loss_values(result), result["total_ctm_loss"],
+            result["ctm_ratio"], result["module_voc"], result["module_isc"], result["module_vmpp"],
+            result["module_impp"], result["annual_energy_total"], result["annual_energy_loss"],
+        )
+
+    def time_create_pdf_report(self):
+        from ctm.report import create_pdf_report
+
+        create_pdf_report(*self.args)
+
+    def track_pdf_bytes(self):
+        from ctm.report import create_pdf_report
+
+        return len(create_pdf_report(*self.args).getvalue())
+
+    track_pdf_bytes.unit = "bytes"
+
+
+class CsvExport:
+    def setup(self):
+        from ctm.cli import evaluate_designs
+
+        self.key = params_key(DEFAULT_PARAMS)
+        self.rows = evaluate_designs([{"num_busbars": BUSBAR_OPTIONS[n % len(BUSBAR_OPTIONS)]} for n in range(10_000)])
+
+    def time_loss_table_csv(self):
+        loss_table_csv.__wrapped__(self.key)
+
+    def time_batch_results_csv(self):
+        from ctm.cli import write_results
+
+        write_results(self.rows, "csv", io.StringIO())
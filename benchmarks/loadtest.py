@@ -0,0 +1,141 @@
+"""Load test for the HTTP service (``ctm serve``), run separately from the benchmark suite.
+
+    python -m benchmarks.loadtest --spawn --requests 50000 --connections 64
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --unique 0.5
+
+Keeps ``--connections`` HTTP/1.1 keep-alive connections busy posting
+single-point designs to ``/ctm`` and reports requests per second and latency
+percentiles. ``--unique`` is the fraction of requests with a design not seen
+before, so the response cache misses; the rest repeat a small set. Only the
+standard library is used on the client side so it does not compete with the
+server for NumPy threads.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_URL = "http://127.0.0.1:8000"
+REPEATED_DESIGNS = 64
+
+
+def _designs(n, unique, seed):
+    """``n`` request bodies; a ``unique`` fraction distinct, the rest drawn from a small repeated set."""
+    rng = random.Random(seed)
+
+    def design(i):
+        return json.dumps({"num_busbars": 9 + i % 12, "ribbon_width": 0.5 + (i % 997) * 0.001,
+                           "cell_power": 8.0 + (i // 997) * 1e-6}).encode()
+
+    repeated = [design(i) for i in range(REPEATED_DESIGNS)]
+    return [design(REPEATED_DESIGNS + i) if rng.random() < unique else rng.choice(repeated) for i in range(n)]
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("server closed the connection")
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return int(status_line.split()[1])
+
+
+async def _connection(host, port, bodies, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while bodies:
+            body = bodies.pop()
+            request = (f"POST /ctm HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                       f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+            start = time.perf_counter()
+            writer.write(request)
+            status = await _read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def _run(host, port, bodies, connections):
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(_connection(host, port, bodies, latencies, errors) for _ in range(connections)))
+    return time.perf_counter() - start, latencies, errors
+
+
+def _wait_for_server(host, port, timeout=30.0):
+    import socket
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"service did not start on {host}:{port} within {timeout:.0f} s")
+
+
+def _percentile(values, q):
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.loadtest", description="Load-test the CTM service.")
+    parser.add_argument("--url", default=DEFAULT_URL, help="(default: %(default)s)")
+    parser.add_argument("--requests", type=int, default=20_000, help="(default: %(default)s)")
+    parser.add_argument("--connections", type=int, default=64, help="(default: %(default)s)")
+    parser.add_argument("--unique", type=float, default=0.1,
+                        help="fraction of never-seen designs (default: %(default)s)")
+    parser.add_argument("--warmup", type=int, default=1_000, help="requests sent before timing (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--spawn", action="store_true", help="start `ctm serve` on the URL's port for the run")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="server processes with --spawn (default: %(default)s)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+
+    server = None
+    if args.spawn:
+        server = subprocess.Popen([sys.executable, "-m", "ctm.service", "--host", host, "--port", str(port),
+                                   "--workers", str(args.workers)])
+    try:
+        _wait_for_server(host, port)
+        bodies = _designs(args.warmup + args.requests, args.unique, args.seed)
+        asyncio.run(_run(host, port, bodies[args.requests:], args.connections))
+        elapsed, latencies, errors = asyncio.run(_run(host, port, bodies[:args.requests], args.connections))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latencies.sort()
+    print(f"{len(latencies):,} requests over {args.connections} connections in {elapsed:.2f} s: "
+          f"{len(latencies) / elapsed:,.0f} req/s")
+    print("latency ms: " + ", ".join(f"p{q} {_percentile(latencies, q) * 1000:.2f}" for q in (50, 90, 99, 99.9)))
+    if errors:
+        print(f"{len(errors):,} non-200 responses", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
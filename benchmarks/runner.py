@@ -0,0 +1,256 @@
+"""Minimal asv-compatible benchmark runner with JSON baselines.
+
+    python -m benchmarks run [-o results.json] [--filter REGEX] [--quick]
+    python -m benchmarks compare BASELINE.json RESULTS.json [--threshold 0.2]
+
+``compare`` exits with status 1 when any benchmark regressed by more than
+the threshold (a fraction, 0.2 = 20%), so it can gate CI.
+
+As in asv, ``peakmem_`` benchmarks run ``setup`` and the method in a fresh
+interpreter and report its peak resident set size. That counts native
+buffers such as Agg's raster canvas, which tracemalloc cannot see.
+"""
+import argparse
+import gc
+import importlib
+import inspect
+import itertools
+import json
+import os
+import pkgutil
+import platform
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCHMARK_DIR)
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+
+# Minimum wall time of one timing repeat; fast calls are looped to reach it
+MIN_REPEAT_SECONDS = 0.1
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.2
+
+
+def discover(pattern=None):
+    """Yield ``(name, cls, method_name)`` for every benchmark method."""
+    for module_info in pkgutil.iter_modules([BENCHMARK_DIR]):
+        if not module_info.name.startswith("bench_"):
+            continue
+        module = importlib.import_module(f"benchmarks.{module_info.name}")
+        for cls_name, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module.__name__:
+                continue
+            for method_name in sorted(vars(cls)):
+                if not method_name.startswith(("time_", "peakmem_", "track_")):
+                    continue
+                name = f"{module_info.name}.{cls_name}.{method_name}"
+                if pattern is None or re.search(pattern, name):
+                    yield name, cls, method_name
+
+
+def _param_sets(cls):
+    params = getattr(cls, "params", None)
+    if params is None:
+        return [()]
+    # asv accepts a flat list for a single parameter or a list of lists
+    if not params or not isinstance(params[0], (list, tuple)):
+        params = [params]
+    return list(itertools.product(*params))
+
+
+def _measure(instance, method_name, args, repeat):
+    method = getattr(instance, method_name)
+    kind = method_name.split("_", 1)[0]
+    if kind == "track":
+        return {"type": "track", "value": float(method(*args)), "unit": getattr(method, "unit", ""),
+                "higher_is_better": getattr(method, "higher_is_better", False)}
+
+    # Calibrate the loop count on one call, then keep the per-call time of each repeat
+    start = time.perf_counter()
+    method(*args)
+    single = time.perf_counter() - start
+    number = max(1, int(MIN_REPEAT_SECONDS / single)) if single > 0 else 1000
+    samples = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        for _ in range(number):
+            method(*args)
+        samples.append((time.perf_counter() - start) / number)
+    samples.sort()
+    return {"type": "time", "value": samples[len(samples) // 2], "min": samples[0], "samples": samples,
+            "number": number, "unit": "s"}
+
+
+def _max_rss():
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def peakmem_child(name, args_json):
+    """Run one ``peakmem_`` benchmark in this (fresh) process and print its peak RSS in bytes."""
+    module_name, cls_name, method_name = name.rsplit(".", 2)
+    cls = getattr(importlib.import_module(f"benchmarks.{module_name}"), cls_name)
+    args = json.loads(args_json)
+    instance = cls()
+    try:
+        if hasattr(instance, "setup"):
+            instance.setup(*args)
+        getattr(instance, method_name)(*args)
+    except ImportError as error:
+        print(error, file=sys.stderr)
+        return 3
+    finally:
+        if hasattr(instance, "teardown"):
+            instance.teardown(*args)
+    print(_max_rss())
+    return 0
+
+
+def _peakmem(name, args):
+    """Peak RSS of a fresh interpreter running the benchmark's setup and one call."""
+    code = "import sys; from benchmarks.runner import peakmem_child; sys.exit(peakmem_child(*sys.argv[1:]))"
+    child = subprocess.run([sys.executable, "-c", code, name, json.dumps(list(args))], capture_output=True, text=True,
+                           cwd=PROJECT_DIR)
+    if child.returncode == 3:
+        raise ImportError(child.stderr.strip())
+    if child.returncode:
+        raise RuntimeError(f"{name} failed:\n{child.stderr}")
+    return {"type": "peakmem", "value": int(child.stdout.split()[-1]), "unit": "bytes"}
+
+
+def run_benchmarks(pattern=None, quick=False, log=sys.stderr):
+    """Run every matching benchmark and return ``{name(params): measurement}``."""
+    results = {}
+    for name, cls, method_name in discover(pattern):
+        repeat = 1 if quick else getattr(cls, "repeat", DEFAULT_REPEAT)
+        for args in _param_sets(cls):
+            label = f"{name}({', '.join(map(repr, args))})" if args else name
+            if method_name.startswith("peakmem_"):
+                try:
+                    results[label] = _peakmem(name, args)
+                except ImportError as error:
+                    print(f"{label}: skipped ({error})", file=log)
+                    continue
+                print(f"{label}: {format_value(results[label]['value'], 'bytes')}", file=log)
+                continue
+            instance = cls()
+            try:
+                if hasattr(instance, "setup"):
+                    instance.setup(*args)
+                measurement = _measure(instance, method_name, args, repeat)
+            except ImportError as error:
+                # Optional dependencies (streamlit, reportlab, ...) may be absent
+                print(f"{label}: skipped ({error})", file=log)
+                continue
+            finally:
+                if hasattr(instance, "teardown"):
+                    instance.teardown(*args)
+            results[label] = measurement
+            print(f"{label}: {format_value(measurement['value'], measurement['unit'])}", file=log)
+    return results
+
+
+def format_value(value, unit):
+    if unit == "s":
+        for scale, suffix in ((1, "s"), (1e-3, "ms"), (1e-6, "us")):
+            if value >= scale:
+                return f"{value / scale:.3f} {suffix}"
+        return f"{value / 1e-9:.0f} ns"
+    if unit == "bytes":
+        return f"{value / 1024 ** 2:.1f} MiB" if value >= 1024 ** 2 else f"{value / 1024:.1f} KiB"
+    return f"{value:,.1f} {unit}".strip()
+
+
+def _environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=BENCHMARK_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """Return ``(rows, regressed)`` comparing two result mappings.
+
+    Each row is ``(name, baseline, current, ratio, status)``; a ratio above
+    ``1 + threshold`` in the worse direction is a regression.
+    """
+    rows, regressed = [], False
+    for name in sorted(set(baseline) | set(current)):
+        if name not in current or name not in baseline:
+            rows.append((name, baseline.get(name), current.get(name), None, "missing" if name not in current else "new"))
+            continue
+        old, new = baseline[name], current[name]
+        ratio = new["value"] / old["value"] if old["value"] else float("inf")
+        worse = 1 / ratio if new.get("higher_is_better") and ratio else ratio
+        if worse > 1 + threshold:
+            status, regressed = "REGRESSION", True
+        elif worse < 1 / (1 + threshold):
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append((name, old, new, ratio, status))
+    return rows, regressed
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="CTM benchmark runner.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run benchmarks and write a JSON result file")
+    run.add_argument("-o", "--output", help=f"result file (default: {os.path.relpath(RESULTS_DIR)}/<commit>.json)")
+    run.add_argument("--filter", help="only run benchmarks whose name matches this regex")
+    run.add_argument("--quick", action="store_true", help="one timing repeat per benchmark")
+
+    comparison = commands.add_parser("compare", help="compare two result files")
+    comparison.add_argument("baseline")
+    comparison.add_argument("current")
+    comparison.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                            help=f"allowed slowdown as a fraction (default: {DEFAULT_THRESHOLD})")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.command == "run":
+        environment = _environment()
+        results = run_benchmarks(args.filter, args.quick)
+        output = args.output or os.path.join(RESULTS_DIR, f"{environment['commit'] or 'latest'}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w") as f:
+            json.dump({"environment": environment, "results": results}, f, indent=2)
+        print(f"Wrote {len(results)} results to {output}", file=sys.stderr)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if baseline["environment"].get("platform") != current["environment"].get("platform"):
+        print("warning: results come from different platforms", file=sys.stderr)
+
+    rows, regressed = compare(baseline["results"], current["results"], args.threshold)
+    width = max((len(row[0]) for row in rows), default=0)
+    for name, old, new, ratio, status in rows:
+        old_text = format_value(old["value"], old["unit"]) if old else "-"
+        new_text = format_value(new["value"], new["unit"]) if new else "-"
+        ratio_text = f"{ratio:6.2f}x" if ratio is not None else "      -"
+        print(f"{name:<{width}}  {old_text:>20}  {new_text:>20}  {ratio_text}  {status}")
+    return 1 if regressed else 0
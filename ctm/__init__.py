@@ -0,0 +1,14 @@
+"""Cell-to-module (CTM) loss model for half-cut cell PV modules."""
+from ctm.model import (
+    BUSBAR_OPTIONS,
+    DEFAULT_PARAMS,
+    INPUT_COLUMNS,
+    LOSS_KEYS,
+    OUTPUT_COLUMNS,
+    compute_ctm,
+    compute_ctm_cached,
+    compute_ctm_point,
+    loss_values,
+    params_key,
+    stack_ctm_loss,
+)
@@ -0,0 +1,5 @@
+import sys
+
+from ctm.cli import main
+
+sys.exit(main())
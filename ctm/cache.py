@@ -0,0 +1,36 @@
+"""Process-wide memoization shared by every Streamlit session.
+
+Streamlit re-executes the app script on each widget change, but imported
+modules live for the lifetime of the server process, so caches defined here
+are reused across reruns and across users.
+"""
+import functools
+
+_REGISTRY = {}
+
+
+def cached(maxsize=256):
+    """``functools.lru_cache`` that also registers the cache for ``cache_stats``.
+
+    Arguments must be hashable; use ``params_key`` to turn a parameter mapping
+    into a tuple. Cached return values are shared, so callers must not mutate them.
+    """
+    def decorator(func):
+        wrapper = functools.lru_cache(maxsize=maxsize)(func)
+        _REGISTRY[f"{func.__module__}.{func.__qualname__}"] = wrapper
+        return wrapper
+    return decorator
+
+
+def cache_stats():
+    """Return hit/miss/size counters for every registered cache."""
+    stats = {}
+    for name, func in _REGISTRY.items():
+        info = func.cache_info()
+        stats[name] = {"hits": info.hits, "misses": info.misses, "size": info.currsize, "maxsize": info.maxsize}
+    return stats
+
+
+def clear_caches():
+    for func in _REGISTRY.values():
+        func.cache_clear()
@@ -0,0 +1,248 @@
+"""Loss distribution chart.
+
+The pie is drawn with matplotlib's object-oriented Agg API rather than pyplot,
+so no global figure registry is involved and every figure is released as soon
+as its PNG bytes have been written.
+"""
+from io import BytesIO
+
+from ctm.cache import cached
+
+PIE_LABELS = ("Geometric", "Glass", "Encapsulant", "Ribbon Shading", "Resistive", "Mismatch", "JB & Cable")
+PIE_KEYS = ("geometric", "glass", "encapsulant", "ribbon", "resistive", "mismatch", "jb")
+PIE_COLORS = ("#FF4444", "#FF8800", "#FFBB33", "#00CC44", "#FF1493", "#00CCFF", "#9966FF")
+
+
+def pie_values(loss_values, total_ctm_loss):
+    """Scale the positive loss terms so the slices sum to the total CTM loss.
+
+    Returns a tuple (hashable, so it can key the chart caches) or ``None``
+    when there is nothing to draw.
+    """
+    raw = [max(0.01, loss_values[key]) for key in PIE_KEYS]
+    pie_sum = sum(raw)
+    if pie_sum <= 0:
+        return None
+    return tuple(round(v / pie_sum * total_ctm_loss, 6) for v in raw)
+
+
+def pie_figure(values):
+    """Build the loss distribution pie as a standalone (non-pyplot) Figure."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 7))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    wedges, texts, autotexts = ax.pie(
+        values,
+        labels=PIE_LABELS,
+        autopct="%1.1f%%",
+        colors=PIE_COLORS,
+        startangle=45,
+        textprops={"fontsize": 10, "weight": "bold"},
+        wedgeprops={"edgecolor": "white", "linewidth": 2.5},
+        explode=[0.08] * len(PIE_LABELS),
+        pctdistance=0.85
+    )
+
+    for text in texts:
+        text.set_fontsize(11)
+        text.set_weight("bold")
+        text.set_color("#000000")
+
+    for autotext in autotexts:
+        autotext.set_color("white")
+        autotext.set_fontsize(9)
+        autotext.set_weight("bold")
+        autotext.set_bbox(dict(boxstyle="round,pad=0.4", facecolor="black", alpha=0.6, edgecolor="none"))
+
+    ax.set_title("CTM Loss Distribution", fontsize=13, fontweight="bold", pad=20)
+    fig.tight_layout()
+    return fig
+
+
+@cached(maxsize=128)
+def pie_image(values, fmt="png", dpi=100):
+    """Render a ``pie_values`` tuple to PNG (compressed) or SVG bytes, memoized per loss vector."""
+    fig = pie_figure(values)
+    try:
+        buffer = BytesIO()
+        if fmt == "png":
+            fig.savefig(buffer, format="png", dpi=dpi, pil_kwargs={"compress_level": 9})
+        else:
+            fig.savefig(buffer, format=fmt)
+        return buffer.getvalue()
+    finally:
+        fig.clear()
+
+
+def pie_vega_spec(values):
+    """Vega-Lite spec for the same pie, rendered client-side with no rasterization."""
+    total = sum(values)
+    data = [
+        {"category": label, "loss": value, "share": value / total if total else 0.0}
+        for label, value in zip(PIE_LABELS, values)
+    ]
+    return {
+        "title": "CTM Loss Distribution",
+        "data": {"values": data},
+        "mark": {"type": "arc", "stroke": "white", "strokeWidth": 2.5},
+        "encoding": {
+            "theta": {"field": "loss", "type": "quantitative", "stack": True},
+            "color": {
+                "field": "category",
+                "type": "nominal",
+                "sort": list(PIE_LABELS),
+                "scale": {"domain": list(PIE_LABELS), "range": list(PIE_COLORS)},
+                "legend": {"title": None},
+            },
+            "order": {"field": "loss", "type": "quantitative", "sort": "descending"},
+            "tooltip": [
+                {"field": "category", "type": "nominal", "title": "Loss"},
+                {"field": "loss", "type": "quantitative", "title": "Loss (%)", "format": ".2f"},
+                {"field": "share", "type": "quantitative", "title": "Share", "format": ".1%"},
+            ],
+        },
+        "view": {"stroke": None},
+    }
+
+
+def heatmap_image(grid, x_values, y_values, x_label, y_label, title, dpi=100):
+    """Render a sweep grid (rows follow ``y_values``) to PNG bytes.
+
+    Cells that have not been computed yet (NaN) are left blank, so the same
+    function draws partial results while a sweep is still streaming in.
+    """
+    import numpy as np
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(6, 4.5))
+    FigureCanvasAgg(fig)
+    try:
+        ax = fig.add_subplot()
+        data = np.ma.masked_invalid(grid)
+        if _evenly_spaced(x_values) and _evenly_spaced(y_values):
+            extent = (x_values[0], x_values[-1], y_values[0], y_values[-1])
+            image = ax.imshow(data, origin="lower", aspect="auto", extent=extent, cmap="viridis", interpolation="nearest")
+        else:
+            # e.g. the discrete busbar options; pcolormesh keeps the true spacing
+            image = ax.pcolormesh(x_values, y_values, data, cmap="viridis", shading="nearest")
+        fig.colorbar(image, ax=ax)
+        ax.set_xlabel(x_label)
+        ax.set_ylabel(y_label)
+        ax.set_title(title, fontsize=12, fontweight="bold")
+        fig.tight_layout()
+
+        buffer = BytesIO()
+        fig.savefig(buffer, format="png", dpi=dpi, pil_kwargs={"compress_level": 6})
+        return buffer.getvalue()
+    finally:
+        fig.clear()
+
+
+TORNADO_COLORS = ("#1f77b4", "#FF8800")  # input at the low end, input at the high end
+
+
+@cached(maxsize=32)
+def tornado_image(rows, nominal, title, dpi=100):
+    """Render tornado rows ``(label, output at input low, output at input high)`` to PNG bytes.
+
+    Rows are drawn top to bottom in the order given, as bars from ``nominal``.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(7, 0.45 * len(rows) + 1.2))
+    FigureCanvasAgg(fig)
+    try:
+        ax = fig.add_subplot()
+        positions = range(len(rows))[::-1]
+        ax.barh(positions, [row[1] - nominal for row in rows], left=nominal, color=TORNADO_COLORS[0], height=0.6,
+                label="Input low")
+        ax.barh(positions, [row[2] - nominal for row in rows], left=nominal, color=TORNADO_COLORS[1], height=0.6,
+                label="Input high")
+        ax.set_yticks(list(positions), [row[0] for row in rows], fontsize=9)
+        ax.axvline(nominal, color="black", linewidth=1)
+        ax.legend(fontsize=8, loc="lower right")
+        ax.set_title(title, fontsize=12, fontweight="bold")
+        fig.tight_layout()
+
+        buffer = BytesIO()
+        fig.savefig(buffer, format="png", dpi=dpi, pil_kwargs={"compress_level": 6})
+        return buffer.getvalue()
+    finally:
+        fig.clear()
+
+
+def tornado_vega_spec(rows, nominal, title):
+    """Vega-Lite spec for the same tornado, rendered client-side."""
+    order = [row[0] for row in rows]
+    data = [
+        {"input": label, "end": end, "start": nominal, "value": value}
+        for label, low, high in rows
+        for end, value in (("Input low", low), ("Input high", high))
+    ]
+    return {
+        "title": title,
+        "data": {"values": data},
+        "mark": {"type": "bar"},
+        "encoding": {
+            "y": {"field": "input", "type": "nominal", "sort": order, "title": None},
+            "x": {"field": "start", "type": "quantitative", "title": title, "scale": {"zero": False}},
+            "x2": {"field": "value"},
+            "color": {
+                "field": "end",
+                "type": "nominal",
+                "scale": {"domain": ["Input low", "Input high"], "range": list(TORNADO_COLORS)},
+                "legend": {"title": None},
+            },
+            "tooltip": [
+                {"field": "input", "type": "nominal", "title": "Input"},
+                {"field": "end", "type": "nominal", "title": "Case"},
+                {"field": "value", "type": "quantitative", "title": title, "format": ".3f"},
+            ],
+        },
+    }
+
+
+LAYOUT_COLORS = ("#F4F6F8", "#1F3A60", "#C0C6CC", "#8A9099")  # glass, cell, ribbon on cell, interconnect
+
+
+@cached(maxsize=32)
+def layout_image(num_cells, cell_length, cell_width, num_busbars, ribbon_width, dpi=100):
+    """Render the module layout preview (front view, junction box gap across the middle) to PNG bytes."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.colors import ListedColormap
+    from matplotlib.figure import Figure
+
+    from ctm.layout import PREVIEW_RESOLUTION, layout_mask
+
+    mask = layout_mask(num_cells, cell_length, cell_width, num_busbars, ribbon_width)
+    height, width = mask.shape
+    fig = Figure(figsize=(3.5, 3.5 * height / width))
+    FigureCanvasAgg(fig)
+    try:
+        ax = fig.add_subplot()
+        extent = (0, width * PREVIEW_RESOLUTION, height * PREVIEW_RESOLUTION, 0)
+        ax.imshow(mask, cmap=ListedColormap(LAYOUT_COLORS), vmin=0, vmax=len(LAYOUT_COLORS) - 1,
+                  interpolation="nearest", extent=extent)
+        ax.set_xlabel("mm")
+        ax.set_ylabel("mm")
+        ax.tick_params(labelsize=7)
+        fig.tight_layout()
+
+        buffer = BytesIO()
+        fig.savefig(buffer, format="png", dpi=dpi, pil_kwargs={"compress_level": 6})
+        return buffer.getvalue()
+    finally:
+        fig.clear()
+
+
+def _evenly_spaced(values):
+    import numpy as np
+
+    steps = np.diff(values)
+    return len(steps) == 0 or np.allclose(steps, steps[0])
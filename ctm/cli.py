@@ -0,0 +1,277 @@
+"""``ctm`` command-line interface.
+
+    ctm calc --params designs.csv --format csv -o results.csv
+    ctm calc --set num_busbars=16 --set ribbon_width=1.2
+    ctm calc --template hjt-132 --params designs.csv
+    ctm lot --modules modules.parquet --cells cells.parquet --summary summary.csv
+    ctm report --params skus.csv --out-dir reports/
+    ctm report --template hjt-132 --params skus.csv --combined skus.pdf
+    ctm yield --weather tmy.csv --attribution losses.csv
+    ctm optimize --costs costs.json --target-pmax 580 -o front.csv
+    ctm runs --busbars 12 --since 2026-01-01 -o runs.arrow
+    ctm network --params designs.csv -o losses.csv
+    ctm lifetime --modules 1000000 --years 30 -o lifetime.csv
+    ctm serve --port 8000 --template hjt-132
+
+Parameter files are JSON (one object or a list of objects) or CSV (one design
+per row). Keys that are not model inputs (e.g. an SKU) are passed through to
+the output unchanged. Only the standard library and the scalar model are
+imported for a single design; NumPy is loaded for multi-design files.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+from ctm.model import DEFAULT_PARAMS, INPUT_COLUMNS, OUTPUT_COLUMNS, compute_ctm_point
+
+# Subcommands with their own parsers, imported only when used so the NumPy and
+# pandas cost stays off the calc path
+DELEGATED_COMMANDS = {
+    "lot": ("ctm.lots", "measured vs modeled CTM for a production lot"),
+    "yield": ("ctm.energy", "time-series energy yield from weather data"),
+    "optimize": ("ctm.optimize", "cheapest BOM for a target module power"),
+    "runs": ("ctm.store", "query and export stored runs"),
+    "network": ("ctm.network", "grid and ribbon I²R from a resistor network"),
+    "lifetime": ("ctm.lifetime", "year-by-year Pmax and energy of a degrading fleet"),
+    "serve": ("ctm.service", "HTTP/JSON service for MES integration"),
+    "templates": ("ctm.technology", "list technology templates or rebuild their lookup tables"),
+}
+
+
+def parse_assignment(text):
+    """argparse ``type`` for NAME=VALUE model-input overrides; shared by every subcommand."""
+    name, sep, value = text.partition("=")
+    if not sep or name not in DEFAULT_PARAMS:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE with NAME one of {', '.join(INPUT_COLUMNS)}")
+    try:
+        return name, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{name}: {value!r} is not a number") from None
+
+
+TEMPLATE_HELP = "technology template for defaults and cell constants (see `ctm templates`)"
+
+
+def template_defaults(key):
+    """``(defaults, cell)`` for ``--template KEY``: the template's default inputs and its cell constants.
+
+    Without a key, the model defaults and the model's own cell.
+    """
+    if key is None:
+        return DEFAULT_PARAMS, {}
+    from ctm.technology import electrical, load_template
+
+    template = load_template(key)
+    return template["params"], electrical(template)
+
+
+def read_designs(path):
+    """Load designs from a JSON or CSV file (``-`` reads JSON from stdin).
+
+    Returns ``(designs, single)`` where ``single`` is true for a lone JSON object.
+    """
+    if path == "-":
+        data = json.load(sys.stdin)
+    elif path.lower().endswith(".csv"):
+        with open(path, newline="") as f:
+            return list(csv.DictReader(f)), False
+    else:
+        with open(path) as f:
+            data = json.load(f)
+    if isinstance(data, dict):
+        return [data], True
+    return list(data), False
+
+
+def evaluate_designs(designs, overrides=None, template=None):
+    """Evaluate designs (mappings of input name to value) and return one output row per design.
+
+    Inputs a design leaves out come from ``template`` (a ``ctm.technology``
+    template, whose cell constants are also used) or else the model defaults.
+    """
+    overrides = overrides or {}
+    defaults, cell = DEFAULT_PARAMS, {}
+    if template is not None:
+        from ctm.technology import electrical
+
+        defaults, cell = template["params"], electrical(template)
+    inputs = []
+    for design in designs:
+        params = {name: float(design[name]) for name in INPUT_COLUMNS if name in design and design[name] != ""}
+        params.update(overrides)
+        inputs.append(params)
+
+    if len(inputs) == 1:
+        outputs = [compute_ctm_point(**{**defaults, **inputs[0]}, **cell)]
+    else:
+        from ctm.model import compute_ctm
+
+        columns = {name: [p.get(name, defaults[name]) for p in inputs] for name in INPUT_COLUMNS}
+        arrays = compute_ctm(columns, **cell)
+        outputs = [{name: float(arrays[name][i]) for name in OUTPUT_COLUMNS} for i in range(len(inputs))]
+
+    rows = []
+    for design, params, output in zip(designs, inputs, outputs):
+        row = {key: value for key, value in design.items() if key not in DEFAULT_PARAMS}
+        row.update({name: params.get(name, defaults[name]) for name in INPUT_COLUMNS})
+        row.update(output)
+        rows.append(row)
+    return rows
+
+
+def write_results(rows, fmt, stream, single=False):
+    if fmt == "csv":
+        fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+        writer = csv.DictWriter(stream, fieldnames=fieldnames, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        json.dump(rows[0] if single else rows, stream, indent=2)
+        stream.write("\n")
+
+
+def cmd_calc(args):
+    if args.params:
+        designs, single = read_designs(args.params)
+    else:
+        designs, single = [{}], True
+    if not designs:
+        print("ctm calc: no designs in input", file=sys.stderr)
+        return 1
+
+    template = None
+    if args.template:
+        from ctm.technology import load_template, out_of_range
+
+        template = load_template(args.template)
+    rows = evaluate_designs(designs, dict(args.set), template)
+    if template is not None:
+        for index, row in enumerate(rows, start=1):
+            for problem in out_of_range(template, {name: row[name] for name in INPUT_COLUMNS}):
+                print(f"ctm calc: design {index}: {problem} for {template['name']}", file=sys.stderr)
+    if args.record:
+        from ctm.store import DEFAULT_CELL_TYPE, ResultsStore
+
+        columns = {name: [row[name] for row in rows] for name in (*INPUT_COLUMNS, *OUTPUT_COLUMNS)}
+        cell_type = template["cell_type"] if template is not None else DEFAULT_CELL_TYPE
+        ResultsStore(args.record).record_many(columns, columns, source="calc", cell_type=cell_type)
+    fmt = args.format or ("csv" if args.output and args.output.lower().endswith(".csv") else "json")
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            write_results(rows, fmt, f, single)
+    else:
+        write_results(rows, fmt, sys.stdout, single)
+    return 0
+
+
+def _report_filename(label):
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in str(label))
+    return f"CTM_Analysis_{safe}.pdf"
+
+
+def report_filenames(labels):
+    """One PDF name per label; labels that map to the same name get their 1-based row number appended.
+
+    Returns ``(names, duplicates)``, ``duplicates`` being the clashing names in order of first use.
+    """
+    names = [_report_filename(label) for label in labels]
+    counts = {}
+    for name in names:
+        counts[name] = counts.get(name, 0) + 1
+    duplicates = [name for name, count in counts.items() if count > 1]
+    unique = [f"{name[:-4]}_{index}.pdf" if counts[name] > 1 else name for index, name in enumerate(names, start=1)]
+    if len(set(unique)) < len(unique):
+        # A suffixed name met another label; numbering every file always ends in a distinct row number
+        unique = [f"{name[:-4]}_{index}.pdf" for index, name in enumerate(names, start=1)]
+    return unique, duplicates
+
+
+def cmd_report(args):
+    # reportlab is only imported for this command
+    from ctm import report
+
+    designs, _ = read_designs(args.params)
+    defaults, cell = template_defaults(args.template)
+    module_type = None
+    if args.template:
+        from ctm.technology import load_template
+
+        module_type = load_template(args.template)["name"]
+    overrides = dict(args.set)
+    params = []
+    labels = []
+    for index, design in enumerate(designs, start=1):
+        values = dict(defaults)
+        values.update({name: float(design[name]) for name in INPUT_COLUMNS if name in design and design[name] != ""})
+        values.update(overrides)
+        params.append(values)
+        labels.append(design.get(args.label_column) or f"design_{index}")
+    payloads = report.payloads_for_designs(params, labels, module_type, cell)
+
+    if args.combined:
+        report.write_combined_report(payloads, args.combined)
+        print(f"Wrote {len(payloads)} report sections to {args.combined}")
+        return 0
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    names, duplicates = report_filenames(labels)
+    if duplicates:
+        print(f"ctm report: {len(duplicates)} file name(s) shared by several designs "
+              f"({', '.join(duplicates)}); their row numbers were appended", file=sys.stderr)
+    paths = [os.path.join(args.out_dir, name) for name in names]
+    report.write_reports(payloads, paths, workers=args.workers)
+    print(f"Wrote {len(paths)} reports to {args.out_dir}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="ctm", description="Cell-to-module (CTM) loss model.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    calc = commands.add_parser("calc", help="evaluate one or many module designs")
+    calc.add_argument("--params", help="JSON or CSV parameter file ('-' for JSON on stdin)")
+    calc.add_argument("--set", action="append", type=parse_assignment, default=[], metavar="NAME=VALUE",
+                      help="override an input for every design")
+    calc.add_argument("--template", metavar="KEY", help=TEMPLATE_HELP)
+    calc.add_argument("--format", choices=["json", "csv"], help="output format (default: from --output, else json)")
+    calc.add_argument("-o", "--output", help="output file (default: stdout)")
+    calc.add_argument("--record", metavar="DB", help="also store the runs in this results database")
+    calc.set_defaults(func=cmd_calc)
+
+    report = commands.add_parser("report", help="write PDF reports for many designs")
+    report.add_argument("--params", required=True, help="JSON or CSV parameter file, one design per SKU")
+    report.add_argument("--set", action="append", type=parse_assignment, default=[], metavar="NAME=VALUE",
+                        help="override an input for every design")
+    report.add_argument("--template", metavar="KEY", help=TEMPLATE_HELP)
+    report.add_argument("--label-column", default="sku", help="column naming each design (default: sku)")
+    report.add_argument("--out-dir", default="reports", help="directory for one PDF per design")
+    report.add_argument("--combined", metavar="PDF", help="write a single multi-section PDF instead")
+    report.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    report.set_defaults(func=cmd_report)
+
+    # Listed for --help only; main() hands these straight to their modules
+    for name, (_, help_text) in DELEGATED_COMMANDS.items():
+        commands.add_parser(name, help=help_text)
+
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] and argv[0] in DELEGATED_COMMANDS:
+        import importlib
+
+        return importlib.import_module(DELEGATED_COMMANDS[argv[0]][0]).main(argv[1:])
+
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (OSError, ValueError, KeyError, TypeError) as error:
+        print(f"ctm {args.command}: {error}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
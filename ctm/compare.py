@@ -0,0 +1,96 @@
+"""Side-by-side comparison of named module configurations.
+
+A workspace is a DataFrame with a ``name`` column and one column per model
+input. Each configuration's breakdown row is memoized on its ``params_key``,
+so editing one parameter recomputes only the configurations it touches.
+"""
+from ctm.cache import cached
+from ctm.model import DEFAULT_PARAMS, INPUT_COLUMNS, compute_ctm_cached, loss_values, params_key
+
+# Stacked-bar components, signed so the stack sums to the total CTM loss
+BREAKDOWN_LABELS = {
+    "geometric": "Geometric",
+    "glass": "Glass Reflection",
+    "encapsulant": "Encapsulant Absorption",
+    "ribbon": "Ribbon Shading",
+    "coupling": "Coupling Gain",
+    "resistive": "Resistive",
+    "mismatch": "Mismatch",
+    "jb": "JB & Cable",
+}
+
+SUMMARY_COLUMNS = {
+    "total_ctm_loss": "Total CTM Loss (%)",
+    "module_pmax": "Module Pmax (Wp)",
+    "module_efficiency": "Module Efficiency (%)",
+    "annual_energy_total": "Annual Energy (kWh/year)",
+}
+
+
+def new_workspace():
+    import pandas as pd
+
+    return pd.DataFrame(columns=["name", *INPUT_COLUMNS]).astype({name: float for name in INPUT_COLUMNS})
+
+
+def add_configuration(workspace, name, params):
+    """Return ``workspace`` with ``name`` set to ``params``, replacing a configuration of the same name."""
+    import pandas as pd
+
+    row = {"name": name, **dict(zip(INPUT_COLUMNS, params_key(params)))}
+    kept = workspace[workspace["name"] != name]
+    return pd.concat([kept, pd.DataFrame([row])], ignore_index=True)
+
+
+def read_workspace(source, defaults=None):
+    """Load a workspace CSV; inputs missing from the file take ``defaults`` (the model defaults if not given)."""
+    import pandas as pd
+
+    workspace = pd.read_csv(source)
+    if "name" not in workspace.columns:
+        raise ValueError("configuration file needs a 'name' column")
+    unknown = set(workspace.columns) - {"name", *INPUT_COLUMNS}
+    if unknown:
+        raise ValueError(f"unknown column(s): {', '.join(sorted(unknown))}")
+    defaults = DEFAULT_PARAMS if defaults is None else defaults
+    for name in INPUT_COLUMNS:
+        if name not in workspace.columns:
+            workspace[name] = defaults[name]
+    workspace["name"] = workspace["name"].astype(str)
+    if workspace["name"].duplicated().any():
+        raise ValueError("configuration names must be unique")
+    return workspace[["name", *INPUT_COLUMNS]].astype({name: float for name in INPUT_COLUMNS})
+
+
+def workspace_keys(workspace):
+    """``(name, params_key)`` pairs for the complete rows of a workspace, in order."""
+    complete = workspace.dropna()
+    names = complete["name"].astype(str).tolist()
+    values = complete[list(INPUT_COLUMNS)].to_numpy(dtype=float).tolist()
+    return tuple((name, tuple(row)) for name, row in zip(names, values))
+
+
+@cached(maxsize=4096)
+def comparison_row(key, cell_voc=None, ideality=None, front_ribbons=None):
+    """Memoized signed loss breakdown and summary outputs for one ``params_key`` and cell."""
+    result = compute_ctm_cached(key, cell_voc, ideality, front_ribbons)
+    losses = loss_values(result)
+    losses["coupling"] = -losses["coupling"]
+    row = {BREAKDOWN_LABELS[name]: value for name, value in losses.items()}
+    row.update({label: result[column] for column, label in SUMMARY_COLUMNS.items()})
+    return tuple(row.items())
+
+
+@cached(maxsize=32)
+def comparison_frame(entries, cell_voc=None, ideality=None, front_ribbons=None):
+    """Breakdown table indexed by configuration name for ``workspace_keys`` entries."""
+    import pandas as pd
+
+    rows = [dict(comparison_row(key, cell_voc, ideality, front_ribbons)) for _, key in entries]
+    columns = [*BREAKDOWN_LABELS.values(), *SUMMARY_COLUMNS.values()]
+    return pd.DataFrame(rows, index=pd.Index([name for name, _ in entries], name="Configuration"), columns=columns)
+
+
+def delta_frame(frame, baseline):
+    """Every configuration minus the ``baseline`` row."""
+    return frame - frame.loc[baseline]
@@ -0,0 +1,327 @@
+"""Time-series energy yield from hourly or sub-hourly weather data.
+
+Replaces the single ``module_pmax * annual_irradiance`` estimate with a
+per-timestep simulation: plane-of-array irradiance and air temperature from a
+TMY (or multi-year) CSV/Parquet file are streamed in chunks, and each step
+applies the CTM loss stack, the module's low-irradiance behaviour (from the
+single-diode model in ``ctm.iv``) and a linear power temperature coefficient
+with a Faiman cell-temperature model. Only per-site, per-year running sums
+are kept, so memory stays flat for 20-year 1-minute series.
+
+Expected columns (first match wins, case-insensitive)
+    irradiance:  ``poa_global``, ``poa``, ``g(i)``, ``gti``, ``ghi`` (W/m²)
+    temperature: ``temp_air``, ``t2m``, ``temperature``, ``tamb`` (°C)
+    optional:    ``wind_speed``/``ws10m`` (m/s), ``timestamp``/``time``,
+                 ``site`` (several sites in one file)
+
+GHI is used as-is when no plane-of-array column is present; transposition
+to the module plane is left to the weather source.
+
+Run headless with ``ctm yield --weather tmy.csv``.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from ctm.cache import cached
+from ctm.charts import PIE_LABELS, pie_values
+from ctm.cli import TEMPLATE_HELP, parse_assignment, template_defaults
+from ctm.iv import CELL_VOC, IDEALITY, diode_parameters, max_power_point, photocurrent_for_power
+from ctm.lots import CHUNK_ROWS, iter_chunks
+from ctm.model import DEFAULT_PARAMS, INPUT_COLUMNS, compute_ctm_cached, loss_values, params_key
+
+IRRADIANCE_COLUMNS = ("poa_global", "poa", "g(i)", "gti", "ghi")
+TEMPERATURE_COLUMNS = ("temp_air", "t2m", "temperature", "tamb")
+WIND_COLUMNS = ("wind_speed", "ws10m", "ws")
+TIMESTAMP_COLUMNS = ("timestamp", "time", "datetime", "date")
+
+# TOPCon power temperature coefficient (%/°C), the default without a template,
+# and Faiman heat-loss factors
+TEMPERATURE_COEFFICIENT = -0.30
+FAIMAN_U0 = 25.0  # W/m²K
+FAIMAN_U1 = 6.84  # W/m³sK
+DEFAULT_WIND_SPEED = 1.0
+
+# Irradiance grid (W/m²) for the low-irradiance efficiency lookup
+IRRADIANCE_GRID = np.linspace(0.0, 1500.0, 301)
+
+# Cumulative day count at the start of each month, for files without timestamps
+_MONTH_START_DAYS = np.cumsum([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30])
+
+
+@cached(maxsize=64)
+def relative_efficiency_table(key, cell_voc=CELL_VOC, ideality=IDEALITY, front_ribbons=1.0):
+    """Module efficiency at each ``IRRADIANCE_GRID`` point relative to STC.
+
+    The photocurrent scales with irradiance on the single-diode curve, so
+    shunt losses and the logarithmic Voc drop show up at low light and
+    series-resistance losses above 1000 W/m². ``cell_voc``, ``ideality`` and
+    ``front_ribbons`` describe the cell, e.g. from ``ctm.technology.electrical``.
+    """
+    params = dict(zip(INPUT_COLUMNS, key))
+    il_cells, i0, a, rs, rsh = diode_parameters(
+        np, params["cell_power"], params["num_cells"], params["cell_length"], params["cell_width"],
+        params["num_busbars"], params["ribbon_width"], params["ribbon_thickness"], cell_voc, ideality,
+        front_ribbons)
+    module_pmax = compute_ctm_cached(key, cell_voc, ideality, front_ribbons)["module_pmax"]
+    il_stc, _, _ = photocurrent_for_power(np, module_pmax, il_cells, i0, a, rs, rsh)
+
+    fraction = IRRADIANCE_GRID[1:] / 1000
+    vmpp, impp, _ = max_power_point(np, il_stc * fraction, i0, a, rs, rsh)
+    relative = np.maximum(vmpp * impp, 0) / (module_pmax * fraction)
+    return np.concatenate([[0.0], relative])
+
+
+def template_temperature_coefficient(key=None):
+    """Pmax temperature coefficient (%/°C) of the template ``key``; ``TEMPERATURE_COEFFICIENT`` without one."""
+    if key is None:
+        return TEMPERATURE_COEFFICIENT
+    from ctm.technology import load_template
+
+    return load_template(key)["cell"]["temperature_coefficient"]
+
+
+def _find_column(columns, candidates, required=True):
+    lookup = {str(c).strip().lower(): c for c in columns}
+    for name in candidates:
+        if name in lookup:
+            return lookup[name]
+    if required:
+        raise KeyError(f"No column named any of: {', '.join(candidates)}")
+    return None
+
+
+class YieldAggregator:
+    """Running energy sums per (site, year), plus monthly energy."""
+
+    def __init__(self):
+        self.groups = {}
+
+    def update(self, site, years, months, hours, insolation, relative_insolation, energy_insolation, cell_temperature):
+        """Fold one chunk of per-timestep quantities into the running sums.
+
+        ``insolation`` is kWh/m² per step; ``relative_insolation`` is weighted
+        by the low-irradiance efficiency and ``energy_insolation`` also by the
+        temperature factor.
+        """
+        labels, inverse = np.unique(years, return_inverse=True)
+        n = len(labels)
+        sums = {
+            "steps": np.bincount(inverse, minlength=n),
+            "hours": np.bincount(inverse, weights=hours, minlength=n),
+            "insolation": np.bincount(inverse, weights=insolation, minlength=n),
+            "relative": np.bincount(inverse, weights=relative_insolation, minlength=n),
+            "energy": np.bincount(inverse, weights=energy_insolation, minlength=n),
+            # Irradiance-weighted cell temperature, sum(T * H)
+            "temperature": np.bincount(inverse, weights=cell_temperature * insolation, minlength=n),
+        }
+        monthly = np.bincount(inverse * 12 + (months - 1), weights=energy_insolation, minlength=n * 12).reshape(n, 12)
+        for index, year in enumerate(labels):
+            state = self.groups.get((site, int(year)))
+            if state is None:
+                state = self.groups[(site, int(year))] = dict.fromkeys(sums, 0.0)
+                state["monthly"] = np.zeros(12)
+            for name, values in sums.items():
+                state[name] += values[index]
+            state["monthly"] += monthly[index]
+
+    def summary(self, result):
+        """One row per site and year with energy (kWh) and loss attribution.
+
+        ``result`` is the CTM model output for the simulated design.
+        """
+        import pandas as pd
+
+        rows = []
+        for (site, year), state in sorted(self.groups.items()):
+            insolation = state["insolation"]
+            cell_energy = result["total_cell_power"] * insolation / 1000
+            stc_energy = result["module_pmax"] * insolation / 1000
+            irradiance_energy = result["module_pmax"] * state["relative"] / 1000
+            energy = result["module_pmax"] * state["energy"] / 1000
+            rows.append({
+                "site": site,
+                "year": year,
+                "hours": state["hours"],
+                "insolation_kwh_m2": insolation,
+                "mean_cell_temperature": state["temperature"] / insolation if insolation else np.nan,
+                "cell_energy": cell_energy,
+                "ctm_loss": cell_energy - stc_energy,
+                "low_irradiance_loss": stc_energy - irradiance_energy,
+                "temperature_loss": irradiance_energy - energy,
+                "energy": energy,
+                "specific_yield": energy / result["module_pmax"] * 1000,
+                "performance_ratio": energy / stc_energy if stc_energy else np.nan,
+            })
+        return pd.DataFrame(rows)
+
+    def monthly(self, site, year, result):
+        """Energy (kWh) per calendar month for one site and year."""
+        return result["module_pmax"] * self.groups[(site, year)]["monthly"] / 1000
+
+    def attribution(self, result):
+        """Energy (kWh) lost to each loss mechanism, summed over every site and year.
+
+        The CTM loss is split by category in the same proportions as the loss
+        distribution chart.
+        """
+        import pandas as pd
+
+        summary = self.summary(result)
+        totals = summary[["cell_energy", "ctm_loss", "low_irradiance_loss", "temperature_loss", "energy"]].sum()
+        rows = [("Cell Energy (STC, no losses)", totals["cell_energy"])]
+        shares = pie_values(loss_values(result), result["total_ctm_loss"])
+        if shares is not None:
+            for label, share in zip(PIE_LABELS, shares):
+                rows.append((f"CTM: {label}", -totals["ctm_loss"] * share / result["total_ctm_loss"]))
+        rows.append(("Low Irradiance", -totals["low_irradiance_loss"]))
+        rows.append(("Temperature", -totals["temperature_loss"]))
+        rows.append(("Module DC Energy", totals["energy"]))
+        frame = pd.DataFrame(rows, columns=["Component", "Energy (kWh)"])
+        frame["Share of Cell Energy (%)"] = frame["Energy (kWh)"] / totals["cell_energy"] * 100
+        return frame
+
+
+def _calendar(chunk, timestamp_column, timestamp_format, row_offset, steps_per_year):
+    """Year and month of every row, from timestamps or from the row position."""
+    import pandas as pd
+
+    if timestamp_column is not None:
+        times = pd.to_datetime(chunk[timestamp_column], format=timestamp_format)
+        return times.dt.year.to_numpy(), times.dt.month.to_numpy()
+    position = row_offset + np.arange(len(chunk))
+    day_of_year = (position % steps_per_year) * 365 // steps_per_year
+    months = np.searchsorted(_MONTH_START_DAYS, day_of_year, side="right")
+    return position // steps_per_year + 1, months
+
+
+def _timestep_hours(chunk, timestamp_column, timestamp_format):
+    """Infer the step length from the first two timestamps, defaulting to one hour."""
+    import pandas as pd
+
+    if timestamp_column is None or len(chunk) < 2:
+        return 1.0
+    times = pd.to_datetime(chunk[timestamp_column].iloc[:2], format=timestamp_format)
+    return (times.iloc[1] - times.iloc[0]).total_seconds() / 3600
+
+
+def simulate_yield(weather_sources, base_params=None, chunk_rows=CHUNK_ROWS, timestep_hours=None,
+                   temperature_coefficient=TEMPERATURE_COEFFICIENT, timestamp_format=None,
+                   aggregator=None, on_chunk=None, cell=None):
+    """Stream one or more weather files through the yield model.
+
+    ``weather_sources`` is a path/file object or a list of them; each file is
+    a site (named after the file) unless it has a ``site`` column. The step
+    length is inferred from the timestamps when ``timestep_hours`` is not
+    given. ``on_chunk(rows, aggregator)`` is called after each chunk.
+    ``cell`` holds the template cell constants from ``ctm.technology.electrical``
+    and ``temperature_coefficient`` (%/°C) the template's, from
+    ``template_temperature_coefficient``.
+    Returns the ``YieldAggregator``.
+    """
+    if isinstance(weather_sources, (str, os.PathLike)) or hasattr(weather_sources, "read"):
+        weather_sources = [weather_sources]
+    key = params_key(DEFAULT_PARAMS if base_params is None else base_params)
+    efficiency_table = relative_efficiency_table(key, **(cell or {}))
+    gamma = temperature_coefficient / 100
+    aggregator = aggregator or YieldAggregator()
+
+    for source in weather_sources:
+        site = os.path.splitext(os.path.basename(str(getattr(source, "name", source))))[0]
+        columns = None
+        row_offset = 0
+        step_hours = timestep_hours
+        for chunk in iter_chunks(source, chunk_rows=chunk_rows):
+            if columns is None:
+                columns = {
+                    "irradiance": _find_column(chunk.columns, IRRADIANCE_COLUMNS),
+                    "temperature": _find_column(chunk.columns, TEMPERATURE_COLUMNS),
+                    "wind": _find_column(chunk.columns, WIND_COLUMNS, required=False),
+                    "timestamp": _find_column(chunk.columns, TIMESTAMP_COLUMNS, required=False),
+                    "site": _find_column(chunk.columns, ("site",), required=False),
+                }
+                if step_hours is None:
+                    step_hours = _timestep_hours(chunk, columns["timestamp"], timestamp_format)
+                steps_per_year = int(round(8760 / step_hours))
+
+            irradiance = np.nan_to_num(chunk[columns["irradiance"]].to_numpy(dtype=np.float64))
+            irradiance = np.maximum(irradiance, 0)
+            air_temperature = chunk[columns["temperature"]].to_numpy(dtype=np.float64)
+            if columns["wind"] is not None:
+                wind = np.nan_to_num(chunk[columns["wind"]].to_numpy(dtype=np.float64), nan=DEFAULT_WIND_SPEED)
+            else:
+                wind = DEFAULT_WIND_SPEED
+            years, months = _calendar(chunk, columns["timestamp"], timestamp_format, row_offset, steps_per_year)
+
+            # Per-step chain: STC energy -> low-irradiance efficiency -> temperature
+            insolation = irradiance * step_hours / 1000
+            relative_insolation = insolation * np.interp(irradiance, IRRADIANCE_GRID, efficiency_table)
+            cell_temperature = air_temperature + irradiance / (FAIMAN_U0 + FAIMAN_U1 * wind)
+            temperature_factor = np.maximum(1 + gamma * (cell_temperature - 25), 0)
+            energy_insolation = np.nan_to_num(relative_insolation * temperature_factor)
+            hours = np.full(len(chunk), step_hours)
+            cell_temperature = np.nan_to_num(cell_temperature, nan=25.0)
+
+            if columns["site"] is None:
+                aggregator.update(site, years, months, hours, insolation, relative_insolation,
+                                  energy_insolation, cell_temperature)
+            else:
+                sites = chunk[columns["site"]].astype(str).to_numpy()
+                for label in np.unique(sites):
+                    mask = sites == label
+                    aggregator.update(label, years[mask], months[mask], hours[mask], insolation[mask],
+                                      relative_insolation[mask], energy_insolation[mask], cell_temperature[mask])
+            row_offset += len(chunk)
+            if on_chunk is not None:
+                on_chunk(len(chunk), aggregator)
+    return aggregator
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(prog="ctm yield", description="Time-series energy yield from weather data.")
+    parser.add_argument("--weather", required=True, action="append",
+                        help="weather file (CSV or Parquet); repeat for several sites")
+    parser.add_argument("--param", action="append", type=parse_assignment, default=[], metavar="NAME=VALUE",
+                        help="override a model input")
+    parser.add_argument("--template", metavar="KEY", help=TEMPLATE_HELP)
+    parser.add_argument("--timestep-hours", type=float, help="step length (default: from timestamps, else 1 h)")
+    parser.add_argument("--timestamp-format", help="strftime format of the timestamp column, e.g. %%Y%%m%%d:%%H%%M")
+    parser.add_argument("--temperature-coefficient", type=float,
+                        help=f"Pmax temperature coefficient in %%/°C (default: the template's, else "
+                             f"{TEMPERATURE_COEFFICIENT})")
+    parser.add_argument("--summary", help="per-site/per-year summary CSV (default: stdout)")
+    parser.add_argument("--attribution", help="loss attribution CSV")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    return parser
+
+
+def run(args):
+    defaults, cell = template_defaults(args.template)
+    params = dict(defaults)
+    params.update(dict(args.param))
+    temperature_coefficient = args.temperature_coefficient
+    if temperature_coefficient is None:
+        temperature_coefficient = template_temperature_coefficient(args.template)
+    aggregator = simulate_yield(args.weather, params, args.chunk_rows, args.timestep_hours,
+                                temperature_coefficient, args.timestamp_format, cell=cell)
+    result = compute_ctm_cached(params_key(params), **cell)
+    summary = aggregator.summary(result)
+    summary.to_csv(args.summary or sys.stdout, index=False)
+    if args.attribution:
+        aggregator.attribution(result).to_csv(args.attribution, index=False)
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return run(args)
+    except (OSError, ValueError, KeyError) as error:
+        print(f"ctm yield: {error}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
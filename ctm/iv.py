@@ -0,0 +1,210 @@
+"""Single-diode electrical model for series-connected half-cut cell modules.
+
+The two halves of a half-cut module are wired in parallel, so the module
+behaves as ``num_cells / 2`` cells in series carrying twice the cell current.
+Its I-V curve follows the single-diode equation
+
+    I = IL - I0 * (exp((V + I*Rs) / a) - 1) - (V + I*Rs) / Rsh
+
+with the series resistance ``Rs`` built up from the cell, finger grid and
+ribbon/busbar geometry. Written in terms of the diode voltage
+``Vd = V + I*Rs`` both I and V are explicit, so Voc, Isc and the maximum
+power point each reduce to a one-dimensional Newton solve in ``Vd``.
+
+Every function takes the array namespace ``xp`` first (NumPy, or the scalar
+stand-in from ``ctm.model``) and runs a fixed number of Newton steps, so the
+same code solves one curve or millions of curves in one vectorized pass.
+"""
+
+# Half-cut TOPCon cell at STC: Voc ~ 0.72 V, ideality 1.1 at 25 °C. Other
+# technologies pass their own ``cell_voc`` and ``ideality`` (see ``ctm.technology``)
+CELL_VOC = 0.72
+IDEALITY = 1.1
+KT_OVER_Q = 0.025693  # V at 25 °C
+THERMAL_VOLTAGE = KT_OVER_Q * IDEALITY
+PARALLEL_STRINGS = 2
+
+# Specific resistances (ohm cm²) and sheet resistance of the finger grid (ohm/sq)
+CELL_SERIES_RESISTANCE = 0.45
+CELL_SHUNT_RESISTANCE = 5000.0
+FINGER_SHEET_RESISTANCE = 0.6
+
+RIBBON_RESISTIVITY = 1.7e-8  # ohm m, copper
+CELL_GAP = 2.0  # mm of ribbon between neighbouring cells
+
+# Optical coupling can lift the module photocurrent slightly above the bare cells
+MAX_PHOTOCURRENT_GAIN = 1.02
+# Relative shortfall of the curve's Pmp below module_pmax that marks the design infeasible
+PMAX_TOLERANCE = 1e-6
+
+NEWTON_ITERATIONS = 8
+
+
+def cell_series_resistance(cell_length, cell_width, num_busbars, ribbon_width, ribbon_thickness):
+    """Series resistance (ohm) of one cell and of its share of the ribbons."""
+    cell_area_cm2 = cell_length * cell_width / 100
+
+    # Fingers carry current to the nearest busbar: R = Rsheet * pitch² / 12 per unit area
+    busbar_pitch_cm = cell_length / num_busbars / 10
+    finger_resistance = FINGER_SHEET_RESISTANCE * busbar_pitch_cm ** 2 / 12
+
+    # Ribbons run across the cell width, collecting current along their length
+    # (a third of the length on average), then bridge the gap to the next cell
+    ribbon_area = ribbon_width * ribbon_thickness / 1e6
+    ribbon_length = (cell_width / 3 + CELL_GAP) / 1000
+    ribbon_resistance = RIBBON_RESISTIVITY * ribbon_length / (ribbon_area * num_busbars)
+
+    return (CELL_SERIES_RESISTANCE + finger_resistance) / cell_area_cm2, ribbon_resistance
+
+
+def diode_parameters(xp, cell_power, num_cells, cell_length, cell_width, num_busbars, ribbon_width, ribbon_thickness,
+                     cell_voc=CELL_VOC, ideality=IDEALITY, front_ribbons=1.0):
+    """Module single-diode parameters with the photocurrent of the bare cells.
+
+    ``front_ribbons`` of 0 leaves the ribbon resistance out, for cells
+    without front ribbons.
+
+    Returns ``(il, i0, a, rs, rsh)``: photocurrent and saturation current (A),
+    modified ideality voltage (V) and series/shunt resistance (ohm).
+    """
+    cell_area_cm2 = cell_length * cell_width / 100
+    cell_rs, ribbon_rs = cell_series_resistance(cell_length, cell_width, num_busbars, ribbon_width, ribbon_thickness)
+
+    # Photocurrent of a cell flashing at cell_power, from Green's fill factor
+    # with the cell's own series resistance: FF = FF0 * (1 - Rs * Isc / Voc)
+    thermal_voltage = KT_OVER_Q * ideality
+    voc_norm = cell_voc / thermal_voltage
+    ideal_fill_factor = (voc_norm - xp.log(voc_norm + 0.72)) / (voc_norm + 1)
+    # Solving cell_power = Voc * Isc * FF0 * (1 - Rs * Isc / Voc) for Isc
+    isc_ideal = cell_power / (cell_voc * ideal_fill_factor)
+    cell_photocurrent = 2 * isc_ideal / (1 + xp.sqrt(xp.maximum(1 - 4 * cell_rs * isc_ideal / cell_voc, 0)))
+    cell_saturation_current = cell_photocurrent / (xp.exp(voc_norm) - 1)
+
+    series_cells = num_cells / PARALLEL_STRINGS
+    il = PARALLEL_STRINGS * cell_photocurrent
+    i0 = PARALLEL_STRINGS * cell_saturation_current
+    a = series_cells * thermal_voltage
+    rs = series_cells / PARALLEL_STRINGS * (cell_rs + ribbon_rs * front_ribbons)
+    rsh = series_cells / PARALLEL_STRINGS * CELL_SHUNT_RESISTANCE / cell_area_cm2
+    return il, i0, a, rs, rsh
+
+
+def _current(xp, vd, il, i0, a, rsh):
+    return il - i0 * (xp.exp(vd / a) - 1) - vd / rsh
+
+
+def open_circuit_voltage(xp, il, i0, a, rsh):
+    """Voc: the diode voltage at which the terminal current is zero."""
+    # Start from the ideal-diode value; the residual is concave, so Newton
+    # approaches the root monotonically from above
+    vd = a * xp.log(il / i0 + 1)
+    for _ in range(NEWTON_ITERATIONS // 2):
+        conductance = i0 / a * xp.exp(vd / a) + 1 / rsh
+        vd = vd + _current(xp, vd, il, i0, a, rsh) / conductance
+    return vd
+
+
+def short_circuit_current(xp, il, i0, a, rs, rsh):
+    """Isc: the terminal current at zero voltage, where ``Vd = I * Rs``."""
+    vd = rs * il / (1 + rs / rsh)
+    for _ in range(NEWTON_ITERATIONS // 2):
+        conductance = i0 / a * xp.exp(vd / a) + 1 / rsh
+        residual = vd - rs * _current(xp, vd, il, i0, a, rsh)
+        vd = vd - residual / (1 + rs * conductance)
+    return vd / rs
+
+
+def max_power_point(xp, il, i0, a, rs, rsh, voc_diode=None, vd=None, iterations=NEWTON_ITERATIONS):
+    """Return ``(vmpp, impp, diode_voltage)`` at the maximum power point.
+
+    Solves dP/dVd = I * (1 + g*Rs) - V * g = 0, where g = -dI/dVd is the
+    diode plus shunt conductance. ``vd`` warm-starts the solve from a nearby
+    curve, which needs fewer ``iterations``.
+    """
+    if voc_diode is None:
+        voc_diode = open_circuit_voltage(xp, il, i0, a, rsh)
+    if vd is None:
+        # Classic ideal-diode estimate of the MPP voltage as the starting point
+        vd = voc_diode - a * xp.log(1 + voc_diode / a)
+    vd = xp.clip(vd, 0, voc_diode)
+    for _ in range(iterations):
+        diode_current = i0 * xp.exp(vd / a)
+        g = diode_current / a + 1 / rsh
+        dg = diode_current / (a * a)
+        current = il - diode_current + i0 - vd / rsh
+        voltage = vd - current * rs
+        slope = current * (1 + g * rs) - voltage * g
+        curvature = -2 * g * (1 + g * rs) + dg * (current * rs - voltage)
+        vd = xp.clip(vd - slope / curvature, 0, voc_diode)
+
+    current = _current(xp, vd, il, i0, a, rsh)
+    return vd - current * rs, current, vd
+
+
+def photocurrent_for_power(xp, module_pmax, il_cells, i0, a, rs, rsh):
+    """Photocurrent at which the curve's MPP delivers ``module_pmax``.
+
+    The CTM loss budget fixes the module power; optical, mismatch and other
+    current losses are folded into the photocurrent. By the envelope theorem
+    dPmp/dIL = Vmpp / (1 + g*Rs), which makes each update an exact Newton
+    step. The photocurrent is capped at ``MAX_PHOTOCURRENT_GAIN`` times that of
+    the bare cells: when the ribbons are too resistive for the loss budget,
+    the curve delivers less than ``module_pmax`` rather than an inflated Isc,
+    and ``module_electrical`` flags the design.
+
+    Returns ``(il, voc_diode, mpp_diode_voltage)`` so callers can warm-start.
+    """
+    upper = il_cells * MAX_PHOTOCURRENT_GAIN
+    il, vd = il_cells, None
+    for step in range(3):
+        voc_diode = open_circuit_voltage(xp, il, i0, a, rsh)
+        vmpp, impp, vd = max_power_point(xp, il, i0, a, rs, rsh, voc_diode, vd,
+                                         NEWTON_ITERATIONS if step == 0 else 3)
+        g = i0 / a * xp.exp(vd / a) + 1 / rsh
+        il = xp.clip(il + (module_pmax - vmpp * impp) * (1 + g * rs) / vmpp, 0, upper)
+    return il, open_circuit_voltage(xp, il, i0, a, rsh), vd
+
+
+def module_electrical(xp, module_pmax, cell_power, num_cells, cell_length, cell_width,
+                      num_busbars, ribbon_width, ribbon_thickness, cell_voc=CELL_VOC, ideality=IDEALITY,
+                      front_ribbons=1.0):
+    """Voc, Isc, Vmpp, Impp, fill factor and Rs of a module delivering ``module_pmax``.
+
+    Where the photocurrent cap stops the curve short of ``module_pmax`` (the
+    ribbons are too resistive for the loss budget), Voc, Isc, Vmpp, Impp and
+    the fill factor are NaN: no curve of the design matches its Pmax.
+    """
+    il_cells, i0, a, rs, rsh = diode_parameters(
+        xp, cell_power, num_cells, cell_length, cell_width, num_busbars, ribbon_width, ribbon_thickness,
+        cell_voc, ideality, front_ribbons)
+    il, voc, vd = photocurrent_for_power(xp, module_pmax, il_cells, i0, a, rs, rsh)
+    vmpp, impp, _ = max_power_point(xp, il, i0, a, rs, rsh, voc, vd, 3)
+    isc = short_circuit_current(xp, il, i0, a, rs, rsh)
+    reached = vmpp * impp >= module_pmax * (1 - PMAX_TOLERANCE)
+    outputs = {
+        "module_voc": voc,
+        "module_isc": isc,
+        "module_vmpp": vmpp,
+        "module_impp": impp,
+        "module_fill_factor": vmpp * impp / (voc * isc),
+    }
+    outputs = {name: xp.where(reached, value, xp.nan) for name, value in outputs.items()}
+    outputs["module_series_resistance"] = rs
+    return outputs
+
+
+def iv_curve(module_pmax, cell_power, num_cells, cell_length, cell_width, num_busbars, ribbon_width,
+             ribbon_thickness, points=100, cell_voc=CELL_VOC, ideality=IDEALITY, front_ribbons=1.0):
+    """Sample one module I-V curve from Isc to Voc; returns ``(voltage, current)`` arrays."""
+    import numpy as np
+
+    il_cells, i0, a, rs, rsh = diode_parameters(
+        np, cell_power, num_cells, cell_length, cell_width, num_busbars, ribbon_width, ribbon_thickness,
+        cell_voc, ideality, front_ribbons)
+    il, voc, _ = photocurrent_for_power(np, module_pmax, il_cells, i0, a, rs, rsh)
+    isc = short_circuit_current(np, il, i0, a, rs, rsh)
+
+    # Points are spaced evenly in diode voltage, from Isc*Rs (V = 0) to Voc
+    vd = np.linspace(isc * rs, voc, points)
+    current = _current(np, vd, il, i0, a, rsh)
+    return vd - current * rs, current
@@ -0,0 +1,208 @@
+"""Lifetime energy projection for a fleet of modules with stochastic degradation.
+
+Each module starts at the CTM model's ``module_pmax`` and loses power to
+light-induced degradation (LID) in its first days. Light- and elevated
+temperature-induced degradation (LeTID) then rises over the first year or
+two and regenerates. Linear wear runs on top. Every module draws its own LID,
+LeTID amplitude and linear rate from normal distributions clipped at zero.
+
+The fleet is simulated year by year. Only the per-module degradation
+parameters and running lifetime energy are held, so memory grows with the
+fleet size and not with the number of years. Each year is a handful of
+vectorized operations over the fleet. A 10^6-module, 30-year projection
+takes seconds. Yearly energy is the model's ``annual_energy_total`` scaled
+by the mid-year power factor, which is exact for the linear term.
+
+P90 is the value exceeded by 90% of modules (the 10th percentile), as in
+bankability reports; P50 is the median.
+
+    ctm lifetime --modules 1000000 --years 30 -o lifetime.csv
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from ctm.model import compute_ctm_point
+
+# Means and standard deviations in % of initial Pmax (rate in %/year); TOPCon-like
+DEGRADATION_DEFAULTS = {
+    "lid": 1.0,
+    "lid_spread": 0.3,
+    "letid": 0.5,
+    "letid_spread": 0.25,
+    "rate": 0.40,
+    "rate_spread": 0.10,
+}
+
+# LeTID rises with this time constant and regenerates with the second (years)
+LETID_ONSET_YEARS = 1.0
+LETID_RECOVERY_YEARS = 4.0
+
+DEFAULT_MODULES = 100_000
+DEFAULT_YEARS = 30
+
+# Modules per RNG stream; results do not depend on the fleet being drawn in pieces
+SHARD_SIZE = 65_536
+
+
+def _letid_shape(t):
+    """LeTID progress at ``t`` years, scaled to peak at 1."""
+    shape = -np.expm1(-t / LETID_ONSET_YEARS) * np.exp(-t / LETID_RECOVERY_YEARS)
+    peak_time = LETID_ONSET_YEARS * np.log1p(LETID_RECOVERY_YEARS / LETID_ONSET_YEARS)
+    return shape / (-np.expm1(-peak_time / LETID_ONSET_YEARS) * np.exp(-peak_time / LETID_RECOVERY_YEARS))
+
+
+def sample_degradation(rng, n_modules, degradation):
+    """Per-module ``(lid, letid, rate)`` as fractions (rate per year), each of shape ``(n_modules,)``."""
+    return tuple(
+        np.maximum(rng.normal(degradation[name], degradation[f"{name}_spread"], n_modules), 0) / 100
+        for name in ("lid", "letid", "rate")
+    )
+
+
+def draw_fleet(n_modules, seed=0, degradation=None):
+    """Degradation parameters for the whole fleet, drawn shard by shard from child seeds of ``seed``."""
+    degradation = {**DEGRADATION_DEFAULTS, **(degradation or {})}
+    n_shards = -(-n_modules // SHARD_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(n_shards)
+    shards = [sample_degradation(np.random.default_rng(s), min(SHARD_SIZE, n_modules - i * SHARD_SIZE), degradation)
+              for i, s in enumerate(seeds)]
+    return tuple(np.concatenate(parts) for parts in zip(*shards))
+
+
+def iter_fleet_years(fleet, years):
+    """Yield ``(year, end_factor, energy_factor)`` per year: each module's Pmax relative to new.
+
+    ``end_factor`` is at the end of the year, ``energy_factor`` at mid-year.
+    Arrays are reused between years; copy them to keep one.
+    """
+    lid, letid, rate = fleet
+    after_lid = 1 - lid
+    end_factor = np.empty_like(lid)
+    energy_factor = np.empty_like(lid)
+    for year in range(1, years + 1):
+        for t, out in ((year - 0.5, energy_factor), (year, end_factor)):
+            np.multiply(letid, -_letid_shape(t), out=out)
+            out += 1
+            out *= after_lid
+            out *= 1 - rate * t
+        yield year, end_factor, energy_factor
+
+
+def simulate_lifetime(params, n_modules=DEFAULT_MODULES, years=DEFAULT_YEARS, seed=0, degradation=None, on_year=None,
+                      cell=None):
+    """Project a fleet of ``n_modules`` over ``years`` and return ``(yearly, summary)``.
+
+    ``yearly`` is a DataFrame with one row per year: Pmax (W) and energy (kWh
+    per module) as mean/P50/P90, mean degradation (% of initial Pmax), fleet
+    energy (MWh) and the mean energy the CTM losses cost that year. ``summary``
+    holds lifetime energy per module (mean/P50/P90), fleet totals and the
+    split of lifetime losses between CTM and degradation. ``on_year(year)`` is
+    called after each simulated year. ``cell`` holds the template cell
+    constants from ``ctm.technology.electrical``.
+    """
+    import pandas as pd
+
+    result = compute_ctm_point(**params, **(cell or {}))
+    module_pmax, annual_energy = result["module_pmax"], result["annual_energy_total"]
+    ctm_energy = annual_energy * (result["total_cell_power"] / module_pmax - 1)
+
+    fleet = draw_fleet(n_modules, seed, degradation)
+    lifetime_factor = np.zeros(n_modules)
+    rows = []
+    for year, end_factor, energy_factor in iter_fleet_years(fleet, years):
+        lifetime_factor += energy_factor
+        end_p10, end_p50 = np.percentile(end_factor, [10, 50])
+        energy_p10, energy_p50 = np.percentile(energy_factor, [10, 50])
+        energy_mean = energy_factor.mean()
+        rows.append({
+            "year": year,
+            "pmax_mean": module_pmax * end_factor.mean(),
+            "pmax_p50": module_pmax * end_p50,
+            "pmax_p90": module_pmax * end_p10,
+            "degradation_mean": (1 - end_factor.mean()) * 100,
+            "energy_mean": annual_energy * energy_mean,
+            "energy_p50": annual_energy * energy_p50,
+            "energy_p90": annual_energy * energy_p10,
+            "fleet_energy": annual_energy * energy_mean * n_modules / 1000,
+            "ctm_loss_energy": ctm_energy * energy_mean,
+        })
+        if on_year is not None:
+            on_year(year)
+
+    yearly = pd.DataFrame(rows)
+    lifetime_p10, lifetime_p50 = np.percentile(lifetime_factor, [10, 50])
+    lifetime_mean = lifetime_factor.mean()
+    ctm_loss = ctm_energy * lifetime_mean
+    degradation_loss = annual_energy * (years - lifetime_mean)
+    summary = {
+        "modules": n_modules,
+        "years": years,
+        "lifetime_energy_mean": annual_energy * lifetime_mean,
+        "lifetime_energy_p50": annual_energy * lifetime_p50,
+        "lifetime_energy_p90": annual_energy * lifetime_p10,
+        "specific_yield_p50": annual_energy * lifetime_p50 / module_pmax * 1000,
+        "fleet_lifetime_energy": annual_energy * lifetime_mean * n_modules / 1000,
+        "ctm_loss_energy": ctm_loss,
+        "degradation_loss_energy": degradation_loss,
+        "ctm_loss_share": ctm_loss / (ctm_loss + degradation_loss) * 100,
+        "end_of_life_pmax_p50": yearly["pmax_p50"].iloc[-1],
+        "end_of_life_pmax_p90": yearly["pmax_p90"].iloc[-1],
+    }
+    return yearly, summary
+
+
+def build_parser(parser=None):
+    from ctm.cli import TEMPLATE_HELP, parse_assignment
+
+    parser = parser or argparse.ArgumentParser(prog="ctm lifetime",
+                                               description="Year-by-year Pmax and energy of a degrading fleet.")
+    parser.add_argument("--param", action="append", type=parse_assignment, default=[], metavar="NAME=VALUE",
+                        help="override a model input")
+    parser.add_argument("--template", metavar="KEY", help=TEMPLATE_HELP)
+    parser.add_argument("--modules", type=int, default=DEFAULT_MODULES, help="fleet size (default: %(default)s)")
+    parser.add_argument("--years", type=int, default=DEFAULT_YEARS, help="(default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    for name, value in DEGRADATION_DEFAULTS.items():
+        unit = "%%/year" if name.startswith("rate") else "%%"
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name, type=float, default=value,
+                            help=f"{unit} (default: %(default)s)")
+    parser.add_argument("--summary", help="lifetime summary CSV (default: stderr)")
+    parser.add_argument("-o", "--output", help="yearly CSV (default: stdout)")
+    return parser
+
+
+def run(args):
+    from ctm.cli import template_defaults
+
+    defaults, cell = template_defaults(args.template)
+    params = dict(defaults)
+    params.update(dict(args.param))
+    degradation = {name: getattr(args, name) for name in DEGRADATION_DEFAULTS}
+    yearly, summary = simulate_lifetime(params, args.modules, args.years, args.seed, degradation, cell=cell)
+    yearly.to_csv(args.output or sys.stdout, index=False)
+    if args.summary:
+        import pandas as pd
+
+        pd.DataFrame([summary]).to_csv(args.summary, index=False)
+    else:
+        for name, value in summary.items():
+            print(f"{name}: {value:,.6g}", file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.modules < 1 or args.years < 1:
+        print("ctm lifetime: --modules and --years must be at least 1", file=sys.stderr)
+        return 1
+    try:
+        return run(args)
+    except (OSError, ValueError, KeyError) as error:
+        print(f"ctm lifetime: {error}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,310 @@
+"""Production-lot CTM analysis from cell and module flash-test data.
+
+Lots can be millions of rows, so both files are streamed in chunks (pandas
+chunked CSV reader or pyarrow Parquet batches) and every aggregate is updated
+incrementally; only per-module cell power totals are held in memory.
+
+Expected columns
+    modules: ``module_id``, ``module_pmax`` and optionally ``module_voc``,
+             ``module_isc``, ``shift``, ``bom``, ``cell_power_total`` and any
+             model input from ``ctm.model.INPUT_COLUMNS`` (per-row overrides)
+    cells:   ``module_id``, ``cell_pmax`` (only needed when the module file
+             has no ``cell_power_total`` column)
+
+Run headless with ``ctm lot --modules modules.csv --cells cells.csv``.
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from ctm.cli import TEMPLATE_HELP, parse_assignment, template_defaults
+from ctm.model import DEFAULT_PARAMS, INPUT_COLUMNS, LOSS_KEYS, compute_ctm
+
+CHUNK_ROWS = 250_000
+
+# Histogram bins for CTM loss (%), shared by every group so chunks add up exactly
+LOSS_BIN_EDGES = np.round(np.arange(-5.0, 10.0001, 0.05), 4)
+
+
+def iter_chunks(source, columns=None, chunk_rows=CHUNK_ROWS):
+    """Yield DataFrames of at most ``chunk_rows`` rows from a CSV or Parquet file.
+
+    ``source`` may be a path or a binary file object (e.g. a Streamlit upload).
+    """
+    name = str(getattr(source, "name", source)).lower()
+    if name.endswith((".parquet", ".pq")):
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(source)
+        if columns is not None:
+            columns = [c for c in columns if c in parquet.schema_arrow.names]
+        for batch in parquet.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        import pandas as pd
+
+        usecols = None if columns is None else (lambda c: c in columns)
+        yield from pd.read_csv(source, chunksize=chunk_rows, usecols=usecols)
+
+
+def cell_power_totals(cell_source, chunk_rows=CHUNK_ROWS):
+    """Sum ``cell_pmax`` per ``module_id`` over a streamed cell flash file."""
+    import pandas as pd
+
+    def combine(frames):
+        return pd.concat(frames).groupby(level=0, sort=False).sum()
+
+    # Partial sums are merged in batches rather than per chunk, which would
+    # realign the full per-module index on every chunk
+    partials, pending_rows, totals_rows = [], 0, 0
+    for chunk in iter_chunks(cell_source, ["module_id", "cell_pmax"], chunk_rows):
+        codes, ids = pd.factorize(chunk["module_id"])
+        partial = pd.DataFrame({
+            "sum": np.bincount(codes, weights=chunk["cell_pmax"].to_numpy(dtype=np.float64), minlength=len(ids)),
+            "count": np.bincount(codes, minlength=len(ids)),
+        }, index=ids)
+        partials.append(partial)
+        pending_rows += len(partial)
+        if pending_rows > max(chunk_rows, totals_rows):
+            partials = [combine(partials)]
+            totals_rows, pending_rows = len(partials[0]), 0
+    if not partials:
+        return pd.DataFrame(columns=["sum", "count"])
+    return combine(partials)
+
+
+class LotAggregator:
+    """Running per-group statistics and histograms of measured CTM loss."""
+
+    def __init__(self, group_by=("shift", "bom"), bin_edges=LOSS_BIN_EDGES):
+        self.group_by = tuple(group_by)
+        self.bin_edges = bin_edges
+        self.groups = {}
+        self.dropped = 0
+
+    def update(self, results, dropped=None):
+        """Fold one chunk of per-module results into the running aggregates.
+
+        ``dropped`` holds the group columns of the chunk's modules that could not be scored.
+        """
+        loss = results["measured_ctm_loss"].to_numpy(dtype=np.float64)
+        modeled = results["modeled_ctm_loss"].to_numpy(dtype=np.float64)
+        bins = np.clip(np.searchsorted(self.bin_edges, loss, side="right") - 1, 0, len(self.bin_edges) - 2)
+        for key in self.group_by:
+            labels = results[key].astype(str).to_numpy()
+            for label in np.unique(labels):
+                mask = labels == label
+                self._add((key, label), loss[mask], modeled[mask], bins[mask])
+        self._add(("lot", "all"), loss, modeled, bins)
+
+        if dropped is None or not len(dropped):
+            return
+        self.dropped += len(dropped)
+        empty = np.empty(0)
+        for key in self.group_by:
+            labels, counts = np.unique(dropped[key].astype(str).to_numpy(), return_counts=True)
+            for label, count in zip(labels, counts):
+                self._add((key, label), empty, empty, empty.astype(np.int64), int(count))
+        self._add(("lot", "all"), empty, empty, empty.astype(np.int64), len(dropped))
+
+    def _add(self, group, loss, modeled, bins, dropped=0):
+        state = self.groups.get(group)
+        if state is None:
+            state = self.groups[group] = {
+                "count": 0, "dropped": 0, "sum": 0.0, "sumsq": 0.0, "modeled_sum": 0.0,
+                "min": np.inf, "max": -np.inf,
+                "histogram": np.zeros(len(self.bin_edges) - 1, dtype=np.int64),
+            }
+        state["dropped"] += dropped
+        state["count"] += len(loss)
+        state["sum"] += loss.sum()
+        state["sumsq"] += np.square(loss).sum()
+        state["modeled_sum"] += modeled.sum()
+        if len(loss):
+            state["min"] = min(state["min"], loss.min())
+            state["max"] = max(state["max"], loss.max())
+        state["histogram"] += np.bincount(bins, minlength=len(state["histogram"]))
+
+    def summary(self):
+        """One row per group with count, mean/std/min/max measured loss and mean modeled loss.
+
+        ``dropped_modules`` counts the modules without matching cell data or with a non-finite or
+        non-positive cell power total, which are left out of the statistics.
+        """
+        import pandas as pd
+
+        rows = []
+        for (key, label), state in self.groups.items():
+            n = state["count"]
+            mean = state["sum"] / n if n else np.nan
+            variance = state["sumsq"] / n - mean ** 2 if n else np.nan
+            rows.append({
+                "group": key,
+                "value": label,
+                "modules": n,
+                "dropped_modules": state["dropped"],
+                "measured_ctm_loss_mean": mean,
+                "measured_ctm_loss_std": np.sqrt(max(variance, 0.0)) if n else np.nan,
+                "measured_ctm_loss_min": state["min"],
+                "measured_ctm_loss_max": state["max"],
+                "modeled_ctm_loss_mean": state["modeled_sum"] / n if n else np.nan,
+            })
+        return pd.DataFrame(rows)
+
+    def histogram(self, group=("lot", "all")):
+        """Bin centres and counts of measured CTM loss for one group."""
+        centers = (self.bin_edges[:-1] + self.bin_edges[1:]) / 2
+        return centers, self.groups[group]["histogram"]
+
+
+def analyze_chunk(modules, cell_totals=None, base_params=None, cell=None):
+    """Measured versus modeled CTM for one chunk of module flash data.
+
+    Returns ``(results, dropped)``: the scored modules, and the ``module_id``,
+    ``shift`` and ``bom`` of those without matching cell data or with a
+    non-finite or non-positive cell power total. ``cell`` holds the template
+    cell constants from ``ctm.technology.electrical``.
+    """
+    import pandas as pd
+
+    params = dict(DEFAULT_PARAMS if base_params is None else base_params)
+    inputs = {name: modules[name].to_numpy(dtype=np.float64) for name in INPUT_COLUMNS if name in modules}
+
+    if "cell_power_total" in modules:
+        cell_total = modules["cell_power_total"].to_numpy(dtype=np.float64)
+    elif cell_totals is not None:
+        matched = cell_totals.reindex(modules["module_id"])
+        cell_total = matched["sum"].to_numpy(dtype=np.float64)
+        inputs.setdefault("num_cells", matched["count"].to_numpy(dtype=np.float64))
+    else:
+        raise ValueError("Module data has no cell_power_total column and no cell flash data was given")
+
+    # The model works from power per cell; derive it from the measured total.
+    # Modules that cannot be scored give NaN or inf here and are dropped below
+    module_pmax = modules["module_pmax"].to_numpy(dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        inputs["cell_power"] = cell_total / inputs.get("num_cells", params["num_cells"])
+        modeled = compute_ctm({**params, **inputs}, **(cell or {}))
+        measured_ratio = module_pmax / cell_total
+    results = {
+        "module_id": modules["module_id"].to_numpy(),
+        "shift": modules["shift"].to_numpy() if "shift" in modules else "n/a",
+        "bom": modules["bom"].to_numpy() if "bom" in modules else "n/a",
+        "cell_power_total": cell_total,
+        "module_pmax": module_pmax,
+        "measured_ctm_ratio": measured_ratio,
+        "measured_ctm_loss": (1 - measured_ratio) * 100,
+        "modeled_ctm_ratio": modeled["ctm_ratio"],
+        "modeled_ctm_loss": modeled["total_ctm_loss"],
+        "modeled_module_pmax": modeled["module_pmax"],
+        "modeled_module_voc": modeled["module_voc"],
+        "modeled_module_isc": modeled["module_isc"],
+        "modeled_fill_factor": modeled["module_fill_factor"],
+        "ctm_ratio_delta": measured_ratio - modeled["ctm_ratio"],
+    }
+    for column in LOSS_KEYS.values():
+        results[column] = modeled[column]
+    for column in ("module_voc", "module_isc"):
+        if column in modules:
+            results[column] = modules[column].to_numpy(dtype=np.float64)
+
+    frame = pd.DataFrame(results)
+    # Modules without matching cell data cannot be scored
+    scored = np.isfinite(cell_total) & (cell_total > 0)
+    return frame[scored], frame.loc[~scored, ["module_id", "shift", "bom"]]
+
+
+class _ResultWriter:
+    """Append result chunks to a CSV or Parquet file without holding them all."""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = str(path).lower().endswith((".parquet", ".pq"))
+        self.writer = None
+        self.header = True
+
+    def write(self, frame):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.path, table.schema)
+            self.writer.write_table(table.cast(self.writer.schema))
+        else:
+            frame.to_csv(self.path, mode="w" if self.header else "a", header=self.header, index=False)
+            self.header = False
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def analyze_lot(module_source, cell_source=None, base_params=None, output=None,
+                chunk_rows=CHUNK_ROWS, aggregator=None, on_chunk=None, cell=None):
+    """Stream a production lot through the CTM model.
+
+    Per-module results are appended to ``output`` (CSV or Parquet) when given.
+    ``on_chunk(results, aggregator)`` is called after each chunk so callers can
+    report progress. Returns the ``LotAggregator``; its ``dropped`` counts the
+    modules that could not be scored.
+    """
+    cell_totals = cell_power_totals(cell_source, chunk_rows) if cell_source is not None else None
+    aggregator = aggregator or LotAggregator()
+    writer = _ResultWriter(output) if output is not None else None
+    try:
+        for modules in iter_chunks(module_source, chunk_rows=chunk_rows):
+            results, dropped = analyze_chunk(modules, cell_totals, base_params, cell)
+            aggregator.update(results, dropped)
+            if writer is not None:
+                writer.write(results)
+            if on_chunk is not None:
+                on_chunk(results, aggregator)
+    finally:
+        if writer is not None:
+            writer.close()
+    return aggregator
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(prog="ctm lot", description="Measured vs modeled CTM for a production lot.")
+    parser.add_argument("--modules", required=True, help="module flash data (CSV or Parquet)")
+    parser.add_argument("--cells", help="cell flash data (CSV or Parquet), needed without cell_power_total")
+    parser.add_argument("--output", help="per-module results file (CSV or Parquet)")
+    parser.add_argument("--summary", help="per-shift/per-BOM summary CSV (default: stdout)")
+    parser.add_argument("--param", action="append", type=parse_assignment, default=[], metavar="NAME=VALUE",
+                        help="override a model input for the whole lot")
+    parser.add_argument("--template", metavar="KEY", help=TEMPLATE_HELP)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    return parser
+
+
+def run(args):
+    defaults, cell = template_defaults(args.template)
+    params = dict(defaults)
+    params.update(dict(args.param))
+    aggregator = analyze_lot(args.modules, args.cells, params, args.output, args.chunk_rows, cell=cell)
+    if aggregator.dropped:
+        print(f"ctm lot: dropped {aggregator.dropped:,} module(s) without matching cell data or with a non-finite "
+              "or non-positive cell power total", file=sys.stderr)
+    summary = aggregator.summary()
+    if args.summary:
+        summary.to_csv(args.summary, index=False)
+    else:
+        summary.to_csv(sys.stdout, index=False)
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return run(args)
+    except (OSError, ValueError, KeyError) as error:
+        print(f"ctm lot: {error}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""Monte Carlo cell-mismatch simulation for half-cut modules.
+
+Each trial draws per-cell short-circuit currents from the binning distribution
+(or resamples measured flash-test data) and finds the module maximum power
+point of the half-cut layout: the two halves of the module are wired in
+parallel, so cells at the same string position behave as one parallel pair,
+and the resulting series string of pairs is split into substrings protected by
+bypass diodes. Mismatch loss is the gap between the module MPP and the sum of
+the individual pair MPPs.
+
+Cells follow the ideal single-diode equation, so the string voltage is an
+explicit function of current. Within each bypass state the module P(I) curve
+is concave, which lets every trial be solved with a few vectorized Newton steps
+instead of a per-trial loop. The cell's Voc and ideality default to those
+of the module I-V model; pass a template's ``ctm.technology.electrical``
+constants as ``cell`` to ``simulate_mismatch``.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ctm.cache import cached
+from ctm.iv import CELL_VOC, IDEALITY, KT_OVER_Q
+
+# Normalised half-cut cell: Isc = 1, Voc and ideality shared with the module I-V model
+BYPASS_DIODE_DROP = 0.4
+NUM_BYPASS_DIODES = 3
+
+# Trials per RNG stream; results do not depend on how shards are spread over workers
+SHARD_SIZE = 4096
+MAX_NEWTON_ITERATIONS = 100
+NEWTON_TOLERANCE = 1e-10
+
+
+def sample_cell_currents(rng, n_trials, num_cells, tolerance, distribution="uniform", flash_values=None):
+    """Draw normalised per-cell currents with shape ``(n_trials, num_cells)``.
+
+    ``tolerance`` is the ± binning tolerance in percent. Binned cells are
+    uniform across the bin, or normal with sigma = tolerance/2 clipped to the
+    bin. When ``flash_values`` is given, cells are resampled from it instead.
+    """
+    shape = (n_trials, num_cells)
+    if flash_values is not None:
+        flash_values = np.asarray(flash_values, dtype=np.float64)
+        return rng.choice(flash_values / flash_values.mean(), size=shape)
+
+    half_width = tolerance / 100
+    if distribution == "uniform":
+        return 1 + rng.uniform(-half_width, half_width, size=shape)
+    if distribution == "normal":
+        return 1 + np.clip(rng.normal(0, half_width / 2, size=shape), -half_width, half_width)
+    raise ValueError(f"Unknown binning distribution: {distribution!r}")
+
+
+def _pair_diode(cell_voc, ideality):
+    """Saturation current and thermal voltage of a parallel pair of normalised cells."""
+    thermal_voltage = KT_OVER_Q * ideality
+    return 2 / np.expm1(cell_voc / thermal_voltage), thermal_voltage
+
+
+def _newton_mpp(isc, i0, thermal_voltage, lower, upper, offset, weights=None):
+    """Maximise P(I) = I * (sum_k w_k V_k(I) - offset) for I in (lower, upper).
+
+    ``isc`` has shape (..., cells) and the sum runs over the last axis; cells
+    with zero weight do not contribute (and must have ``isc`` above ``upper``).
+    Newton steps on dP/dI are safeguarded by bisection, since the slope
+    diverges at ``upper``.
+    """
+    a = thermal_voltage if weights is None else thermal_voltage * weights
+    upper = upper * (1 - 1e-9)
+    low, high = np.array(lower, dtype=np.float64), upper.copy()
+    current = np.clip(0.95 * upper, low, high)
+    last_step = high - low
+    done = np.zeros(current.shape, dtype=bool)
+    for _ in range(MAX_NEWTON_ITERATIONS):
+        gap = isc - current[..., np.newaxis] + i0
+        voltage = (a * np.log(gap / i0)).sum(axis=-1) - offset
+        slope = -(a / gap).sum(axis=-1)
+        curvature = -(a / gap ** 2).sum(axis=-1)
+        d_power = voltage + current * slope
+        d2_power = 2 * slope + current * curvature
+
+        done |= (np.abs(d_power) <= NEWTON_TOLERANCE * np.abs(voltage)) | (high - low <= NEWTON_TOLERANCE * upper)
+        if done.all():
+            break
+
+        rising = d_power > 0
+        low = np.where(rising, current, low)
+        high = np.where(rising, high, current)
+        # Bisect when Newton leaves the bracket or is not converging fast
+        # enough (e.g. crawling away from the singularity at ``upper``)
+        newton = current - d_power / d2_power
+        use_newton = (newton > low) & (newton < high) & (2 * np.abs(newton - current) <= last_step)
+        following = np.where(use_newton, newton, 0.5 * (low + high))
+        following = np.where(done, current, following)
+        last_step = np.abs(following - current)
+        current = following
+    gap = isc - current[..., np.newaxis] + i0
+    voltage = (a * np.log(gap / i0)).sum(axis=-1) - offset
+    return current * voltage
+
+
+@cached(maxsize=16)
+def _pair_mpp_table(cell_voc=CELL_VOC, ideality=IDEALITY, max_current=4.0, points=8193):
+    currents = np.linspace(1e-6, max_current, points)
+    power = _newton_mpp(currents[:, np.newaxis], *_pair_diode(cell_voc, ideality), np.zeros(points), currents, 0.0)
+    return currents, power
+
+
+def pair_mpp(pair_currents, cell_voc=CELL_VOC, ideality=IDEALITY):
+    """Maximum power of isolated parallel pairs, interpolated from a table built once per cell."""
+    return np.interp(pair_currents, *_pair_mpp_table(cell_voc, ideality))
+
+
+def module_mismatch(cell_currents, num_bypass_diodes=NUM_BYPASS_DIODES, cell_voc=CELL_VOC, ideality=IDEALITY):
+    """Mismatch loss (%) for each row of ``cell_currents`` (shape ``(trials, cells)``)."""
+    n_trials, num_cells = cell_currents.shape
+    half = num_cells // 2
+    pairs = cell_currents[:, :half] + cell_currents[:, half:2 * half]
+    i0, thermal_voltage = _pair_diode(cell_voc, ideality)
+
+    # Reference: every pair at its own maximum power point
+    reference = pair_mpp(pairs, cell_voc, ideality).sum(axis=1)
+
+    # A substring is bypassed once the string current exceeds its weakest pair,
+    # so the bypass state only changes at the sorted substring limits.
+    substring_of_pair = np.repeat(np.arange(num_bypass_diodes), [len(i) for i in np.array_split(np.arange(half), num_bypass_diodes)])
+    limits = np.stack([pairs[:, substring_of_pair == k].min(axis=1) for k in range(num_bypass_diodes)], axis=1)
+    rank = np.argsort(np.argsort(limits, axis=1), axis=1)
+    sorted_limits = np.sort(limits, axis=1)
+    pair_rank = rank[:, substring_of_pair]
+    ceiling = pairs.max() + 1
+    voc_bound = thermal_voltage * np.log1p(pairs.max(axis=1) / i0)
+
+    best = np.zeros(n_trials)
+    lower = np.zeros(n_trials)
+    for bypassed in range(num_bypass_diodes):
+        upper = sorted_limits[:, bypassed]
+        active = pair_rank >= bypassed
+        # Skip trials where even open-circuit voltage on every active pair at
+        # the interval's top current cannot beat the best power found so far
+        bound = upper * (active.sum(axis=1) * voc_bound - bypassed * BYPASS_DIODE_DROP)
+        todo = np.flatnonzero(bound > best)
+        if len(todo):
+            isc = np.where(active[todo], pairs[todo], ceiling)
+            power = _newton_mpp(isc, i0, thermal_voltage, lower[todo], upper[todo], bypassed * BYPASS_DIODE_DROP,
+                                weights=active[todo])
+            best[todo] = np.maximum(best[todo], power)
+        lower = upper
+
+    return (1 - best / reference) * 100
+
+
+def _simulate_shard(seed, n_trials, num_cells, tolerance, distribution, flash_values, cell):
+    rng = np.random.default_rng(seed)
+    currents = sample_cell_currents(rng, n_trials, num_cells, tolerance, distribution, flash_values)
+    return module_mismatch(currents, **{name: cell[name] for name in ("cell_voc", "ideality") if name in cell})
+
+
+def simulate_mismatch(num_cells=144, tolerance=1.5, n_trials=100_000, seed=0,
+                      distribution="uniform", flash_values=None, workers=1, cell=None):
+    """Run the Monte Carlo mismatch simulation and return per-trial losses (%).
+
+    Trials are split into fixed-size shards, each with its own child seed of
+    ``seed``, so the result is identical for any ``workers`` count. ``cell``
+    holds the template cell constants from ``ctm.technology.electrical``.
+    """
+    if num_cells % 2:
+        raise ValueError("Half-cut layouts need an even number of cells")
+
+    n_shards = -(-n_trials // SHARD_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(n_shards)
+    sizes = [min(SHARD_SIZE, n_trials - i * SHARD_SIZE) for i in range(n_shards)]
+    args = [(s, n, int(num_cells), tolerance, distribution, flash_values, cell or {}) for s, n in zip(seeds, sizes)]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or n_shards == 1:
+        return np.concatenate([_simulate_shard(*a) for a in args])
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return np.concatenate(list(pool.map(_simulate_shard, *zip(*args))))
+
+
+def summarize(losses):
+    """Mean and P5/P50/P95 of a mismatch loss sample."""
+    p5, p50, p95 = np.percentile(losses, [5, 50, 95])
+    return {"mean": float(np.mean(losses)), "p5": float(p5), "p50": float(p50), "p95": float(p95),
+            "std": float(np.std(losses)), "trials": int(len(losses))}
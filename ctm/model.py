@@ -0,0 +1,292 @@
+"""Vectorized cell-to-module (CTM) loss model.
+
+Every quantity is computed with NumPy broadcasting, so the same code scores
+a single sidebar design or millions of bill-of-materials variants in one pass.
+Single-point evaluation runs the same formulas on plain floats and never
+imports NumPy, which keeps the CLI cold start short.
+"""
+import math
+import types
+
+from ctm.cache import cached
+from ctm.iv import CELL_VOC, IDEALITY, RIBBON_RESISTIVITY, module_electrical
+from ctm.timing import step_lap
+
+# Sidebar defaults for a 144 half-cut cell TOPCon module
+DEFAULT_PARAMS = {
+    "cell_power": 4.15,
+    "cell_efficiency": 24.7,
+    "num_cells": 144,
+    "module_area": 2.586,
+    "cell_length": 182.2,
+    "cell_width": 91.1,
+    "glass_transmission": 94.0,
+    "encapsulant_transmission": 94.0,
+    "num_busbars": 12,
+    "ribbon_width": 1.5,
+    "ribbon_thickness": 0.25,
+    "cell_binning_tolerance": 1.5,
+    "junction_box_loss": 0.35,
+    "annual_irradiance": 1500.0,
+}
+
+INPUT_COLUMNS = tuple(DEFAULT_PARAMS)
+
+BUSBAR_OPTIONS = (3, 5, 9, 10, 12, 16, 18, 20)
+
+OUTPUT_COLUMNS = (
+    "total_cell_power",
+    "geometric_loss",
+    "glass_reflection_loss",
+    "encapsulant_absorption_loss",
+    "optical_coupling_gain",
+    "ribbon_shading_loss",
+    "net_optical_loss",
+    "total_resistive_loss",
+    "mismatch_loss",
+    "jb_cable_loss",
+    "total_ctm_loss",
+    "ctm_ratio",
+    "module_pmax",
+    "module_efficiency",
+    "module_voc",
+    "module_isc",
+    "module_vmpp",
+    "module_impp",
+    "module_fill_factor",
+    "module_series_resistance",
+    "annual_energy_total",
+    "annual_energy_loss",
+)
+
+# Short keys used by the loss table, pie chart and PDF report
+LOSS_KEYS = {
+    "geometric": "geometric_loss",
+    "glass": "glass_reflection_loss",
+    "encapsulant": "encapsulant_absorption_loss",
+    "ribbon": "ribbon_shading_loss",
+    "coupling": "optical_coupling_gain",
+    "resistive": "total_resistive_loss",
+    "mismatch": "mismatch_loss",
+    "jb": "jb_cable_loss",
+}
+
+OPTICAL_COUPLING_GAIN = 1.5  # Reduced for more realistic 1-2% total
+BASE_RESISTIVE_LOSS = 0.35  # Reduced for 1-2% total loss range
+CTM_LOSS_BOUNDS = (1.0, 2.5)
+
+
+# Stand-in for the handful of NumPy functions the formulas use, for plain floats
+_SCALAR_MATH = types.SimpleNamespace(
+    sqrt=math.sqrt,
+    exp=math.exp,
+    log=math.log,
+    maximum=max,
+    clip=lambda value, low, high: min(max(value, low), high),
+    where=lambda condition, value, other: value if condition else other,
+    nan=math.nan,
+)
+
+
+def _merge_inputs(designs, params):
+    unknown = set(params) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise TypeError(f"Unknown CTM parameter(s): {', '.join(sorted(unknown))}")
+
+    values = dict(DEFAULT_PARAMS)
+    if designs is not None:
+        for name in INPUT_COLUMNS:
+            if name in designs:
+                values[name] = designs[name]
+    values.update(params)
+    return values
+
+
+def _evaluate(xp, cell_power, cell_efficiency, num_cells, module_area, cell_length, cell_width,
+              glass_transmission, encapsulant_transmission, num_busbars, ribbon_width,
+              ribbon_thickness, cell_binning_tolerance, junction_box_loss, annual_irradiance,
+              mismatch_override=None, coupling_override=None, cell_voc=CELL_VOC, ideality=IDEALITY,
+              front_ribbons=1.0):
+    # No-op unless per-stage timing is on for this thread
+    lap = step_lap()
+    cell_area_m2 = (cell_length * cell_width) / 1e6
+
+    # STEP 1: Total cell power
+    total_cell_power = cell_power * num_cells
+    lap("STEP 1")
+
+    # STEP 2: Geometric loss
+    total_cell_area = num_cells * cell_area_m2
+    geometric_loss = (1 - total_cell_area / module_area) * 100
+    lap("STEP 2")
+
+    # STEP 3: Optical losses
+    glass_reflection_loss = (1 - glass_transmission / 100) * 100
+    encapsulant_absorption_loss = (1 - encapsulant_transmission / 100) * 100
+    optical_coupling_gain = OPTICAL_COUPLING_GAIN if coupling_override is None else coupling_override
+    ribbon_coverage = (ribbon_width * num_busbars) / xp.sqrt(cell_length * cell_width / 100)
+    # Back-contact and shingled templates have no front ribbons (front_ribbons = 0)
+    ribbon_shading_loss = xp.maximum(0, ribbon_coverage * 0.55) * front_ribbons
+    net_optical_loss = glass_reflection_loss + encapsulant_absorption_loss + ribbon_shading_loss - optical_coupling_gain
+    lap("STEP 3")
+
+    # STEP 4: Resistive losses
+    resistive_loss = BASE_RESISTIVE_LOSS * (5 / num_busbars) ** 1.2
+    ribbon_area = ribbon_width * ribbon_thickness / 1e6
+    ribbon_resistance_factor = (RIBBON_RESISTIVITY * 0.156) / ribbon_area
+    ribbon_loss_contribution = 0.1 * (ribbon_resistance_factor / 0.0001) * front_ribbons
+    total_resistive_loss = resistive_loss + ribbon_loss_contribution
+    lap("STEP 4")
+
+    # STEP 5: Mismatch loss
+    if mismatch_override is None:
+        mismatch_loss = 0.15 + (cell_binning_tolerance / 2.0) * 0.1
+    else:
+        mismatch_loss = mismatch_override
+    lap("STEP 5")
+
+    # STEP 6: Additional losses
+    jb_cable_loss = junction_box_loss
+    lap("STEP 6")
+
+    # STEP 7: Total CTM loss, constrained to 1-2.5%
+    total_ctm_loss = geometric_loss + net_optical_loss + total_resistive_loss + mismatch_loss + jb_cable_loss
+    total_ctm_loss = xp.clip(total_ctm_loss, *CTM_LOSS_BOUNDS)
+    lap("STEP 7")
+
+    # STEP 8: Module power from cell power and CTM loss
+    ctm_ratio = 1 - total_ctm_loss / 100
+    module_pmax = total_cell_power * ctm_ratio
+    lap("STEP 8")
+
+    # STEP 9: Module efficiency
+    module_efficiency = (module_pmax / (module_area * 1000)) * 100
+    lap("STEP 9")
+
+    # STEP 10: Electrical parameters from the single-diode I-V curve of the
+    # series-connected half-cut layout, with Rs from the ribbon/busbar geometry
+    electrical = module_electrical(xp, module_pmax, cell_power, num_cells, cell_length, cell_width,
+                                   num_busbars, ribbon_width, ribbon_thickness, cell_voc, ideality,
+                                   front_ribbons)
+    lap("STEP 10")
+
+    annual_energy_total = (module_pmax / 1000) * annual_irradiance
+    annual_energy_loss = annual_energy_total * (total_ctm_loss / 100)
+    lap("annual energy")
+
+    return {
+        "total_cell_power": total_cell_power,
+        "geometric_loss": geometric_loss,
+        "glass_reflection_loss": glass_reflection_loss,
+        "encapsulant_absorption_loss": encapsulant_absorption_loss,
+        "optical_coupling_gain": optical_coupling_gain,
+        "ribbon_shading_loss": ribbon_shading_loss,
+        "net_optical_loss": net_optical_loss,
+        "total_resistive_loss": total_resistive_loss,
+        "mismatch_loss": mismatch_loss,
+        "jb_cable_loss": jb_cable_loss,
+        "total_ctm_loss": total_ctm_loss,
+        "ctm_ratio": ctm_ratio,
+        "module_pmax": module_pmax,
+        "module_efficiency": module_efficiency,
+        "module_voc": electrical["module_voc"],
+        "module_isc": electrical["module_isc"],
+        "module_vmpp": electrical["module_vmpp"],
+        "module_impp": electrical["module_impp"],
+        "module_fill_factor": electrical["module_fill_factor"],
+        "module_series_resistance": electrical["module_series_resistance"],
+        "annual_energy_total": annual_energy_total,
+        "annual_energy_loss": annual_energy_loss,
+    }
+
+
+def compute_ctm(designs=None, mismatch_loss=None, optical_coupling_gain=None, cell_voc=None, ideality=None,
+                front_ribbons=None, **params):
+    """Evaluate the CTM model for one or many designs in a single vectorized pass.
+
+    ``designs`` may be a pandas DataFrame (one row per design) or a mapping of
+    parameter name to scalar/array. Keyword arguments override ``designs`` and
+    any parameter not given falls back to ``DEFAULT_PARAMS``. All inputs are
+    broadcast against each other. ``mismatch_loss`` (%) replaces the STEP 5
+    binning formula, e.g. with a Monte Carlo estimate from ``ctm.mismatch``,
+    and ``optical_coupling_gain`` (%) replaces the STEP 3 constant, e.g. with
+    a spectral estimate from ``ctm.spectral``. ``cell_voc`` (V) and
+    ``ideality`` replace the TOPCon cell of the STEP 10 diode model, e.g.
+    with a template from ``ctm.technology``; ``front_ribbons`` of 0 drops
+    the ribbon shading and resistance of cells without front ribbons
+    (back-contact, shingled). Designs whose I-V curve cannot
+    deliver their Pmax get NaN Voc, Isc, Vmpp, Impp and fill factor (see
+    ``ctm.iv.module_electrical``).
+
+    Returns a DataFrame with the derived columns appended when ``designs`` is a
+    DataFrame, otherwise a dict of NumPy arrays keyed by ``OUTPUT_COLUMNS``.
+    """
+    import numpy as np
+
+    inputs = {name: np.asarray(value, dtype=np.float64) for name, value in _merge_inputs(designs, params).items()}
+    if mismatch_loss is not None:
+        inputs["mismatch_override"] = np.asarray(mismatch_loss, dtype=np.float64)
+    if optical_coupling_gain is not None:
+        inputs["coupling_override"] = np.asarray(optical_coupling_gain, dtype=np.float64)
+    if cell_voc is not None:
+        inputs["cell_voc"] = np.asarray(cell_voc, dtype=np.float64)
+    if ideality is not None:
+        inputs["ideality"] = np.asarray(ideality, dtype=np.float64)
+    if front_ribbons is not None:
+        inputs["front_ribbons"] = np.asarray(front_ribbons, dtype=np.float64)
+    shape = np.broadcast_shapes(*(value.shape for value in inputs.values()))
+    results = {}
+    for name, value in _evaluate(np, **inputs).items():
+        value = np.asarray(value)
+        results[name] = value if value.shape == shape else np.broadcast_to(value, shape)
+
+    if hasattr(designs, "assign") and hasattr(designs, "columns"):
+        return designs.assign(**results)
+    return results
+
+
+def compute_ctm_point(mismatch_loss=None, optical_coupling_gain=None, cell_voc=None, ideality=None,
+                      front_ribbons=None, **params):
+    """Evaluate a single design and return plain Python floats."""
+    inputs = {name: float(value) for name, value in _merge_inputs(None, params).items()}
+    if mismatch_loss is not None:
+        inputs["mismatch_override"] = float(mismatch_loss)
+    if optical_coupling_gain is not None:
+        inputs["coupling_override"] = float(optical_coupling_gain)
+    if cell_voc is not None:
+        inputs["cell_voc"] = float(cell_voc)
+    if ideality is not None:
+        inputs["ideality"] = float(ideality)
+    if front_ribbons is not None:
+        inputs["front_ribbons"] = float(front_ribbons)
+    return {name: float(value) for name, value in _evaluate(_SCALAR_MATH, **inputs).items()}
+
+
+def loss_values(result):
+    """Return the short-keyed loss breakdown used by tables, charts and reports."""
+    return {key: result[column] for key, column in LOSS_KEYS.items()}
+
+
+def stack_ctm_loss(result):
+    """Total CTM loss (%) before STEP 7 clamps it to ``CTM_LOSS_BOUNDS``."""
+    return (result["geometric_loss"] + result["net_optical_loss"] + result["total_resistive_loss"]
+            + result["mismatch_loss"] + result["jb_cable_loss"])
+
+
+def params_key(params):
+    """Return a hashable key for a parameter mapping, filling in defaults."""
+    unknown = set(params) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise TypeError(f"Unknown CTM parameter(s): {', '.join(sorted(unknown))}")
+    return tuple(float(params.get(name, DEFAULT_PARAMS[name])) for name in INPUT_COLUMNS)
+
+
+@cached(maxsize=1024)
+def compute_ctm_cached(key, cell_voc=None, ideality=None, front_ribbons=None):
+    """Memoized ``compute_ctm_point`` keyed on a ``params_key`` tuple and the template cell constants.
+
+    The result is a read-only mapping shared between callers.
+    """
+    params = dict(zip(INPUT_COLUMNS, key))
+    return types.MappingProxyType(compute_ctm_point(cell_voc=cell_voc, ideality=ideality,
+                                                     front_ribbons=front_ribbons, **params))
@@ -0,0 +1,290 @@
+"""Resistive loss of the front grid and ribbons from a discretized resistor network.
+
+Each half-cut cell splits into ``2 * num_busbars`` identical strips, each
+running from a ribbon to the midpoint between two ribbons. A strip is
+discretized into a sparse conductance network. Every finger crossing the
+strip is a row of ``FINGER_SEGMENTS`` segments, and emitter links join
+neighbouring fingers. Each finger reaches the ribbon through a contact, and
+the ribbon runs across the cell width and over the gap to the next cell.
+Photocurrent is injected at every grid node in proportion to the cell area
+it collects from. The solve gives node voltages, and the I²R dissipated in
+every branch is summed per element type. Emitter lateral flow from the wafer
+to its finger is added analytically (``Rsheet * pitch² / 12`` per unit
+area). Zero-busbar (0BB) designs are many thin wires soldered straight onto
+the fingers; pass ``ZERO_BUSBAR_CONTACT_RESISTANCE`` for them.
+
+The network is linear, and its matrix depends on geometry alone. The finger
+grid of each busbar pitch, cell width and contact is factorized once with
+``scipy.sparse`` and memoized, then reduced onto the ribbon nodes, one per
+finger. A ribbon of any cross-section then only adds a small dense system
+on those nodes, so every ribbon on a grid is solved in one batched dense
+solve. Injection profiles along the cell width share the factorization as
+extra right-hand sides. Losses at any operating point scale with the square
+of its current density, with no further solve. A busbar x ribbon sweep costs
+one sparse LU per busbar count, plus microseconds per design.
+
+    ctm network --params designs.csv -o losses.csv
+    ctm network --param num_busbars=18 --param ribbon_width=0.3 --zero-busbar
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from ctm.cache import cached
+from ctm.iv import CELL_GAP, RIBBON_RESISTIVITY
+from ctm.layout import LAYOUT_COLUMNS
+from ctm.model import DEFAULT_PARAMS
+
+# Front grid of a TOPCon cell
+EMITTER_SHEET_RESISTANCE = 120.0  # ohm/sq
+FINGER_PITCH = 1.6  # mm
+FINGER_LINE_RESISTANCE = 2.0  # ohm/cm of one printed finger
+BUSBAR_CONTACT_RESISTANCE = 0.002  # ohm per finger/ribbon junction, ribbon soldered to printed pads
+ZERO_BUSBAR_CONTACT_RESISTANCE = 0.02  # ohm per junction, wire soldered onto the bare finger
+
+# Operating current density is cell_power / (CELL_MPP_VOLTAGE * area)
+CELL_MPP_VOLTAGE = 0.61
+
+# Finger segments per strip; the discretized finger loss is low by 1 / (4 n²), 0.17% at 12
+FINGER_SEGMENTS = 12
+
+# Per-cell branch losses (W); the first three are grid branches, in ``_drops`` order
+LOSS_CATEGORIES = ("finger_loss", "emitter_loss", "contact_loss", "ribbon_loss", "interconnect_loss")
+
+NETWORK_INPUTS = ("cell_power", "num_cells", "cell_length", "cell_width", "num_busbars", "ribbon_width",
+                  "ribbon_thickness")
+
+NETWORK_OUTPUTS = (
+    *LOSS_CATEGORIES,
+    "cell_resistive_loss",
+    "cell_resistive_fraction",
+    "string_resistive_loss",
+    "module_resistive_loss",
+    "network_series_resistance",
+)
+
+
+def _drops(rows, grid_voltages, ribbon_voltages):
+    """Voltage across every finger, emitter and contact branch, one ``(branches, columns)`` array each.
+
+    Grid node ``row * (FINGER_SEGMENTS + 1) + i`` sits ``i`` segments along
+    finger ``row`` from its junction with ribbon node ``row``.
+    """
+    grid = grid_voltages.reshape(rows, FINGER_SEGMENTS + 1, -1)
+    columns = grid.shape[-1]
+    return [
+        (grid[:, 1:] - grid[:, :-1]).reshape(-1, columns),
+        (grid[1:] - grid[:-1]).reshape(-1, columns),
+        ribbon_voltages[:rows] - grid[:, 0],
+    ]
+
+
+def _ribbon_laplacian(rows, pitch):
+    """Laplacian of the ribbon for unit conductance x length (S mm) and the gap edge's conductance.
+
+    Ribbon nodes sit over each finger, plus one at the cell edge; the gap edge
+    joins that last node to the next cell, the network's reference.
+    """
+    weights = np.append(np.full(rows - 1, 1 / pitch), 2 / pitch)
+    index = np.arange(rows)
+    laplacian = np.zeros((rows + 1, rows + 1))
+    laplacian[index, index] += weights
+    laplacian[index + 1, index + 1] += weights
+    laplacian[index, index + 1] -= weights
+    laplacian[index + 1, index] -= weights
+    return laplacian, 1 / CELL_GAP
+
+
+@cached(maxsize=32)
+def cell_grid(busbar_pitch, cell_width, contact_resistance=BUSBAR_CONTACT_RESISTANCE):
+    """Memoized finger grid of one strip, factorized and reduced onto its ribbon nodes.
+
+    ``busbar_pitch`` (mm) is ``cell_length / num_busbars``; cells that share
+    it share the grid.
+
+    Returns ``(lu, coupling, reduced, conductances, responses, quadratic,
+    rows, dx, pitch)``. ``lu`` factorizes the grid block of the conductance
+    matrix and ``coupling`` links it to the ``rows + 1`` ribbon nodes.
+    ``reduced`` is the Schur complement on the ribbon nodes. Per grid branch
+    category, ``responses`` gives branch voltages per unit ribbon voltage
+    and ``quadratic`` the I²R as a quadratic form in the ribbon voltages.
+    """
+    from scipy import sparse
+    from scipy.sparse.linalg import splu
+
+    rows = max(1, int(round(cell_width / FINGER_PITCH)))
+    columns = FINGER_SEGMENTS + 1
+    dx, pitch = busbar_pitch / 2 / FINGER_SEGMENTS, cell_width / rows
+    grid = rows * columns
+
+    # Emitter between fingers over the strip width each grid column stands for
+    width = np.full(columns, dx / 10)
+    width[[0, -1]] /= 2
+    finger = 1 / (FINGER_LINE_RESISTANCE * dx / 10)
+    emitter = width / (pitch / 10) / EMITTER_SHEET_RESISTANCE
+    # Each junction is shared by the two strips on either side of the ribbon
+    contact = 1 / (2 * contact_resistance)
+    conductances = (np.full(rows * FINGER_SEGMENTS, finger), np.tile(emitter, rows - 1), np.full(rows, contact))
+
+    # Five-point stencil: fingers along each row, emitter links between rows
+    diagonal = np.zeros((rows, columns))
+    diagonal[:, :-1] += finger
+    diagonal[:, 1:] += finger
+    diagonal[:-1] += emitter
+    diagonal[1:] += emitter
+    diagonal[:, 0] += contact
+    along = np.full(grid - 1, -finger)
+    along[columns - 1::columns] = 0
+    across = -conductances[1]
+    laplacian = sparse.diags([diagonal.ravel(), along, along, across, across], [0, 1, -1, columns, -columns],
+                             format="csc")
+    lu = splu(laplacian, permc_spec="MMD_AT_PLUS_A")
+
+    coupling = np.zeros((grid, rows + 1))
+    coupling[np.arange(rows) * columns, np.arange(rows)] = -contact
+    transfer = lu.solve(coupling)
+    reduced = np.diag(np.append(np.full(rows, contact), 0.0)) - coupling.T @ transfer
+    # Grid voltages are u - transfer @ v for ribbon voltages v and the grid solution u with v = 0
+    responses = _drops(rows, -transfer, np.eye(rows + 1))
+    quadratic = np.array([response.T @ (g[:, np.newaxis] * response) for response, g in zip(responses, conductances)])
+    return lu, coupling, reduced, conductances, responses, quadratic, rows, dx, pitch
+
+
+def strip_losses(grid, ribbon_conductance, profiles=None):
+    """Per-category losses (W) of one strip at 1 A/cm², shaped ``(ribbons, profiles, categories)``.
+
+    ``grid`` comes from ``cell_grid``; ``ribbon_conductance`` is an array of
+    ribbon conductance x length (S mm, the strip's half of the ribbon).
+    ``profiles`` is ``(K, rows)``, the relative current density along the cell
+    width for each of K cases, and defaults to uniform light. The grid is
+    solved for all K profiles in one pass against the memoized factorization,
+    and all ribbons x profiles in one batched dense solve on the ribbon nodes.
+    """
+    lu, coupling, reduced, conductances, responses, quadratic, rows, dx, pitch = grid
+    profiles = np.ones((1, rows)) if profiles is None else np.atleast_2d(np.asarray(profiles, dtype=np.float64))
+    ribbon_conductance = np.atleast_1d(np.asarray(ribbon_conductance, dtype=np.float64))
+    node_area = dx * pitch / 100  # cm²
+
+    weights = np.full(FINGER_SEGMENTS + 1, node_area)
+    weights[[0, -1]] /= 2
+    injected = (profiles.T[:, np.newaxis, :] * weights[:, np.newaxis]).reshape(-1, len(profiles))
+    unconstrained = lu.solve(injected)
+    ribbon_laplacian, gap = _ribbon_laplacian(rows, pitch)
+    system = reduced + ribbon_conductance[:, np.newaxis, np.newaxis] * ribbon_laplacian
+    system[:, -1, -1] += ribbon_conductance * gap
+    rhs = np.broadcast_to(-coupling.T @ unconstrained, (len(ribbon_conductance), rows + 1, len(profiles)))
+    voltages = np.linalg.solve(system, rhs)  # (ribbons, ribbon nodes, profiles)
+
+    losses = np.empty((len(ribbon_conductance), len(profiles), len(LOSS_CATEGORIES)))
+    offsets = _drops(rows, unconstrained, np.zeros((rows + 1, len(profiles))))
+    for c, (offset, response, g) in enumerate(zip(offsets, responses, conductances)):
+        weighted = g[:, np.newaxis] * offset
+        losses[..., c] = ((weighted * offset).sum(axis=0) + 2 * np.einsum("np,rnp->rp", response.T @ weighted, voltages)
+                          + np.einsum("rnp,nm,rmp->rp", voltages, quadratic[c], voltages))
+    losses[..., 3] = ribbon_conductance[:, np.newaxis] * np.einsum("rnp,nm,rmp->rp", voltages, ribbon_laplacian, voltages)
+    losses[..., 4] = (ribbon_conductance * gap)[:, np.newaxis] * voltages[:, -1] ** 2
+    # Lateral emitter flow into each finger, not resolved by the grid
+    lateral = EMITTER_SHEET_RESISTANCE * (pitch / 10) ** 2 / 12 * FINGER_SEGMENTS * node_area
+    losses[..., 1] += lateral * (profiles ** 2).sum(axis=1)
+    return losses
+
+
+def network_losses(cell_power, num_cells, cell_length, cell_width, num_busbars, ribbon_width, ribbon_thickness,
+                   contact_resistance=BUSBAR_CONTACT_RESISTANCE, irradiance=1000.0):
+    """Network outputs for broadcast arrays of designs, returning ``{output: array}`` for ``NETWORK_OUTPUTS``.
+
+    Branch losses are W per cell, ``cell_resistive_fraction`` is % of the
+    cell power at ``irradiance`` (W/m², which scales the photocurrent),
+    string and module losses are W, and ``network_series_resistance`` is the
+    equivalent specific resistance (ohm cm²). Strings follow ``ctm.layout``.
+    """
+    arrays = np.broadcast_arrays(*(np.asarray(value, dtype=np.float64) for value in (
+        cell_power, num_cells, cell_length, cell_width, num_busbars, ribbon_width, ribbon_thickness,
+        contact_resistance, irradiance)))
+    shape = arrays[0].shape
+    cell_power, num_cells, cell_length, cell_width, num_busbars, ribbon_width, ribbon_thickness, \
+        contact_resistance, irradiance = (array.ravel() for array in arrays)
+
+    # Half of each ribbon belongs to the strip on either side of it
+    ribbon_conductance = ribbon_width * ribbon_thickness / 1e6 / RIBBON_RESISTIVITY * 1000 / 2
+    groups = {}
+    for i, key in enumerate(zip((cell_length / num_busbars).tolist(), cell_width.tolist(), contact_resistance.tolist())):
+        groups.setdefault(key, []).append(i)
+    unit = np.empty((len(cell_power), len(LOSS_CATEGORIES)))
+    for key, members in groups.items():
+        conductances, inverse = np.unique(ribbon_conductance[members], return_inverse=True)
+        unit[members] = strip_losses(cell_grid(*key), conductances)[inverse, 0]
+    unit *= 2 * num_busbars[:, np.newaxis]
+
+    area_cm2 = cell_length * cell_width / 100
+    power = cell_power * irradiance / 1000
+    current_density = power / (CELL_MPP_VOLTAGE * area_cm2)
+    losses = unit * (current_density ** 2)[:, np.newaxis]
+    cell_loss = losses.sum(axis=1)
+    outputs = {name: losses[:, i] for i, name in enumerate(LOSS_CATEGORIES)}
+    outputs.update({
+        "cell_resistive_loss": cell_loss,
+        "cell_resistive_fraction": cell_loss / power * 100,
+        "string_resistive_loss": cell_loss * num_cells / LAYOUT_COLUMNS,
+        "module_resistive_loss": cell_loss * num_cells,
+        "network_series_resistance": unit.sum(axis=1) / area_cm2,
+    })
+    return {name: outputs[name].reshape(shape) for name in NETWORK_OUTPUTS}
+
+
+def build_parser(parser=None):
+    from ctm.cli import parse_assignment
+
+    parser = parser or argparse.ArgumentParser(prog="ctm network",
+                                               description="Grid and ribbon I²R losses from a resistor network.")
+    parser.add_argument("--params", help="designs as JSON or CSV (default: one design from the model defaults)")
+    parser.add_argument("--param", action="append", type=parse_assignment, default=[], metavar="NAME=VALUE",
+                        help="override a model input for every design")
+    contact = parser.add_mutually_exclusive_group()
+    contact.add_argument("--zero-busbar", action="store_true", help="wires soldered straight onto the fingers (0BB)")
+    contact.add_argument("--contact-resistance", type=float, default=BUSBAR_CONTACT_RESISTANCE,
+                         help="ohm per finger/ribbon junction (default: %(default)s)")
+    parser.add_argument("--irradiance", type=float, default=1000.0, help="W/m² (default: %(default)s)")
+    parser.add_argument("-o", "--output", help="CSV file (default: stdout)")
+    return parser
+
+
+def run(args):
+    from ctm.cli import read_designs, write_results
+
+    designs = read_designs(args.params)[0] if args.params else [{}]
+    overrides = dict(args.param)
+    columns = {name: [] for name in NETWORK_INPUTS}
+    for design in designs:
+        for name in NETWORK_INPUTS:
+            value = overrides.get(name, design.get(name, ""))
+            columns[name].append(float(DEFAULT_PARAMS[name] if value == "" else value))
+    contact_resistance = ZERO_BUSBAR_CONTACT_RESISTANCE if args.zero_busbar else args.contact_resistance
+    outputs = network_losses(*(np.array(columns[name]) for name in NETWORK_INPUTS),
+                             contact_resistance=contact_resistance, irradiance=args.irradiance)
+
+    rows = []
+    for i, design in enumerate(designs):
+        row = {**design, **{name: columns[name][i] for name in NETWORK_INPUTS}}
+        row.update({name: float(values[i]) for name, values in outputs.items()})
+        rows.append(row)
+    if args.output:
+        with open(args.output, "w", newline="") as stream:
+            write_results(rows, "csv", stream)
+    else:
+        write_results(rows, "csv", sys.stdout)
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return run(args)
+    except (OSError, ValueError, KeyError) as error:
+        print(f"ctm network: {error}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
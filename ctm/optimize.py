@@ -0,0 +1,276 @@
+"""Inverse design: cheapest bill of materials for a target module power.
+
+Each searchable input has a catalog of options with a per-module cost. A
+design picks one option per input and costs the sum of its options. Designs
+are scored with the vectorized CTM model, and the search returns the Pareto
+front of cost against module power.
+
+Within the sidebar ranges the loss stack sits far above the 2.5% cap of
+STEP 7, so ``module_pmax`` alone rarely separates designs. They are ranked
+instead by the uncapped loss stack (``stack_ctm_loss``). ``module_pmax``
+never decreases as the stack falls, so the front also holds every design
+that is Pareto-optimal for cost versus ``module_pmax``.
+
+Catalogs up to ``MAX_EXHAUSTIVE`` combinations are enumerated in chunks
+across a process pool. Larger spaces use a population-based search that
+mutates designs on the current front.
+
+Run headless with ``ctm optimize --costs costs.json --target-pmax 600``.
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ctm.cli import TEMPLATE_HELP, parse_assignment, template_defaults
+from ctm.model import BUSBAR_OPTIONS, DEFAULT_PARAMS, INPUT_COLUMNS, compute_ctm, params_key, stack_ctm_loss
+from ctm.sweep import PARALLEL_THRESHOLD
+
+OPTIMIZE_PARAMS = (
+    "num_busbars",
+    "ribbon_width",
+    "ribbon_thickness",
+    "glass_transmission",
+    "encapsulant_transmission",
+    "cell_binning_tolerance",
+)
+
+# Illustrative per-module option costs (USD); replace with supplier quotes
+DEFAULT_OPTION_COSTS = {
+    "num_busbars": dict(zip(BUSBAR_OPTIONS, (0.0, 0.05, 0.10, 0.12, 0.18, 0.30, 0.36, 0.42))),
+    "ribbon_width": {0.3: 0.10, 0.6: 0.20, 0.9: 0.30, 1.2: 0.40, 1.5: 0.50, 2.0: 0.67},
+    "ribbon_thickness": {0.15: 0.10, 0.2: 0.14, 0.25: 0.18, 0.3: 0.22, 0.4: 0.30},
+    "glass_transmission": {91.0: 0.0, 92.5: 0.40, 94.0: 0.90, 95.0: 1.60, 96.0: 2.60},
+    "encapsulant_transmission": {91.0: 0.0, 92.5: 0.30, 94.0: 0.70, 95.0: 1.20},
+    "cell_binning_tolerance": {0.5: 1.20, 1.0: 0.60, 1.5: 0.30, 2.5: 0.10, 5.0: 0.0},
+}
+
+FRONT_COLUMNS = ("cost", "module_pmax", "total_ctm_loss", "stack_ctm_loss")
+
+MAX_EXHAUSTIVE = 2_000_000
+CHUNK_SIZE = 100_000
+POPULATION_SIZE = 4096
+MAX_STALL_GENERATIONS = 5
+
+
+def design_space(option_costs=None):
+    """Return ``(names, values, costs)`` with one option and cost array per input."""
+    option_costs = DEFAULT_OPTION_COSTS if option_costs is None else option_costs
+    unknown = set(option_costs) - set(OPTIMIZE_PARAMS)
+    if unknown:
+        raise ValueError(f"Cannot optimize over: {', '.join(sorted(unknown))}")
+    names = tuple(name for name in OPTIMIZE_PARAMS if option_costs.get(name))
+    values, costs = [], []
+    for name in names:
+        options = sorted((float(value), float(cost)) for value, cost in option_costs[name].items())
+        if name == "num_busbars" and any(value not in BUSBAR_OPTIONS for value, _ in options):
+            raise ValueError(f"num_busbars options must be among {BUSBAR_OPTIONS}")
+        values.append(np.array([value for value, _ in options]))
+        costs.append(np.array([cost for _, cost in options]))
+    return names, values, costs
+
+
+def pareto_mask(cost, loss):
+    """Mask of designs not dominated in (lower cost, lower loss)."""
+    order = np.lexsort((loss, cost))
+    best_so_far = np.minimum.accumulate(loss[order])
+    keep = np.empty(len(order), dtype=bool)
+    keep[0:1] = True
+    keep[1:] = loss[order][1:] < best_so_far[:-1]
+    mask = np.zeros(len(cost), dtype=bool)
+    mask[order[keep]] = True
+    return mask
+
+
+def _evaluate_indices(base_key, names, values, costs, indices, cell=None):
+    """Score designs given as option indices of shape ``(n, len(names))``."""
+    params = dict(zip(INPUT_COLUMNS, base_key))
+    cost = np.zeros(len(indices))
+    for column, name in enumerate(names):
+        params[name] = values[column][indices[:, column]]
+        cost += costs[column][indices[:, column]]
+    results = compute_ctm(**params, **(cell or {}))
+    stack = stack_ctm_loss(results)
+    return {
+        "indices": indices,
+        "cost": cost,
+        "module_pmax": np.broadcast_to(results["module_pmax"], cost.shape),
+        "total_ctm_loss": np.broadcast_to(results["total_ctm_loss"], cost.shape),
+        "stack_ctm_loss": np.broadcast_to(stack, cost.shape),
+    }
+
+
+def _front(batch):
+    mask = pareto_mask(batch["cost"], batch["stack_ctm_loss"])
+    return {name: np.asarray(values)[mask] for name, values in batch.items()}
+
+
+def _merge(*batches):
+    return {name: np.concatenate([batch[name] for batch in batches]) for name in batches[0]}
+
+
+def _exhaustive_chunk(base_key, names, values, costs, start, stop, cell=None):
+    shape = tuple(len(v) for v in values)
+    indices = np.stack(np.unravel_index(np.arange(start, stop), shape), axis=1)
+    return _front(_evaluate_indices(base_key, names, values, costs, indices, cell))
+
+
+def _search_exhaustive(base_key, names, values, costs, workers, cell=None):
+    total = int(np.prod([len(v) for v in values]))
+    bounds = [(start, min(start + CHUNK_SIZE, total)) for start in range(0, total, CHUNK_SIZE)]
+    if workers <= 1 or len(bounds) == 1 or total < PARALLEL_THRESHOLD:
+        fronts = [_exhaustive_chunk(base_key, names, values, costs, start, stop, cell) for start, stop in bounds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            fronts = list(pool.map(_exhaustive_chunk, *zip(*[(base_key, names, values, costs, start, stop, cell)
+                                                               for start, stop in bounds])))
+    return _front(_merge(*fronts)), total
+
+
+def _search_population(base_key, names, values, costs, max_evaluations, workers, seed, cell=None):
+    rng = np.random.default_rng(seed)
+    sizes = np.array([len(v) for v in values])
+
+    def evaluate(indices):
+        # Each design is scored once; duplicates within and across generations are dropped
+        flat = np.ravel_multi_index(indices.T, sizes)
+        flat = np.setdiff1d(np.unique(flat), seen, assume_unique=True)
+        indices = np.stack(np.unravel_index(flat, sizes), axis=1)
+        if workers <= 1 or len(indices) < PARALLEL_THRESHOLD:
+            return flat, _evaluate_indices(base_key, names, values, costs, indices, cell)
+        parts = np.array_split(indices, workers)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            batches = list(pool.map(_evaluate_indices, *zip(*[(base_key, names, values, costs, part, cell)
+                                                              for part in parts])))
+        return flat, _merge(*batches)
+
+    seen = np.array([], dtype=np.int64)
+    seen, front = evaluate(rng.integers(0, sizes, size=(POPULATION_SIZE, len(sizes))))
+    front = _front(front)
+    stall = 0
+    while len(seen) < max_evaluations and stall < MAX_STALL_GENERATIONS:
+        # Mutate one or two inputs of designs drawn from the current front
+        parents = front["indices"][rng.integers(0, len(front["indices"]), POPULATION_SIZE)]
+        children = parents.copy()
+        for _ in range(2):
+            column = rng.integers(0, len(sizes), POPULATION_SIZE)
+            rows = np.arange(POPULATION_SIZE)
+            step = rng.choice([-1, 1], POPULATION_SIZE)
+            jump = rng.random(POPULATION_SIZE) < 0.2
+            moved = np.where(jump, rng.integers(0, sizes[column]), children[rows, column] + step)
+            children[rows, column] = np.clip(moved, 0, sizes[column] - 1)
+        flat, batch = evaluate(children)
+        if not len(flat):
+            stall += 1
+            continue
+        seen = np.union1d(seen, flat)
+        merged = _front(_merge(front, batch))
+        unchanged = np.array_equal(np.sort(np.ravel_multi_index(merged["indices"].T, sizes)),
+                                   np.sort(np.ravel_multi_index(front["indices"].T, sizes)))
+        stall = stall + 1 if unchanged else 0
+        front = merged
+    return front, len(seen)
+
+
+def optimize_bom(base_params=None, option_costs=None, target_pmax=None, max_ctm_loss=None,
+                 max_evaluations=MAX_EXHAUSTIVE, workers=None, seed=0, cell=None):
+    """Pareto front of BOM cost versus module power over the option catalogs.
+
+    Inputs without a catalog keep their ``base_params`` value. Returns
+    ``(front, evaluated)``: a DataFrame sorted by cost with the chosen
+    options, ``FRONT_COLUMNS`` and ``meets_target`` (``module_pmax >=
+    target_pmax`` and ``total_ctm_loss <= max_ctm_loss``), and the number of
+    designs scored. ``cell`` holds the template cell constants from
+    ``ctm.technology.electrical``.
+    """
+    import pandas as pd
+
+    names, values, costs = design_space(option_costs)
+    if not names:
+        raise ValueError("No option catalog to search")
+    base_key = params_key(DEFAULT_PARAMS if base_params is None else base_params)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    total = int(np.prod([len(v) for v in values]))
+    if total <= max_evaluations:
+        front, evaluated = _search_exhaustive(base_key, names, values, costs, workers, cell)
+    else:
+        front, evaluated = _search_population(base_key, names, values, costs, max_evaluations, workers, seed, cell)
+
+    order = np.argsort(front["cost"], kind="stable")
+    table = {name: values[column][front["indices"][order, column]] for column, name in enumerate(names)}
+    table.update({name: front[name][order] for name in FRONT_COLUMNS})
+    frame = pd.DataFrame(table)
+    meets = np.ones(len(frame), dtype=bool)
+    if target_pmax is not None:
+        meets &= frame["module_pmax"].to_numpy() >= target_pmax
+    if max_ctm_loss is not None:
+        meets &= frame["total_ctm_loss"].to_numpy() <= max_ctm_loss
+    frame["meets_target"] = meets
+    return frame, evaluated
+
+
+def read_option_costs(path):
+    """Load option costs from JSON (``{"input": {"option": cost}}``) or CSV (parameter,option,cost)."""
+    option_costs = {}
+    if path.lower().endswith(".csv"):
+        import csv
+
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                option_costs.setdefault(row["parameter"], {})[float(row["option"])] = float(row["cost"])
+        return option_costs
+    with open(path) as f:
+        data = json.load(f)
+    return {name: {float(option): float(cost) for option, cost in options.items()} for name, options in data.items()}
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(prog="ctm optimize", description="Cheapest BOM for a target module power.")
+    parser.add_argument("--costs", help="option costs as JSON or CSV (default: built-in illustrative catalog)")
+    parser.add_argument("--param", action="append", type=parse_assignment, default=[], metavar="NAME=VALUE",
+                        help="override a fixed model input")
+    parser.add_argument("--template", metavar="KEY", help=TEMPLATE_HELP)
+    parser.add_argument("--target-pmax", type=float, help="minimum module Pmax (Wp)")
+    parser.add_argument("--max-ctm-loss", type=float, help="maximum total CTM loss (%%)")
+    parser.add_argument("--max-evaluations", type=int, default=MAX_EXHAUSTIVE,
+                        help="enumerate every design up to this many, else search by population")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="Pareto front CSV (default: stdout)")
+    return parser
+
+
+def run(args):
+    defaults, cell = template_defaults(args.template)
+    params = dict(defaults)
+    params.update(dict(args.param))
+    option_costs = read_option_costs(args.costs) if args.costs else None
+    front, evaluated = optimize_bom(params, option_costs, args.target_pmax, args.max_ctm_loss,
+                                    args.max_evaluations, args.workers, args.seed, cell)
+    front.to_csv(args.output or sys.stdout, index=False)
+    feasible = front[front["meets_target"]]
+    if feasible.empty:
+        print(f"Scored {evaluated:,} designs; none on the front meets the target", file=sys.stderr)
+    else:
+        best = feasible.iloc[0]
+        print(f"Scored {evaluated:,} designs; cheapest meeting the target costs {best['cost']:.2f} "
+              f"for {best['module_pmax']:.1f} Wp", file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return run(args)
+    except (OSError, ValueError, KeyError) as error:
+        print(f"ctm optimize: {error}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
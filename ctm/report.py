@@ -0,0 +1,393 @@
+"""PDF report generation.
+
+reportlab is imported inside the functions so that importing ``ctm`` for
+calculations alone does not pay for it. Paragraph and table styles are built
+once per process and shared by every report. Batches of reports (one per
+module SKU) are rendered in a process pool, and the Streamlit app submits its
+single report to the same pool so a slow build never holds the server's GIL.
+"""
+import functools
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from ctm.model import compute_ctm_point, loss_values as result_loss_values
+
+# Result fields a report needs; a payload is a plain dict so it pickles cheaply
+PAYLOAD_FIELDS = (
+    "total_cell_power", "module_pmax", "module_efficiency", "total_ctm_loss", "ctm_ratio",
+    "module_voc", "module_isc", "module_vmpp", "module_impp", "annual_energy_total", "annual_energy_loss",
+)
+
+# Module line named in reports whose payload does not carry one
+DEFAULT_MODULE_TYPE = "144 Half-Cut Cell TOPCon"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def _templates():
+    """Paragraph styles, table styles and page settings, built once per process."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import TableStyle
+    from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+
+    styles = getSampleStyleSheet()
+    paragraph = {
+        "title": ParagraphStyle(
+            "CustomTitle",
+            parent=styles["Heading1"],
+            fontSize=24,
+            textColor=colors.HexColor("#1f77b4"),
+            spaceAfter=10,
+            alignment=TA_CENTER,
+            fontName="Helvetica-Bold"
+        ),
+        "heading": ParagraphStyle(
+            "CustomHeading",
+            parent=styles["Heading2"],
+            fontSize=14,
+            textColor=colors.HexColor("#1f77b4"),
+            spaceAfter=8,
+            spaceBefore=8,
+            fontName="Helvetica-Bold"
+        ),
+        "body": ParagraphStyle(
+            "CustomBody",
+            parent=styles["Normal"],
+            fontSize=10,
+            alignment=TA_JUSTIFY,
+            spaceAfter=6
+        ),
+        "disclaimer": ParagraphStyle(
+            "Disclaimer",
+            parent=styles["Normal"],
+            fontSize=9,
+            alignment=TA_JUSTIFY,
+            spaceAfter=6,
+            textColor=colors.HexColor("#CC0000")
+        ),
+    }
+
+    def summary_table_style(body_background):
+        return TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1f77b4")),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+            ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("FONTSIZE", (0, 0), (-1, 0), 11),
+            ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
+            ("BACKGROUND", (0, 1), (-1, -1), body_background),
+            ("GRID", (0, 0), (-1, -1), 1, colors.black),
+            ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
+            ("FONTSIZE", (0, 1), (-1, -1), 10),
+        ])
+
+    table = {
+        "results": summary_table_style(colors.beige),
+        "electrical": summary_table_style(colors.lightblue),
+        "energy": summary_table_style(colors.lightyellow),
+        "losses": TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1f77b4")),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+            ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("FONTSIZE", (0, 0), (-1, 0), 10),
+            ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
+            ("BACKGROUND", (0, 1), (-1, -2), colors.lightgrey),
+            ("BACKGROUND", (0, -1), (-1, -1), colors.HexColor("#FFD700")),
+            ("FONTNAME", (0, -1), (-1, -1), "Helvetica-Bold"),
+            ("GRID", (0, 0), (-1, -1), 1, colors.black),
+            ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
+            ("FONTSIZE", (0, 1), (-1, -1), 9),
+        ]),
+    }
+
+    return {"paragraph": paragraph, "table": table, "pagesize": A4, "inch": inch}
+
+
+def report_payload(result, label=None, module_type=None):
+    """Extract the fields a report needs from a model result (e.g. ``compute_ctm_point``).
+
+    ``module_type`` names the module line, e.g. a ``ctm.technology`` template name.
+    """
+    payload = {name: float(result[name]) for name in PAYLOAD_FIELDS}
+    payload["loss_values"] = {key: float(value) for key, value in result_loss_values(result).items()}
+    payload["label"] = label
+    payload["module_type"] = module_type or DEFAULT_MODULE_TYPE
+    return payload
+
+
+# Labels for ``interval_method`` in the uncertainty section
+INTERVAL_METHODS = {"linear": "linearized sensitivities", "lhs": "Latin-hypercube sampling"}
+
+
+def _number(value, digits):
+    """``value`` to ``digits`` decimals, or "n/a" for the NaN of an infeasible I-V curve."""
+    return f"{value:.{digits}f}" if math.isfinite(value) else "n/a"
+
+
+def _with_intervals(rows, payload, fields):
+    """Insert an interval column after the value column when the payload carries intervals.
+
+    ``fields`` holds one ``(result field, decimals, scale)`` per body row, or
+    ``None`` for rows without an interval.
+    """
+    intervals = payload.get("intervals")
+    if not intervals:
+        return rows
+    header = [*rows[0][:2], f"{payload['interval_level']:.0%} Interval", *rows[0][2:]]
+    body = []
+    for row, field in zip(rows[1:], fields):
+        text = "-"
+        if field is not None:
+            name, digits, scale = field
+            low, high = sorted(value * scale for value in intervals[name])
+            text = f"{low:.{digits}f} – {high:.{digits}f}"
+        body.append([*row[:2], text, *row[2:]])
+    return [header, *body]
+
+
+def _column_widths(rows, widths, inch):
+    """Table column widths, giving the value column's space to an interval column when present."""
+    if len(rows[0]) == len(widths):
+        return [width * inch for width in widths]
+    return [widths[0] * inch, 1.2 * inch, 1.6 * inch, *(width * inch for width in widths[2:])]
+
+
+def _report_story(payload, report_date):
+    from reportlab.platypus import Table, Paragraph, Spacer, PageBreak
+
+    templates = _templates()
+    title_style, heading_style, body_style, disclaimer_style = (
+        templates["paragraph"][name] for name in ("title", "heading", "body", "disclaimer")
+    )
+    table_styles = templates["table"]
+    inch = templates["inch"]
+
+    total_cell_power = payload["total_cell_power"]
+    module_pmax = payload["module_pmax"]
+    module_efficiency = payload["module_efficiency"]
+    total_ctm_loss = payload["total_ctm_loss"]
+    ctm_ratio = payload["ctm_ratio"]
+    loss_values = payload["loss_values"]
+
+    story = []
+
+    story.append(Paragraph("CELL-TO-MODULE (CTM) LOSS ANALYSIS REPORT", title_style))
+    story.append(Spacer(1, 0.05*inch))
+    story.append(Paragraph("DEMO REPORT", heading_style))
+    story.append(Spacer(1, 0.1*inch))
+
+    module_type = escape(payload.get("module_type") or DEFAULT_MODULE_TYPE)
+    company_text = f"PV module Power Technologies<br/>{module_type} Module"
+    if payload.get("label"):
+        company_text += f"<br/>Module: <b>{escape(str(payload['label']))}</b>"
+    story.append(Paragraph(company_text, body_style))
+
+    story.append(Paragraph(f"Report Generated: {report_date.strftime('%d %B %Y')}", body_style))
+    story.append(Spacer(1, 0.2*inch))
+
+    story.append(Paragraph("EXECUTIVE SUMMARY", heading_style))
+    summary_text = f"This report presents a detailed Cell-to-Module (CTM) loss analysis for {module_type} modules. Total CTM loss: <b>{total_ctm_loss:.2f}%</b>, resulting in module power of <b>{module_pmax:.1f} Wp</b> from cell power of <b>{total_cell_power:.0f} Wp</b>. Annual energy loss due to CTM: <b>{payload['annual_energy_loss']:.0f} kWh/year</b>."
+    story.append(Paragraph(summary_text, body_style))
+    story.append(Spacer(1, 0.15*inch))
+
+    story.append(Paragraph("KEY RESULTS", heading_style))
+    results_data = [
+        ["Parameter", "Value", "Unit"],
+        ["Total Cell Power", f"{total_cell_power:.1f}", "Wp"],
+        ["Module Pmax", f"{module_pmax:.1f}", "Wp"],
+        ["Power Loss", f"{total_cell_power - module_pmax:.1f}", "Wp"],
+        ["Module Efficiency", f"{module_efficiency:.2f}", "%"],
+        ["CTM Ratio", f"{ctm_ratio*100:.2f}", "%"],
+        ["Total CTM Loss", f"{total_ctm_loss:.2f}", "%"]
+    ]
+    results_data = _with_intervals(results_data, payload, [
+        ("total_cell_power", 1, 1), ("module_pmax", 1, 1), None, ("module_efficiency", 2, 1),
+        ("ctm_ratio", 2, 100), ("total_ctm_loss", 2, 1),
+    ])
+    story.append(Table(results_data, colWidths=_column_widths(results_data, [2.5, 1.5, 1.0], inch), style=table_styles["results"]))
+    story.append(Spacer(1, 0.15*inch))
+
+    story.append(Paragraph("ELECTRICAL PARAMETERS (STC)", heading_style))
+    elec_data = [
+        ["Parameter", "Value", "Unit"],
+        ["Voc", _number(payload["module_voc"], 2), "V"],
+        ["Isc", _number(payload["module_isc"], 2), "A"],
+        ["Vmpp", _number(payload["module_vmpp"], 2), "V"],
+        ["Impp", _number(payload["module_impp"], 2), "A"],
+        ["Pmax", f"{module_pmax:.1f}", "Wp"]
+    ]
+    elec_data = _with_intervals(elec_data, payload, [
+        ("module_voc", 2, 1), ("module_isc", 2, 1), ("module_vmpp", 2, 1), ("module_impp", 2, 1), ("module_pmax", 1, 1),
+    ])
+    story.append(Table(elec_data, colWidths=_column_widths(elec_data, [2.5, 1.5, 1.0], inch), style=table_styles["electrical"]))
+    story.append(Spacer(1, 0.15*inch))
+
+    story.append(Paragraph("ANNUAL ENERGY ANALYSIS", heading_style))
+    energy_data = [
+        ["Parameter", "Value", "Unit"],
+        ["Annual Energy Output", f"{payload['annual_energy_total']:.0f}", "kWh/year"],
+        ["Annual Energy Loss (CTM)", f"{payload['annual_energy_loss']:.0f}", "kWh/year"],
+        ["Loss Percentage", f"{total_ctm_loss:.2f}", "%"]
+    ]
+    energy_data = _with_intervals(energy_data, payload, [
+        ("annual_energy_total", 0, 1), ("annual_energy_loss", 0, 1), ("total_ctm_loss", 2, 1),
+    ])
+    story.append(Table(energy_data, colWidths=_column_widths(energy_data, [2.5, 1.5, 1.0], inch), style=table_styles["energy"]))
+    story.append(Spacer(1, 0.15*inch))
+
+    story.append(Paragraph("DETAILED LOSS BREAKDOWN", heading_style))
+    loss_breakdown_data = [
+        ["Loss Category", "Loss (%)", "Power Impact (W)"],
+        ["Geometric (Inactive Area)", f"{loss_values['geometric']:.2f}", f"{-total_cell_power * loss_values['geometric']/100:.2f}"],
+        ["Optical - Glass Reflection", f"{loss_values['glass']:.2f}", f"{-total_cell_power * loss_values['glass']/100:.2f}"],
+        ["Optical - Encapsulant Absorption", f"{loss_values['encapsulant']:.2f}", f"{-total_cell_power * loss_values['encapsulant']/100:.2f}"],
+        ["Optical - Ribbon Shading", f"{loss_values['ribbon']:.2f}", f"{-total_cell_power * loss_values['ribbon']/100:.2f}"],
+        ["Optical Coupling Gain", f"-{loss_values['coupling']:.2f}", f"+{total_cell_power * loss_values['coupling']/100:.2f}"],
+        ["Resistive (Cell + Ribbon)", f"{loss_values['resistive']:.2f}", f"{-total_cell_power * loss_values['resistive']/100:.2f}"],
+        ["Mismatch (Binning)", f"{loss_values['mismatch']:.2f}", f"{-total_cell_power * loss_values['mismatch']/100:.2f}"],
+        ["Junction Box & Cables", f"{loss_values['jb']:.2f}", f"{-total_cell_power * loss_values['jb']/100:.2f}"],
+        ["TOTAL", f"{total_ctm_loss:.2f}", f"{-(total_cell_power - module_pmax):.2f}"]
+    ]
+    loss_breakdown_data = _with_intervals(loss_breakdown_data, payload, [
+        ("geometric_loss", 2, 1), ("glass_reflection_loss", 2, 1), ("encapsulant_absorption_loss", 2, 1),
+        ("ribbon_shading_loss", 2, 1), ("optical_coupling_gain", 2, -1), ("total_resistive_loss", 2, 1),
+        ("mismatch_loss", 2, 1), ("jb_cable_loss", 2, 1), ("total_ctm_loss", 2, 1),
+    ])
+    story.append(Table(loss_breakdown_data, colWidths=_column_widths(loss_breakdown_data, [3.0, 1.5, 1.5], inch), style=table_styles["losses"]))
+    story.append(Spacer(1, 0.3*inch))
+
+    if payload.get("tornado"):
+        from reportlab.platypus import Image
+
+        from ctm.charts import tornado_image
+
+        story.append(Paragraph("UNCERTAINTY", heading_style))
+        method = INTERVAL_METHODS.get(payload["interval_method"], payload["interval_method"])
+        story.append(Paragraph(f"Intervals above cover {payload['interval_level']:.0%} of outcomes for the stated input tolerances, propagated by {method}. The chart shows how far {escape(payload['tornado_title'])} moves when each input alone sits at either end of its interval.", body_style))
+        png = tornado_image(payload["tornado"], payload["tornado_nominal"], payload["tornado_title"])
+        image = Image(BytesIO(png))
+        image.drawWidth, image.drawHeight = 6.5*inch, 6.5*inch * image.imageHeight / image.imageWidth
+        story.append(image)
+
+    story.append(PageBreak())
+    story.append(Paragraph("DISCLAIMER", heading_style))
+
+    disclaimer_full = "This is a DEMO REPORT for reference purposes only. This report has been generated using the CTM Loss Calculator tool and is intended for educational and technical understanding only."
+
+    story.append(Paragraph(disclaimer_full, disclaimer_style))
+    story.append(Spacer(1, 0.3*inch))
+
+    # Footer signature
+    story.append(Paragraph("_" * 80, body_style))
+    story.append(Spacer(1, 0.1*inch))
+
+    signature_text = "<b>CTM Loss Calculator</b> | Reference: Special thanks to <b>Gokul Raam G</b>"
+    story.append(Paragraph(signature_text, body_style))
+    return story
+
+
+def _build(stories, target):
+    from reportlab.platypus import SimpleDocTemplate
+
+    templates = _templates()
+    inch = templates["inch"]
+    doc = SimpleDocTemplate(target, pagesize=templates["pagesize"], rightMargin=0.5*inch, leftMargin=0.5*inch, topMargin=0.5*inch, bottomMargin=0.5*inch)
+    doc.build(stories)
+
+
+def render_report(payload):
+    """Render one report payload to PDF bytes. The report date is taken at call time."""
+    buffer = BytesIO()
+    _build(_report_story(payload, datetime.now()), buffer)
+    return buffer.getvalue()
+
+
+def create_pdf_report(total_cell_power, module_pmax, module_efficiency, df_losses, loss_values, total_ctm_loss, ctm_ratio, module_voc, module_isc, module_vmpp, module_impp, annual_energy_total, annual_energy_loss):
+    """Build the CTM analysis PDF and return it as a rewound BytesIO."""
+    payload = {
+        "total_cell_power": total_cell_power,
+        "module_pmax": module_pmax,
+        "module_efficiency": module_efficiency,
+        "total_ctm_loss": total_ctm_loss,
+        "ctm_ratio": ctm_ratio,
+        "module_voc": module_voc,
+        "module_isc": module_isc,
+        "module_vmpp": module_vmpp,
+        "module_impp": module_impp,
+        "annual_energy_total": annual_energy_total,
+        "annual_energy_loss": annual_energy_loss,
+        "loss_values": dict(loss_values),
+    }
+    return BytesIO(render_report(payload))
+
+
+def _write_report(payload, path):
+    _build(_report_story(payload, datetime.now()), path)
+    return path
+
+
+def _pool(workers):
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+
+
+def write_reports(payloads, paths, workers=None, chunksize=8):
+    """Render many reports in a process pool, writing each straight to its path.
+
+    Returns the written paths in input order.
+    """
+    payloads, paths = list(payloads), [os.fspath(p) for p in paths]
+    if workers == 1 or len(payloads) <= 1:
+        return [_write_report(payload, path) for payload, path in zip(payloads, paths)]
+    with _pool(workers) as pool:
+        return list(pool.map(_write_report, payloads, paths, chunksize=chunksize))
+
+
+def write_combined_report(payloads, path):
+    """Write one multi-section PDF with a section per payload."""
+    from reportlab.platypus import PageBreak
+
+    report_date = datetime.now()
+    stories = []
+    for payload in payloads:
+        if stories:
+            stories.append(PageBreak())
+        stories.extend(_report_story(payload, report_date))
+    _build(stories, os.fspath(path))
+    return path
+
+
+def payloads_for_designs(designs, labels=None, module_type=None, cell=None):
+    """Evaluate parameter mappings and turn each into a report payload.
+
+    ``cell`` holds the template cell constants from ``ctm.technology.electrical``.
+    """
+    labels = labels or [None] * len(designs)
+    cell = cell or {}
+    return [report_payload(compute_ctm_point(**params, **cell), label, module_type)
+            for params, label in zip(designs, labels)]
+
+
+def submit_report(payload):
+    """Render a report on the shared background process pool and return a Future of PDF bytes.
+
+    The pool uses the spawn start method because the caller is usually a
+    multi-threaded server process, which is unsafe to fork.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=min(4, os.cpu_count() or 1),
+                                            mp_context=multiprocessing.get_context("spawn"))
+    return _executor.submit(render_report, payload)
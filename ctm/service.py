@@ -0,0 +1,375 @@
+"""Local HTTP/JSON service for the CTM model, as a plain ASGI application.
+
+    POST /ctm          one design (JSON object of inputs) -> outputs
+    POST /ctm/batch    list of designs -> list of outputs
+    POST /report       one design, optional "label" -> PDF
+    GET  /params       defaults, input and output names, template keys
+    GET  /health       {"status": "ok"}
+
+A design may name a technology template (``"template": "hjt-132"``, see
+``ctm templates``). Inputs not given then fall back to the template's
+defaults, and its cell constants drive the electrical outputs, as in ``ctm
+calc --template``. Designs without one use the server's template
+(``ctm serve --template``, i.e. ``CTM_TEMPLATE``), else the model defaults.
+Non-finite inputs (NaN, Infinity, or numbers that overflow a float) and
+designs whose outputs are not finite (including designs whose I-V curve
+cannot deliver their Pmax) are rejected with 400, so responses are always
+strict JSON.
+Single-point requests are micro-batched. Requests that arrive within
+``BATCH_WINDOW`` seconds of each other, up to ``MAX_BATCH`` of them, are
+evaluated in one vectorized ``compute_ctm`` pass on a thread pool sized to
+the cores. Encoded responses are kept in an LRU cache keyed on the input
+vector and cell constants, so repeated designs skip the model and JSON
+encoding. Reports are
+rendered on the shared process pool from ``ctm.report``.
+
+``ctm serve`` runs the app under uvicorn, with one worker process per core
+by default; each process keeps its own batcher and cache.
+
+    ctm serve --port 8000 --template hjt-132
+    python -m benchmarks.loadtest --spawn --requests 50000
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from ctm.iv import CELL_VOC, IDEALITY
+from ctm.model import DEFAULT_PARAMS, INPUT_COLUMNS, OUTPUT_COLUMNS, params_key
+
+BATCH_WINDOW = 0.002  # seconds
+MAX_BATCH = 1024
+CACHE_SIZE = 65_536
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+
+_JSON_HEADERS = [(b"content-type", b"application/json")]
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _template(key):
+    """The template ``key`` (None for the model defaults), as a 400 if there is no such template."""
+    if key is None:
+        return None
+    from ctm.technology import load_template, template_names
+
+    if not isinstance(key, str) or key not in template_names():
+        raise HTTPError(400, f"unknown template {key!r}; one of {', '.join(template_names())}")
+    return load_template(key)
+
+
+def _design_key(design, default_template=None):
+    """Model inputs followed by the cell's Voc, ideality and front-ribbon flag, as a tuple of floats."""
+    if not isinstance(design, dict):
+        raise HTTPError(400, "a design must be a JSON object of model inputs")
+    design = dict(design)
+    template = _template(design.pop("template", default_template))
+    defaults, cell = DEFAULT_PARAMS, (CELL_VOC, IDEALITY, 1.0)
+    if template is not None:
+        defaults = template["params"]
+        cell = (template["cell"]["voc"], template["cell"]["ideality"], 1.0 if template["front_ribbons"] else 0.0)
+    try:
+        key = params_key({**defaults, **design})
+    except (TypeError, ValueError) as error:
+        raise HTTPError(400, str(error)) from None
+    invalid = [name for name, value in zip(INPUT_COLUMNS, key) if not math.isfinite(value)]
+    if invalid:
+        raise HTTPError(400, f"non-finite value for {', '.join(invalid)}")
+    return (*key, *cell)
+
+
+def _evaluate_keys(keys):
+    """Outputs of every input vector in one vectorized pass, one ``{name: float}`` per key."""
+    import numpy as np
+
+    from ctm.model import compute_ctm
+
+    inputs = np.array(keys, dtype=np.float64).T
+    cell_voc, ideality, front_ribbons = inputs[len(INPUT_COLUMNS):]
+    # Designs with non-finite outputs are rejected when encoded
+    with np.errstate(all="ignore"):
+        results = compute_ctm(dict(zip(INPUT_COLUMNS, inputs)), cell_voc=cell_voc, ideality=ideality,
+                              front_ribbons=front_ribbons)
+    columns = {name: results[name].tolist() for name in OUTPUT_COLUMNS}
+    return [{name: columns[name][i] for name in OUTPUT_COLUMNS} for i in range(len(keys))]
+
+
+def _encode(value):
+    try:
+        return json.dumps(value, separators=(",", ":"), allow_nan=False).encode()
+    except ValueError:
+        raise HTTPError(400, "the model outputs are not finite for these inputs") from None
+
+
+class ResponseCache:
+    """LRU of encoded responses keyed on ``_design_key`` tuples."""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        body = self._entries.get(key)
+        if body is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return body
+
+    def put(self, key, body):
+        self._entries[key] = body
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
+
+
+class Batcher:
+    """Collects single-point requests and evaluates them together on the worker pool."""
+
+    def __init__(self, executor, cache, window=BATCH_WINDOW, max_batch=MAX_BATCH):
+        self.executor = executor
+        self.cache = cache
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = {}
+        self._timer = None
+        self.batches = self.evaluated = 0
+
+    async def submit(self, key):
+        """Encoded outputs for one input vector."""
+        body = self.cache.get(key)
+        if body is not None:
+            return body
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._pending[key] = loop.create_future()
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._flush)
+        # Identical designs waiting in the same batch share one evaluation
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, {}
+        if pending:
+            asyncio.ensure_future(self._run(pending))
+
+    async def _run(self, pending):
+        keys = list(pending)
+        try:
+            outputs = await asyncio.get_running_loop().run_in_executor(self.executor, _evaluate_keys, keys)
+        except Exception as error:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            return
+        self.batches += 1
+        self.evaluated += len(keys)
+        for key, output in zip(keys, outputs):
+            future = pending[key]
+            try:
+                body = _encode(output)
+            except HTTPError as error:
+                if not future.done():
+                    future.set_exception(error)
+                continue
+            self.cache.put(key, body)
+            if not future.done():
+                future.set_result(body)
+
+
+class CTMService:
+    """The ASGI application; one instance per server process."""
+
+    def __init__(self, workers=None, window=BATCH_WINDOW, max_batch=MAX_BATCH, cache_size=CACHE_SIZE, template=None):
+        self.workers = workers or os.cpu_count() or 1
+        # Checked on the first request, so a bad key fails requests rather than the import
+        self.template = template or os.environ.get("CTM_TEMPLATE") or None
+        self.window = window
+        self.max_batch = max_batch
+        self.cache = ResponseCache(cache_size)
+        self._executor = None
+        self._batcher = None
+        self._params_body = None
+
+    @property
+    def batcher(self):
+        # Created lazily so servers that skip the lifespan protocol still work
+        if self._batcher is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ctm-service")
+            self._batcher = Batcher(self._executor, self.cache, self.window, self.max_batch)
+        return self._batcher
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = self._batcher = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.batcher
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send):
+        try:
+            status, headers, body = await self._route(scope["method"], scope["path"], receive)
+        except HTTPError as error:
+            status, headers, body = error.status, _JSON_HEADERS, _encode({"error": str(error)})
+        headers = [*headers, (b"content-length", str(len(body)).encode())]
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _route(self, method, path, receive):
+        routes = {
+            "/ctm": ("POST", self._point),
+            "/ctm/batch": ("POST", self._batch),
+            "/report": ("POST", self._report),
+            "/params": ("GET", self._params),
+            "/health": ("GET", self._health),
+        }
+        if path not in routes:
+            raise HTTPError(404, f"no route {path}")
+        allowed, handler = routes[path]
+        if method != allowed:
+            raise HTTPError(405, f"{path} accepts {allowed} only")
+        if method == "POST":
+            return await handler(await self._json_body(receive))
+        return await handler()
+
+    @staticmethod
+    async def _json_body(receive):
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise HTTPError(400, "client disconnected")
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                raise HTTPError(413, f"request body over {MAX_BODY_BYTES:,} bytes")
+            chunks.append(chunk)
+            if not message.get("more_body"):
+                break
+        try:
+            return json.loads(b"".join(chunks) or b"{}")
+        except ValueError as error:
+            raise HTTPError(400, f"invalid JSON: {error}") from None
+
+    async def _point(self, design):
+        return 200, _JSON_HEADERS, await self.batcher.submit(_design_key(design, self.template))
+
+    async def _batch(self, designs):
+        if isinstance(designs, dict):
+            designs = designs.get("designs")
+        if not isinstance(designs, list) or not designs:
+            raise HTTPError(400, "expected a non-empty JSON list of designs (or {\"designs\": [...]})")
+        keys = [_design_key(design, self.template) for design in designs]
+        outputs = await asyncio.get_running_loop().run_in_executor(self.batcher.executor, _evaluate_keys, keys)
+        return 200, _JSON_HEADERS, _encode(outputs)
+
+    async def _report(self, design):
+        from ctm.model import compute_ctm_cached
+        from ctm.report import report_payload, submit_report
+
+        if not isinstance(design, dict):
+            raise HTTPError(400, "a design must be a JSON object of model inputs")
+        design = dict(design)
+        label = design.pop("label", None)
+        key = _design_key(design, self.template)
+        result = compute_ctm_cached(key[:len(INPUT_COLUMNS)], *key[len(INPUT_COLUMNS):])
+        if not all(math.isfinite(result[name]) for name in OUTPUT_COLUMNS):
+            raise HTTPError(400, "the model outputs are not finite for these inputs")
+        template = _template(design.get("template", self.template))
+        payload = report_payload(result, label, template["name"] if template is not None else None)
+        pdf = await asyncio.wrap_future(submit_report(payload))
+        return 200, [(b"content-type", b"application/pdf")], pdf
+
+    async def _params(self):
+        if self._params_body is None:
+            from ctm.technology import template_names
+
+            template = _template(self.template)
+            defaults = DEFAULT_PARAMS if template is None else template["params"]
+            self._params_body = _encode({"defaults": defaults, "inputs": INPUT_COLUMNS, "outputs": OUTPUT_COLUMNS,
+                                         "template": self.template, "templates": list(template_names())})
+        return 200, _JSON_HEADERS, self._params_body
+
+    async def _health(self):
+        batcher = self.batcher
+        return 200, _JSON_HEADERS, _encode({"status": "ok", "pid": os.getpid(), "cache": self.cache.stats(),
+                                            "batches": batcher.batches, "evaluated": batcher.evaluated})
+
+
+# Module-level instance for ``uvicorn ctm.service:app``
+app = CTMService()
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(prog="ctm serve", description="Run the CTM HTTP/JSON service.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="(default: %(default)s)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="(default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="server processes (default: one per core, %(default)s)")
+    parser.add_argument("--template", metavar="KEY",
+                        help="template for designs that name none (default: $CTM_TEMPLATE, else the model defaults)")
+    parser.add_argument("--log-level", default="warning")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        import uvicorn
+    except ImportError:
+        print("ctm serve: uvicorn is required (pip install 'ctm[service]')", file=sys.stderr)
+        return 1
+    if args.template:
+        from ctm.technology import load_template
+
+        try:
+            load_template(args.template)
+        except ValueError as error:
+            print(f"ctm serve: {error}", file=sys.stderr)
+            return 1
+        # Worker processes import ``app`` afresh and read the template from the environment
+        os.environ["CTM_TEMPLATE"] = args.template
+    uvicorn.run("ctm.service:app", host=args.host, port=args.port, workers=args.workers, log_level=args.log_level,
+                access_log=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""Wavelength-resolved optical stack: glass and encapsulant losses and coupling gain.
+
+Losses are weighted by the photocurrent each wavelength bin contributes:
+spectral irradiance x wavelength (photon flux) x cell EQE. With the
+transmission curves of G glasses and E encapsulants stacked as ``(G, bins)``
+and ``(E, bins)`` matrices, every glass/encapsulant pair comes out of a
+single ``(G, bins) @ (bins, E)`` product. A grid of thousands of stacks
+therefore costs milliseconds.
+
+The reference spectrum, default EQE and material library are built once at
+import. The built-in AM1.5G is an approximation: a 5778 K blackbody through
+Rayleigh, aerosol, ozone, O2 and water-vapour attenuation. Only its shape
+matters for the weighted losses. Point ``CTM_AM15G`` at a CSV of the ASTM
+G173 table (wavelength_nm, global tilt W/m²/nm) to use the standard spectrum
+instead. Library curves are smooth illustrative fits, not datasheet
+measurements; upload measured curves for real materials.
+"""
+import os
+
+import numpy as np
+
+from ctm.model import compute_ctm, params_key, stack_ctm_loss, INPUT_COLUMNS
+
+WAVELENGTHS = np.arange(280.0, 1300.0 + 0.25, 0.5)  # nm, 2041 bins
+
+# Share of the light reflected by the cell that total internal reflection at
+# the glass/air interface sends back onto it (~1 - 1/n² for a textured cell under glass)
+RECAPTURE_FRACTION = 0.55
+
+
+def _logistic(center, width):
+    return 1 / (1 + np.exp(-(WAVELENGTHS - center) / width))
+
+
+def _band(center, width, depth):
+    return 1 - depth * np.exp(-0.5 * ((WAVELENGTHS - center) / width) ** 2)
+
+
+def _approximate_am15g():
+    um = WAVELENGTHS / 1000
+    # Planck radiance shape at 5778 K (hc/k = 14388 um K)
+    extraterrestrial = um ** -5 / np.expm1(14388 / (um * 5778))
+    rayleigh = 0.008569 * um ** -4 * (1 + 0.0113 * um ** -2 + 0.00013 * um ** -4)
+    aerosol = 0.084 * (um / 0.5) ** -1.14
+    transmittance = np.exp(-1.5 * (rayleigh + aerosol)) * _logistic(305, 8)
+    for center, width, depth in ((760, 3, 0.6), (720, 10, 0.25), (820, 12, 0.25), (940, 25, 0.65),
+                                 (1130, 30, 0.8), (1270, 6, 0.3)):
+        transmittance = transmittance * _band(center, width, depth)
+    # Diffuse light on the 37° tilted plane fills in the blue, roughly
+    spectrum = extraterrestrial * (transmittance + 0.12 * (0.5 / um) ** 2 * transmittance ** 0.5)
+    return spectrum / (spectrum.sum() * 0.5) * 1000
+
+
+def _interpolate(wavelengths, values):
+    order = np.argsort(wavelengths)
+    return np.interp(WAVELENGTHS, np.asarray(wavelengths, dtype=np.float64)[order],
+                     np.asarray(values, dtype=np.float64)[order])
+
+
+def read_curves(source):
+    """Curves from a CSV with a ``wavelength_nm`` column (or the first column) and one column per material.
+
+    Values above 1.5 are taken as percent. Curves are interpolated onto
+    ``WAVELENGTHS`` and held flat beyond the measured range.
+    """
+    import pandas as pd
+
+    df = pd.read_csv(source)
+    wavelength = "wavelength_nm" if "wavelength_nm" in df.columns else df.columns[0]
+    curves = {}
+    for name in df.columns:
+        if name == wavelength:
+            continue
+        column = df[[wavelength, name]].dropna()
+        if column.empty:
+            continue
+        values = column[name].to_numpy(dtype=np.float64)
+        if values.max() > 1.5:
+            values = values / 100
+        curves[str(name)] = _interpolate(column[wavelength].to_numpy(), values)
+    if not curves:
+        raise ValueError("no curve columns found")
+    return curves
+
+
+def _load_spectrum():
+    path = os.environ.get("CTM_AM15G")
+    if not path:
+        return _approximate_am15g(), "approximate AM1.5G"
+    return next(iter(read_curves(path).values())), f"AM1.5G from {path}"
+
+
+def _frozen(array):
+    array.setflags(write=False)
+    return array
+
+
+AM15G, SPECTRUM_SOURCE = _load_spectrum()
+_frozen(AM15G)
+
+# TOPCon-like EQE: UV-blue rise, ~96% plateau, fall-off towards the silicon band gap
+DEFAULT_EQE = _frozen(0.96 * _logistic(335, 18) / (1 + np.exp((WAVELENGTHS - 1085) / 32)))
+
+# Front reflectance of a textured, SiNx-coated cell: minimum near 600 nm
+CELL_REFLECTANCE = _frozen(np.clip(0.02 + 0.05 * ((WAVELENGTHS - 600) / 400) ** 2, 0, 0.35))
+
+GLASS_LIBRARY = {
+    "AR-coated glass 3.2 mm": _frozen(0.957 * _logistic(318, 10) * _band(1050, 260, 0.025)),
+    "AR-coated glass 2.0 mm": _frozen(0.962 * _logistic(312, 9) * _band(1050, 260, 0.016)),
+    "Uncoated glass 3.2 mm": _frozen(0.918 * _logistic(318, 10) * _band(1050, 260, 0.025)),
+}
+
+ENCAPSULANT_LIBRARY = {
+    "EVA (UV-cut)": _frozen(0.962 * _logistic(378, 7)),
+    "EVA (UV-transparent)": _frozen(0.958 * _logistic(318, 9)),
+    "POE": _frozen(0.966 * _logistic(330, 8)),
+}
+
+
+def current_weights(spectrum=AM15G, eqe=DEFAULT_EQE):
+    """Per-bin share of the cell photocurrent: irradiance x wavelength x EQE, normalized to sum to 1."""
+    weights = spectrum * WAVELENGTHS * eqe
+    return weights / weights.sum()
+
+
+def stack_optics(glass, encapsulant, spectrum=AM15G, eqe=DEFAULT_EQE, reflectance=CELL_REFLECTANCE):
+    """Current-weighted optics for every glass/encapsulant pair.
+
+    ``glass`` is ``(G, bins)`` and ``encapsulant`` is ``(E, bins)``
+    transmission. Returns ``{name: (G, E) array}`` with
+    ``glass_transmission`` and ``encapsulant_transmission`` (%, the latter for
+    the light the glass lets through), ready to pass to ``compute_ctm``, and
+    ``optical_coupling_gain`` (%) from cell reflection recaptured under the
+    glass. ``stack_current_loss`` (%) is the net photocurrent lost to the
+    stack relative to the bare cell.
+    """
+    glass = np.atleast_2d(np.asarray(glass, dtype=np.float64))
+    encapsulant = np.atleast_2d(np.asarray(encapsulant, dtype=np.float64))
+    weights = current_weights(spectrum, eqe)
+    recapture = 1 + RECAPTURE_FRACTION * reflectance / (1 - reflectance)
+
+    through_glass = glass @ weights
+    through_stack = (glass * weights) @ encapsulant.T
+    recaptured = (glass * (weights * recapture)) @ encapsulant.T
+    shape = through_stack.shape
+    return {
+        "glass_transmission": np.broadcast_to(through_glass[:, np.newaxis] * 100, shape),
+        "encapsulant_transmission": through_stack / through_glass[:, np.newaxis] * 100,
+        "optical_coupling_gain": (recaptured / through_stack - 1) * 100,
+        "stack_current_loss": (1 - recaptured) * 100,
+    }
+
+
+def stack_table(base_params, glass_curves, encapsulant_curves, spectrum=AM15G, eqe=DEFAULT_EQE, cell=None):
+    """Every glass/encapsulant combination evaluated through the CTM model, as a DataFrame, lowest stack loss first.
+
+    ``glass_curves`` and ``encapsulant_curves`` map material names to
+    transmission arrays on ``WAVELENGTHS``; other inputs come from ``base_params``
+    and ``cell`` (the template cell constants from ``ctm.technology.electrical``).
+    Losses, power and energy use the uncapped loss stack: the 2.5% cap of
+    STEP 7 would otherwise give every stack the same module power.
+    """
+    import pandas as pd
+
+    optics = stack_optics(np.array(list(glass_curves.values())), np.array(list(encapsulant_curves.values())),
+                          spectrum, eqe)
+    params = dict(zip(INPUT_COLUMNS, params_key(base_params)))
+    params["glass_transmission"] = optics["glass_transmission"]
+    params["encapsulant_transmission"] = optics["encapsulant_transmission"]
+    results = compute_ctm(optical_coupling_gain=optics["optical_coupling_gain"], **params, **(cell or {}))
+
+    glass_names, encapsulant_names = np.meshgrid(list(glass_curves), list(encapsulant_curves), indexing="ij")
+    columns = {"glass": glass_names.ravel(), "encapsulant": encapsulant_names.ravel()}
+    columns.update({name: values.ravel() for name, values in optics.items()})
+    stack = stack_ctm_loss(results)
+    stack_module_pmax = results["total_cell_power"] * (1 - stack / 100)
+    stack_results = {
+        "glass_reflection_loss": results["glass_reflection_loss"],
+        "encapsulant_absorption_loss": results["encapsulant_absorption_loss"],
+        "stack_ctm_loss": stack,
+        "stack_module_pmax": stack_module_pmax,
+        "stack_annual_energy": stack_module_pmax / 1000 * params["annual_irradiance"],
+    }
+    for name, values in stack_results.items():
+        columns[name] = np.broadcast_to(values, glass_names.shape).ravel()
+    return pd.DataFrame(columns).sort_values("stack_current_loss", ignore_index=True)
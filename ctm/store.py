@@ -0,0 +1,216 @@
+"""Local SQLite store of every CTM run, with typed outputs and Arrow export.
+
+Each row holds a timestamp, the run's source (``app``, ``calc``, ...), a cell
+type, every model input and every model output as REAL columns. Indexes on
+cell type, busbar count and timestamp keep filtered queries fast on stores
+with millions of runs. Query results can be written as an Arrow IPC file,
+which BI tools can memory-map without copying, or as Parquet.
+
+Recording is opt-in: the app records its runs only when ``CTM_RESULTS_DB``
+names a database file, which ``ctm runs`` then reads by default.
+
+    ctm runs --busbars 12 --since 2026-01-01 -o runs.arrow
+    ctm runs --cell-type TOPCon --count
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+from ctm.cache import cached
+from ctm.model import INPUT_COLUMNS, OUTPUT_COLUMNS
+
+# Unset or empty: the app records nothing
+STORE_PATH = os.environ.get("CTM_RESULTS_DB") or None
+DEFAULT_CELL_TYPE = "TOPCon"
+
+META_COLUMNS = ("id", "ts", "source", "cell_type")
+RUN_COLUMNS = (*META_COLUMNS, *INPUT_COLUMNS, *OUTPUT_COLUMNS)
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    source TEXT NOT NULL,
+    cell_type TEXT NOT NULL,
+    {", ".join(f"{name} REAL" for name in (*INPUT_COLUMNS, *OUTPUT_COLUMNS))}
+);
+CREATE INDEX IF NOT EXISTS runs_ts ON runs (ts);
+CREATE INDEX IF NOT EXISTS runs_cell_type_ts ON runs (cell_type, ts);
+CREATE INDEX IF NOT EXISTS runs_busbars_ts ON runs (num_busbars, ts);
+CREATE INDEX IF NOT EXISTS runs_cell_type_busbars_ts ON runs (cell_type, num_busbars, ts);
+"""
+
+
+def _timestamp(value):
+    """Unix seconds from a number, ``datetime`` or ISO date/time string."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+
+def _floats(column):
+    if hasattr(column, "astype"):
+        return column.astype("float64").tolist()
+    return [float(value) for value in column]
+
+
+class ResultsStore:
+    """One SQLite file of runs; safe to share between threads."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.executescript(_SCHEMA)
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def record(self, params, result, source="app", cell_type=DEFAULT_CELL_TYPE, ts=None):
+        """Store one run from an input mapping and a ``compute_ctm_point`` result."""
+        self.record_many({name: [params[name]] for name in INPUT_COLUMNS},
+                         {name: [result[name]] for name in OUTPUT_COLUMNS}, source, cell_type, ts)
+
+    def record_many(self, inputs, outputs, source="app", cell_type=DEFAULT_CELL_TYPE, ts=None):
+        """Store many runs from column mappings (lists or arrays) of inputs and outputs in one transaction."""
+        ts = time.time() if ts is None else _timestamp(ts)
+        # Whole-column conversion to Python floats; per-value float() dominates large inserts
+        columns = [_floats(inputs[name]) for name in INPUT_COLUMNS] + [_floats(outputs[name]) for name in OUTPUT_COLUMNS]
+        names = ", ".join(RUN_COLUMNS[1:])
+        placeholders = ", ".join("?" * (len(columns) + 3))
+        rows = ((ts, source, cell_type, *values) for values in zip(*columns))
+        with self._connection() as connection:
+            connection.executemany(f"INSERT INTO runs ({names}) VALUES ({placeholders})", rows)
+
+    def _where(self, cell_type=None, num_busbars=None, since=None, until=None, source=None):
+        clauses, args = [], []
+        for column, value in (("cell_type", cell_type), ("num_busbars", num_busbars), ("source", source)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                args.append(value)
+        if since is not None:
+            clauses.append("ts >= ?")
+            args.append(_timestamp(since))
+        if until is not None:
+            clauses.append("ts < ?")
+            args.append(_timestamp(until))
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), args
+
+    def count(self, **filters):
+        """Number of stored runs matching ``cell_type``/``num_busbars``/``since``/``until``/``source``."""
+        where, args = self._where(**filters)
+        return self._connection().execute(f"SELECT COUNT(*) FROM runs{where}", args).fetchone()[0]
+
+    def query(self, columns=None, limit=None, **filters):
+        """Matching runs, oldest first, as a DataFrame with float inputs/outputs and a UTC ``ts``."""
+        import pandas as pd
+
+        columns = list(columns or RUN_COLUMNS)
+        unknown = set(columns) - set(RUN_COLUMNS)
+        if unknown:
+            raise ValueError(f"unknown column(s): {', '.join(sorted(unknown))}")
+        where, args = self._where(**filters)
+        sql = f"SELECT {', '.join(columns)} FROM runs{where} ORDER BY ts, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(int(limit))
+        frame = pd.DataFrame.from_records(self._connection().execute(sql, args).fetchall(), columns=columns)
+        if "ts" in frame:
+            frame["ts"] = pd.to_datetime(frame["ts"], unit="s", utc=True)
+        floats = [name for name in columns if name in INPUT_COLUMNS or name in OUTPUT_COLUMNS]
+        return frame.astype({name: "float64" for name in floats})
+
+    def to_arrow(self, columns=None, limit=None, **filters):
+        """``query`` as a pyarrow Table.
+
+        Rows come out of SQLite as Python tuples and go through a DataFrame, so
+        the table is a copy; only reading an exported Arrow IPC file is zero-copy.
+        """
+        import pyarrow as pa
+
+        return pa.Table.from_pandas(self.query(columns, limit, **filters), preserve_index=False)
+
+    def export(self, path, columns=None, limit=None, **filters):
+        """Write matching runs to ``.parquet``, ``.csv`` or an Arrow IPC file (any other extension)."""
+        table = self.to_arrow(columns, limit, **filters)
+        lowered = path.lower()
+        if lowered.endswith((".parquet", ".pq")):
+            import pyarrow.parquet as pq
+
+            pq.write_table(table, path)
+        elif lowered.endswith(".csv"):
+            import pyarrow.csv as pacsv
+
+            pacsv.write_csv(table, path)
+        else:
+            import pyarrow.feather as feather
+
+            # Uncompressed so readers can memory-map the columns in place
+            feather.write_feather(table, path, compression="uncompressed")
+        return table.num_rows
+
+
+@cached(maxsize=1)
+def default_store():
+    """The process-wide store at ``STORE_PATH``, or ``None`` when recording is off."""
+    return ResultsStore(STORE_PATH) if STORE_PATH else None
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(prog="ctm runs", description="Query and export stored CTM runs.")
+    parser.add_argument("--db", default=STORE_PATH, required=STORE_PATH is None,
+                        help="results database (default: $CTM_RESULTS_DB)")
+    parser.add_argument("--cell-type")
+    parser.add_argument("--busbars", type=float, help="number of busbars")
+    parser.add_argument("--source", help="e.g. app or calc")
+    parser.add_argument("--since", help="ISO date/time, inclusive")
+    parser.add_argument("--until", help="ISO date/time, exclusive")
+    parser.add_argument("--columns", help="comma-separated columns (default: all)")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--count", action="store_true", help="print the number of matching runs only")
+    parser.add_argument("-o", "--output", help="Arrow IPC (.arrow), Parquet or CSV file (default: CSV on stdout)")
+    return parser
+
+
+def run(args):
+    if not os.path.exists(args.db):
+        print(f"ctm runs: {args.db} does not exist", file=sys.stderr)
+        return 1
+    store = ResultsStore(args.db)
+    filters = {"cell_type": args.cell_type, "num_busbars": args.busbars, "source": args.source,
+               "since": args.since, "until": args.until}
+    if args.count:
+        print(store.count(**filters))
+        return 0
+    columns = args.columns.split(",") if args.columns else None
+    if args.output:
+        rows = store.export(args.output, columns, args.limit, **filters)
+        print(f"Wrote {rows:,} runs to {args.output}", file=sys.stderr)
+    else:
+        store.query(columns, args.limit, **filters).to_csv(sys.stdout, index=False)
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return run(args)
+    except (OSError, ValueError, sqlite3.Error) as error:
+        print(f"ctm runs: {error}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""Parameter sweeps over one or two CTM inputs.
+
+Grids are evaluated with the vectorized model in row chunks. Large grids are
+spread across a process pool and chunks are yielded as they finish, so callers
+can update a progress bar or partial chart while the rest is still running.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from ctm.layout import LAYOUT_INPUTS, LAYOUT_OUTPUTS, layout_metrics
+from ctm.model import BUSBAR_OPTIONS, compute_ctm, params_key, INPUT_COLUMNS
+
+# Sweepable inputs with their labels and the ranges of the default template; ``sweep_axes`` gives a template's own
+SWEEP_PARAMS = {
+    "cell_power": ("Cell Power (Wp)", 2.0, 10.0),
+    "cell_efficiency": ("Cell Efficiency (%)", 20.0, 27.0),
+    "num_cells": ("Number of Cells", 100, 160),
+    "module_area": ("Module Area (m²)", 2.0, 3.5),
+    "cell_length": ("Cell Length (mm)", 180.0, 210.0),
+    "cell_width": ("Cell Width (mm)", 85.0, 95.0),
+    "glass_transmission": ("Glass Transmission (%)", 88.0, 96.0),
+    "encapsulant_transmission": ("Encapsulant Transmission (%)", 88.0, 96.0),
+    "num_busbars": ("Number of Busbars", min(BUSBAR_OPTIONS), max(BUSBAR_OPTIONS)),
+    "ribbon_width": ("Ribbon Width (mm)", 0.1, 4.5),
+    "ribbon_thickness": ("Ribbon Thickness (mm)", 0.15, 5.5),
+    "cell_binning_tolerance": ("Cell Binning Tolerance (±%)", 0.0, 5.0),
+    "junction_box_loss": ("Junction Box & Cable Loss (%)", 0.1, 2.0),
+    "annual_irradiance": ("Annual Solar Irradiance (kWh/m²/year)", 1000.0, 2500.0),
+}
+
+SWEEP_OUTPUTS = ("total_ctm_loss", "module_pmax", "module_fill_factor", "annual_energy_total")
+
+# Below this many grid points a process pool costs more than it saves
+PARALLEL_THRESHOLD = 200_000
+
+
+RIBBON_INPUTS = ("ribbon_width", "ribbon_thickness")
+
+
+def sweep_axes(template):
+    """``{name: (label, low, high)}`` of the inputs worth sweeping for ``template``, over its validated ranges.
+
+    Templates without front ribbons leave out the ribbon inputs, which the model ignores for them.
+    """
+    axes = {}
+    for name, (label, _, _) in SWEEP_PARAMS.items():
+        if name in RIBBON_INPUTS and not template["front_ribbons"]:
+            continue
+        limits = template["ranges"][name]
+        # Busbar ranges list the allowed counts instead of low, high, step
+        low, high = (min(limits), max(limits)) if name == "num_busbars" else limits[:2]
+        axes[name] = (label, low, high)
+    return axes
+
+
+def sweep_values(name, start, stop, steps, busbar_options=BUSBAR_OPTIONS):
+    """Evenly spaced values for ``name``; busbar counts snap to ``busbar_options``."""
+    if name == "num_busbars":
+        return np.array([n for n in busbar_options if start <= n <= stop], dtype=np.float64)
+    if name == "num_cells":
+        return np.unique(np.round(np.linspace(start, stop, steps) / 2) * 2)
+    return np.linspace(start, stop, steps)
+
+
+def _evaluate_rows(base_key, x_name, x_values, y_name, y_values, outputs, cell=None):
+    params = dict(zip(INPUT_COLUMNS, base_key))
+    params[x_name] = x_values[np.newaxis, :]
+    if y_name is not None:
+        params[y_name] = y_values[:, np.newaxis]
+    results = compute_ctm(**params, **(cell or {}))
+    if any(name in LAYOUT_OUTPUTS for name in outputs):
+        results.update(layout_metrics(*(params[name] for name in LAYOUT_INPUTS)))
+    shape = (len(y_values) if y_name is not None else 1, len(x_values))
+    return {name: np.broadcast_to(results[name], shape).astype(np.float32) for name in outputs}
+
+
+def iter_sweep(base_params, x_name, x_values, y_name=None, y_values=None,
+               outputs=SWEEP_OUTPUTS, chunk_rows=None, workers=None, cell=None):
+    """Evaluate a sweep grid and yield ``(row_slice, {output: block})`` per finished chunk.
+
+    Rows follow ``y_values`` (a single row for one-dimensional sweeps), columns
+    follow ``x_values``. Chunks may arrive out of order when run in parallel.
+    ``outputs`` may include ``ctm.layout.LAYOUT_OUTPUTS``, which are rasterized
+    once per distinct layout in the grid. ``cell`` holds the template cell
+    constants from ``ctm.technology.electrical``.
+    """
+    base_key = params_key(base_params)
+    x_values = np.asarray(x_values, dtype=np.float64)
+    if y_name is None:
+        yield slice(0, 1), _evaluate_rows(base_key, x_name, x_values, None, np.zeros(1), outputs, cell)
+        return
+
+    y_values = np.asarray(y_values, dtype=np.float64)
+    n_rows = len(y_values)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunk_rows is None:
+        chunk_rows = max(1, -(-n_rows // (4 * workers)))
+    slices = [slice(start, min(start + chunk_rows, n_rows)) for start in range(0, n_rows, chunk_rows)]
+
+    if workers <= 1 or len(slices) == 1 or n_rows * len(x_values) < PARALLEL_THRESHOLD:
+        for rows in slices:
+            yield rows, _evaluate_rows(base_key, x_name, x_values, y_name, y_values[rows], outputs, cell)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_evaluate_rows, base_key, x_name, x_values, y_name, y_values[rows], outputs, cell): rows
+            for rows in slices
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def sweep_grid(base_params, x_name, x_values, y_name=None, y_values=None,
+               outputs=SWEEP_OUTPUTS, chunk_rows=None, workers=None, cell=None):
+    """Evaluate a full sweep grid and return ``{output: array of shape (len(y), len(x))}``."""
+    n_rows = 1 if y_name is None else len(y_values)
+    grids = {name: np.full((n_rows, len(x_values)), np.nan, dtype=np.float32) for name in outputs}
+    for rows, block in iter_sweep(base_params, x_name, x_values, y_name, y_values, outputs, chunk_rows, workers,
+                                  cell):
+        for name in outputs:
+            grids[name][rows] = block[name]
+    return grids
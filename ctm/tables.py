@@ -0,0 +1,107 @@
+"""Loss breakdown table, I-V curve table and CSV export."""
+from ctm.cache import cached
+from ctm.iv import CELL_VOC, IDEALITY, iv_curve
+from ctm.model import INPUT_COLUMNS, compute_ctm_cached
+
+LOSS_TABLE_COLUMNS = ("Loss Category", "Loss (%)", "Power Impact (W)")
+
+
+# Result fields behind each loss table row; the coupling gain row is shown negated
+LOSS_ROW_FIELDS = (
+    "geometric_loss", "glass_reflection_loss", "encapsulant_absorption_loss", "ribbon_shading_loss",
+    "optical_coupling_gain", "total_resistive_loss", "mismatch_loss", "jb_cable_loss", "total_ctm_loss",
+)
+
+
+def interval_text(low, high, negate=False):
+    """Format an interval as "low – high" with two decimals."""
+    if negate:
+        low, high = -high, -low
+    return f"{low:.2f} – {high:.2f}"
+
+
+def loss_table_data(result, intervals=None):
+    """Build the formatted loss breakdown shown in the app and exported as CSV.
+
+    ``intervals`` maps result fields to ``(low, high)`` bounds, e.g. from
+    ``ctm.uncertainty.propagate``, and adds an "Interval (%)" column.
+    """
+    total_cell_power = result["total_cell_power"]
+    module_pmax = result["module_pmax"]
+    geometric_loss = result["geometric_loss"]
+    glass_reflection_loss = result["glass_reflection_loss"]
+    encapsulant_absorption_loss = result["encapsulant_absorption_loss"]
+    ribbon_shading_loss = result["ribbon_shading_loss"]
+    optical_coupling_gain = result["optical_coupling_gain"]
+    total_resistive_loss = result["total_resistive_loss"]
+    mismatch_loss = result["mismatch_loss"]
+    jb_cable_loss = result["jb_cable_loss"]
+    total_ctm_loss = result["total_ctm_loss"]
+
+    data = {
+        "Loss Category": [
+            "Geometric",
+            "Glass Reflection",
+            "Encapsulant Absorption",
+            "Ribbon Shading",
+            "Coupling Gain",
+            "Resistive",
+            "Mismatch",
+            "JB & Cable",
+            "TOTAL CTM LOSS"
+        ],
+        "Loss (%)": [
+            f"{geometric_loss:.2f}",
+            f"{glass_reflection_loss:.2f}",
+            f"{encapsulant_absorption_loss:.2f}",
+            f"{ribbon_shading_loss:.2f}",
+            f"-{optical_coupling_gain:.2f}",
+            f"{total_resistive_loss:.2f}",
+            f"{mismatch_loss:.2f}",
+            f"{jb_cable_loss:.2f}",
+            f"{total_ctm_loss:.2f}"
+        ],
+        "Power Impact (W)": [
+            f"{-total_cell_power * geometric_loss/100:.2f}",
+            f"{-total_cell_power * glass_reflection_loss/100:.2f}",
+            f"{-total_cell_power * encapsulant_absorption_loss/100:.2f}",
+            f"{-total_cell_power * ribbon_shading_loss/100:.2f}",
+            f"+{total_cell_power * optical_coupling_gain/100:.2f}",
+            f"{-total_cell_power * total_resistive_loss/100:.2f}",
+            f"{-total_cell_power * mismatch_loss/100:.2f}",
+            f"{-total_cell_power * jb_cable_loss/100:.2f}",
+            f"{-(total_cell_power - module_pmax):.2f}"
+        ]
+    }
+    if intervals is not None:
+        data["Interval (%)"] = [interval_text(*intervals[name], negate=name == "optical_coupling_gain")
+                                for name in LOSS_ROW_FIELDS]
+    return data
+
+
+@cached(maxsize=256)
+def loss_table(key):
+    """Memoized loss breakdown DataFrame for a ``params_key`` tuple."""
+    import pandas as pd
+
+    return pd.DataFrame(loss_table_data(compute_ctm_cached(key)))
+
+
+@cached(maxsize=256)
+def loss_table_csv(key):
+    """Memoized CSV export of ``loss_table`` for a ``params_key`` tuple."""
+    return loss_table(key).to_csv(index=False)
+
+
+@cached(maxsize=64)
+def iv_curve_table(key, points=100, cell_voc=None, ideality=None, front_ribbons=None):
+    """Memoized module I-V and P-V curve for a ``params_key`` tuple and the template cell constants."""
+    import pandas as pd
+
+    params = dict(zip(INPUT_COLUMNS, key))
+    voltage, current = iv_curve(
+        compute_ctm_cached(key, cell_voc, ideality, front_ribbons)["module_pmax"], params["cell_power"], params["num_cells"],
+        params["cell_length"], params["cell_width"], params["num_busbars"], params["ribbon_width"],
+        params["ribbon_thickness"], points, CELL_VOC if cell_voc is None else cell_voc,
+        IDEALITY if ideality is None else ideality, 1.0 if front_ribbons is None else front_ribbons)
+    return pd.DataFrame({"Voltage (V)": voltage, "Current (A)": current, "Power (W)": voltage * current})
@@ -0,0 +1,342 @@
+"""Technology and module-format templates (TOPCon, PERC, HJT, IBC, shingled, bifacial).
+
+Each template is a JSON file in ``ctm/technologies``. It holds:
+- default inputs for every model input;
+- the validated range, step and help text of each input;
+- the cell's reference Voc and diode ideality for the I-V model, and its
+  Pmax temperature coefficient for the yield engine;
+- whether the cells carry front ribbons (``front_ribbons``; false for
+  back-contact and shingled cells, which drops the ribbon shading and
+  resistance) and the module ``layout`` (``LAYOUTS``);
+- the bifaciality and the module length;
+- the parameters of its EQE curve.
+
+The expensive sub-models are precomputed into a ``<key>.npz`` next to it:
+- the EQE on the ``ctm.spectral`` wavelength grid;
+- the view-factor tables behind the bifacial rear-side gain.
+The app and the CLI only read these files. A template is loaded the first
+time it is selected and then cached for the life of the process.
+``ctm templates --build`` regenerates the tables after a template changes.
+
+    ctm templates
+    ctm templates --build hjt-132
+
+Rear irradiance comes from a 2-D model of infinite rows at
+``GROUND_COVERAGE_RATIO``. Rays are cast from the front and rear surfaces of
+a row to the sky, the ground and the neighbouring rows. The ground is lit by
+the sky it sees between rows and by the sun it receives between the row
+shadows. The sun is averaged over ``SUN_ELEVATIONS`` in the plane across the
+rows. The tables hold the coefficients, per tilt and clearance, that give
+front and rear irradiance from the diffuse and beam shares of the global
+horizontal. Albedo and diffuse fraction are applied at lookup.
+"""
+import argparse
+import json
+import os
+import sys
+
+from ctm.cache import cached
+from ctm.model import BUSBAR_OPTIONS, INPUT_COLUMNS
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "technologies")
+DEFAULT_TEMPLATE = "topcon-144"
+
+# Cell constants every template defines: Voc (V), ideality and the Pmax temperature coefficient (%/°C)
+CELL_FIELDS = ("voc", "ideality", "temperature_coefficient")
+
+# Cell layouts: half-cut cells in ribbon strings, drawn by ``ctm.layout``, or overlapping shingled strips
+LAYOUTS = ("half-cut", "shingled")
+
+# Inputs the sidebar shows as sliders; the rest are number inputs
+SLIDER_INPUTS = ("glass_transmission", "encapsulant_transmission", "cell_binning_tolerance", "junction_box_loss")
+
+# Ground-mounted rows: ground coverage ratio and the table grid
+GROUND_COVERAGE_RATIO = 0.4
+TABLE_TILTS = tuple(float(tilt) for tilt in range(0, 61, 5))  # degrees
+TABLE_CLEARANCES = tuple(0.5 + 0.25 * i for i in range(9))  # m, ground to module centre
+SUN_ELEVATIONS = tuple(float(elevation) for elevation in range(15, 90, 10))  # degrees, on the front side
+
+DEFAULT_ALBEDO = 0.25
+DEFAULT_TILT = 25.0
+DEFAULT_CLEARANCE = 1.0
+DEFAULT_DIFFUSE_FRACTION = 0.3
+
+# Ray-casting resolution used by ``build_tables``
+SURFACE_POINTS = 24
+GROUND_POINTS = 200
+VIEW_RAYS = 720
+NEIGHBOUR_ROWS = 8
+
+FACTOR_NAMES = (
+    "front_sky", "front_ground_diffuse", "front_ground_direct", "front_direct",
+    "rear_sky", "rear_ground_diffuse", "rear_ground_direct",
+)
+
+
+def _path(key, extension):
+    return os.path.join(TEMPLATE_DIR, f"{key}.{extension}")
+
+
+@cached(maxsize=None)
+def template_names():
+    """``{key: display name}`` of every template on disk, default first."""
+    keys = sorted(name[:-5] for name in os.listdir(TEMPLATE_DIR) if name.endswith(".json"))
+    keys.sort(key=lambda key: key != DEFAULT_TEMPLATE)
+    return {key: load_template(key)["name"] for key in keys}
+
+
+def validate_template(key, template):
+    """Raise ``ValueError`` if a template misses an input, a cell constant, the front-ribbon flag or a known layout,
+    or its defaults fall outside its own ranges."""
+    params, ranges = template["params"], template["ranges"]
+    missing = [name for name in INPUT_COLUMNS if name not in params or name not in ranges]
+    if missing:
+        raise ValueError(f"template {key}: no default or range for {', '.join(missing)}")
+    unknown = set(params) - set(INPUT_COLUMNS)
+    if unknown:
+        raise ValueError(f"template {key}: unknown inputs {', '.join(sorted(unknown))}")
+    problems = out_of_range(template, params)
+    if problems:
+        raise ValueError(f"template {key}: defaults out of range: {'; '.join(problems)}")
+    missing = [name for name in CELL_FIELDS if name not in template["cell"]]
+    if missing:
+        raise ValueError(f"template {key}: no cell {', '.join(missing)}")
+    if not isinstance(template.get("front_ribbons"), bool):
+        raise ValueError(f"template {key}: front_ribbons must be true or false")
+    if template.get("layout") not in LAYOUTS:
+        raise ValueError(f"template {key}: layout must be one of {', '.join(LAYOUTS)}")
+
+
+@cached(maxsize=None)
+def load_template(key):
+    """The template ``key`` as a dict, read from disk once per process. Callers must not mutate it."""
+    path = _path(key, "json")
+    if not os.path.exists(path):
+        raise ValueError(f"unknown template {key!r}")
+    with open(path) as f:
+        template = json.load(f)
+    template["key"] = key
+    validate_template(key, template)
+    return template
+
+
+def out_of_range(template, params):
+    """Messages for each input in ``params`` outside the template's validated range."""
+    problems = []
+    for name, value in params.items():
+        limits = template["ranges"].get(name)
+        if name == "num_busbars":
+            options = limits or BUSBAR_OPTIONS
+            if value not in options:
+                problems.append(f"{name}={value:g} not one of {', '.join(str(option) for option in options)}")
+        elif limits is not None and not limits[0] <= value <= limits[1]:
+            problems.append(f"{name}={value:g} outside {limits[0]:g}-{limits[1]:g}")
+    return problems
+
+
+def electrical(template):
+    """Keyword overrides for ``compute_ctm`` and the I-V model: the template cell's Voc and ideality, and 0 for
+    ``front_ribbons`` when its cells have none."""
+    return {"cell_voc": template["cell"]["voc"], "ideality": template["cell"]["ideality"],
+            "front_ribbons": 1.0 if template["front_ribbons"] else 0.0}
+
+
+@cached(maxsize=32)
+def template_tables(key):
+    """Precomputed lookup tables of ``key`` as read-only arrays, loaded from its ``.npz`` on first use."""
+    import numpy as np
+
+    path = _path(key, "npz")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"no lookup tables for template {key!r}; run `ctm templates --build {key}`")
+    with np.load(path) as data:
+        tables = {name: data[name] for name in data.files}
+    for array in tables.values():
+        array.setflags(write=False)
+    return tables
+
+
+def template_eqe(key):
+    """The template cell's EQE on ``ctm.spectral.WAVELENGTHS``."""
+    return template_tables(key)["eqe"]
+
+
+def _interpolate(table, tilt, clearance):
+    import numpy as np
+
+    tilts, clearances = np.asarray(TABLE_TILTS), np.asarray(TABLE_CLEARANCES)
+    i = np.clip(np.searchsorted(tilts, tilt) - 1, 0, len(tilts) - 2)
+    j = np.clip(np.searchsorted(clearances, clearance) - 1, 0, len(clearances) - 2)
+    u = np.clip((tilt - tilts[i]) / (tilts[i + 1] - tilts[i]), 0, 1)
+    v = np.clip((clearance - clearances[j]) / (clearances[j + 1] - clearances[j]), 0, 1)
+    return ((1 - u) * (1 - v) * table[i, j] + u * (1 - v) * table[i + 1, j]
+            + (1 - u) * v * table[i, j + 1] + u * v * table[i + 1, j + 1])
+
+
+def irradiance_factors(key, albedo=DEFAULT_ALBEDO, tilt=DEFAULT_TILT, clearance=DEFAULT_CLEARANCE,
+                       diffuse_fraction=DEFAULT_DIFFUSE_FRACTION):
+    """Front and rear plane irradiance per unit global horizontal irradiance; returns ``(front, rear)``."""
+    tables = template_tables(key)
+    factor = {name: float(_interpolate(tables[name], tilt, clearance)) for name in FACTOR_NAMES}
+    beam = 1 - diffuse_fraction
+    sides = []
+    for side in ("front", "rear"):
+        value = (diffuse_fraction * (factor[f"{side}_sky"] + albedo * factor[f"{side}_ground_diffuse"])
+                 + beam * albedo * factor[f"{side}_ground_direct"])
+        sides.append(value + (beam * factor["front_direct"] if side == "front" else 0.0))
+    return tuple(sides)
+
+
+def bifacial_gain(key, albedo=DEFAULT_ALBEDO, tilt=DEFAULT_TILT, clearance=DEFAULT_CLEARANCE,
+                  diffuse_fraction=DEFAULT_DIFFUSE_FRACTION):
+    """Energy gain (%) from the rear side: bifaciality x rear/front irradiance; 0 for monofacial templates."""
+    bifaciality = load_template(key)["bifaciality"]
+    if not bifaciality:
+        return 0.0
+    front, rear = irradiance_factors(key, albedo, tilt, clearance, diffuse_fraction)
+    return bifaciality * rear / front * 100
+
+
+# ---------------------------------------------------------------- table building
+
+def _first_row_hit(np, origins, directions, tilt, clearance, length, pitch, skip_own):
+    """Distance along each ray to the first module row, ``inf`` if none; rays are ``(..., 2)`` arrays."""
+    along = np.array([np.cos(tilt), np.sin(tilt)])
+    nearest = np.full(origins.shape[:-1], np.inf)
+    ox, oy = origins[..., 0], origins[..., 1]
+    dx, dy = directions[..., 0], directions[..., 1]
+    for k in range(-NEIGHBOUR_ROWS, NEIGHBOUR_ROWS + 1):
+        if skip_own and k == 0:
+            continue
+        # Solve origin + t * direction = centre + s * along for t > 0 and |s| <= length / 2
+        cx, cy = k * pitch - ox, clearance - oy
+        det = dx * -along[1] + along[0] * dy
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = (cx * -along[1] + along[0] * cy) / det
+            s = (dx * cy - dy * cx) / det
+        hit = (np.abs(det) > 1e-12) & (t > 1e-9) & (np.abs(s) <= length / 2)
+        nearest = np.where(hit & (t < nearest), t, nearest)
+    return nearest
+
+
+def _ground_light(np, tilt, clearance, length, pitch, ground_x):
+    """Sky view factor and beam-weighted sunlit fraction of ground points across one row pitch."""
+    angles = (np.arange(VIEW_RAYS // 2) + 0.5) * np.pi / (VIEW_RAYS // 2)
+    origins = np.stack([ground_x, np.zeros_like(ground_x)], axis=-1)[:, np.newaxis, :]
+    directions = np.stack([np.cos(angles), np.sin(angles)], axis=-1)[np.newaxis, :, :]
+    origins, directions = np.broadcast_arrays(origins, directions)
+    open_sky = np.isinf(_first_row_hit(np, origins, directions, tilt, clearance, length, pitch, False))
+    sky = (open_sky * 0.5 * np.sin(angles) * np.pi / len(angles)).sum(axis=1)
+
+    elevations = np.radians(SUN_ELEVATIONS)
+    sun = np.stack([-np.cos(elevations), np.sin(elevations)], axis=-1)[np.newaxis, :, :]
+    origins, sun = np.broadcast_arrays(origins[:, :1, :], sun)
+    sunlit = np.isinf(_first_row_hit(np, origins, sun, tilt, clearance, length, pitch, False))
+    # Beam on the horizontal grows with sin(elevation)
+    weights = np.sin(elevations) / np.sin(elevations).sum()
+    return sky, sunlit @ weights
+
+
+def _surface_factors(np, tilt, clearance, length, pitch, normal, ground_x, ground_sky, ground_sunlit):
+    """Sky, ground-diffuse and ground-direct view factors of one face of the centre row."""
+    along = np.array([np.cos(tilt), np.sin(tilt)])
+    positions = ((np.arange(SURFACE_POINTS) + 0.5) / SURFACE_POINTS - 0.5) * length
+    origins = np.array([0.0, clearance]) + positions[:, np.newaxis] * along
+    angles = (np.arange(VIEW_RAYS) + 0.5) * np.pi / VIEW_RAYS - np.pi / 2
+    directions = np.cos(angles)[:, np.newaxis] * normal + np.sin(angles)[:, np.newaxis] * along
+    weights = 0.5 * np.cos(angles) * np.pi / VIEW_RAYS
+
+    origins, directions = np.broadcast_arrays(origins[:, np.newaxis, :], directions[np.newaxis, :, :])
+    row_distance = _first_row_hit(np, origins, directions, tilt, clearance, length, pitch, True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ground_distance = np.where(directions[..., 1] < 0, -origins[..., 1] / directions[..., 1], np.inf)
+    to_ground = ground_distance < row_distance
+    to_sky = np.isinf(row_distance) & (directions[..., 1] > 0)
+    hit_x = np.mod(np.where(to_ground, origins[..., 0] + ground_distance * directions[..., 0], 0.0), pitch)
+    period = np.concatenate([ground_x, ground_x[:1] + pitch])
+    sky_seen = np.interp(hit_x, period, np.concatenate([ground_sky, ground_sky[:1]])) * to_ground
+    sun_seen = np.interp(hit_x, period, np.concatenate([ground_sunlit, ground_sunlit[:1]])) * to_ground
+    return ((to_sky * weights).sum(axis=1).mean(), (sky_seen * weights).sum(axis=1).mean(),
+            (sun_seen * weights).sum(axis=1).mean())
+
+
+def _front_direct(np, tilt, clearance, length, pitch, normal):
+    """Beam on the front face per unit beam horizontal, with row-to-row shading, over ``SUN_ELEVATIONS``."""
+    along = np.array([np.cos(tilt), np.sin(tilt)])
+    positions = ((np.arange(SURFACE_POINTS) + 0.5) / SURFACE_POINTS - 0.5) * length
+    origins = np.array([0.0, clearance]) + positions[:, np.newaxis] * along
+    elevations = np.radians(SUN_ELEVATIONS)
+    sun = np.stack([-np.cos(elevations), np.sin(elevations)], axis=-1)
+    origins_b, sun_b = np.broadcast_arrays(origins[:, np.newaxis, :], sun[np.newaxis, :, :])
+    lit = np.isinf(_first_row_hit(np, origins_b, sun_b, tilt, clearance, length, pitch, True)).mean(axis=0)
+    incidence = np.maximum(sun @ normal, 0)
+    weights = np.sin(elevations) / np.sin(elevations).sum()
+    return float((lit * incidence / np.sin(elevations)) @ weights)
+
+
+def view_factor_tables(module_length):
+    """The ``FACTOR_NAMES`` tables, each ``(tilts, clearances)``, for modules ``module_length`` m up the slope."""
+    import numpy as np
+
+    pitch = module_length / GROUND_COVERAGE_RATIO
+    ground_x = (np.arange(GROUND_POINTS) + 0.5) / GROUND_POINTS * pitch
+    tables = {name: np.empty((len(TABLE_TILTS), len(TABLE_CLEARANCES))) for name in FACTOR_NAMES}
+    for i, tilt_degrees in enumerate(TABLE_TILTS):
+        tilt = np.radians(tilt_degrees)
+        # The front faces the sun, towards -x; the rear faces the ground behind
+        front = np.array([-np.sin(tilt), np.cos(tilt)])
+        for j, clearance in enumerate(TABLE_CLEARANCES):
+            ground_sky, ground_sunlit = _ground_light(np, tilt, clearance, module_length, pitch, ground_x)
+            for side, normal in (("front", front), ("rear", -front)):
+                factors = _surface_factors(np, tilt, clearance, module_length, pitch, normal, ground_x,
+                                           ground_sky, ground_sunlit)
+                for name, value in zip(("sky", "ground_diffuse", "ground_direct"), factors):
+                    tables[f"{side}_{name}"][i, j] = value
+            tables["front_direct"][i, j] = _front_direct(np, tilt, clearance, module_length, pitch, front)
+    return tables
+
+
+def build_tables(key):
+    """Compute and write the lookup tables of template ``key``; returns the ``.npz`` path."""
+    import numpy as np
+
+    from ctm.spectral import WAVELENGTHS, _logistic
+
+    template = load_template(key)
+    plateau, blue_edge, blue_width, infrared_edge, infrared_width = template["eqe"]
+    eqe = plateau * _logistic(blue_edge, blue_width) / (1 + np.exp((WAVELENGTHS - infrared_edge) / infrared_width))
+    tables = view_factor_tables(template["module_length"])
+    path = _path(key, "npz")
+    np.savez_compressed(path, eqe=eqe, tilts=np.asarray(TABLE_TILTS), clearances=np.asarray(TABLE_CLEARANCES),
+                        **tables)
+    template_tables.cache_clear()
+    return path
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="ctm templates", description="List technology templates or rebuild their "
+                                                                        "lookup tables.")
+    parser.add_argument("--build", nargs="*", metavar="KEY", help="rebuild the tables of these templates (all if none)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        names = template_names()
+        if args.build is None:
+            for key, name in names.items():
+                template = load_template(key)
+                tables = "tables" if os.path.exists(_path(key, "npz")) else "no tables"
+                print(f"{key:22} {name} (bifaciality {template['bifaciality']:.2f}, {tables})")
+            return 0
+        for key in args.build or names:
+            print(f"Wrote {build_tables(key)}")
+    except (OSError, KeyError, ValueError) as error:
+        print(f"ctm templates: {error}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""Opt-in per-stage timing for app reruns and the model's STEP 1-10.
+
+Timing is off unless ``CTM_TIMING=1`` is set (or the app is opened with
+``?diagnostics=1``). When off, ``start_run`` hands back a shared timer whose
+methods do nothing, so the marks left in the hot path cost one no-op call each.
+
+When on, every rerun records the wall time between consecutive ``mark``
+calls. Model evaluations on the same thread also record each STEP. Samples
+feed a per-session window and a process-wide window for percentiles, and are
+optionally written to local sinks:
+
+    CTM_TIMING_JSONL=/var/log/ctm/timing.jsonl   one JSON line per rerun
+    CTM_TIMING_PROM=/var/lib/node_exporter/ctm.prom
+        Prometheus text format, rewritten after each rerun for the
+        node_exporter textfile collector
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+ENABLED = os.environ.get("CTM_TIMING", "") not in ("", "0")
+JSONL_PATH = os.environ.get("CTM_TIMING_JSONL")
+PROM_PATH = os.environ.get("CTM_TIMING_PROM")
+
+# Samples kept per stage for percentiles, per session and process-wide
+WINDOW = 500
+QUANTILES = (0.5, 0.9, 0.99)
+
+_local = threading.local()
+_lock = threading.Lock()
+_aggregate = defaultdict(lambda: deque(maxlen=WINDOW))
+_totals = defaultdict(lambda: [0, 0.0])
+
+
+def _noop(name):
+    pass
+
+
+class _NullTimer:
+    enabled = False
+    stages = {}
+
+    def mark(self, name):
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+class Timer:
+    """Wall time between consecutive marks of one rerun, keyed by stage name."""
+
+    enabled = True
+
+    def __init__(self):
+        self.stages = {}
+        self.started = time.time()
+        self._last = time.perf_counter()
+
+    def mark(self, name):
+        """Charge the time since the previous mark (or the start) to ``name``."""
+        now = time.perf_counter()
+        self.stages[name] = self.stages.get(name, 0.0) + now - self._last
+        self._last = now
+
+    def step_lap(self):
+        """Return a lap function for one model evaluation, charging time to ``model: <step>``."""
+        last = [time.perf_counter()]
+
+        def lap(name):
+            now = time.perf_counter()
+            key = f"model: {name}"
+            self.stages[key] = self.stages.get(key, 0.0) + now - last[0]
+            last[0] = now
+        return lap
+
+
+def start_run(enabled=None):
+    """Begin timing a rerun on this thread; returns ``NULL_TIMER`` when timing is off."""
+    if not (ENABLED if enabled is None else enabled):
+        _local.timer = None
+        return NULL_TIMER
+    _local.timer = timer = Timer()
+    return timer
+
+
+def step_lap():
+    """Lap function for the STEP marks in ``ctm.model``; a no-op unless this thread is timing."""
+    timer = getattr(_local, "timer", None)
+    return _noop if timer is None else timer.step_lap()
+
+
+def finish(timer, session=None, session_id=None):
+    """Record a finished rerun in the session and process-wide windows and write the sinks.
+
+    ``session`` is a mutable mapping owned by the caller (e.g. Streamlit's
+    ``session_state``) that keeps this session's samples across reruns.
+    """
+    _local.timer = None
+    if not timer.enabled:
+        return
+    stages = dict(timer.stages)
+    stages["total"] = sum(value for name, value in stages.items() if not name.startswith("model: "))
+
+    if session is not None:
+        samples = session.setdefault("_ctm_timing", {})
+        for name, value in stages.items():
+            samples.setdefault(name, deque(maxlen=WINDOW)).append(value)
+
+    with _lock:
+        for name, value in stages.items():
+            _aggregate[name].append(value)
+            _totals[name][0] += 1
+            _totals[name][1] += value
+        if PROM_PATH:
+            _write_prometheus(PROM_PATH)
+    if JSONL_PATH:
+        record = {"ts": timer.started, "session": session_id, "stages": stages}
+        with open(JSONL_PATH, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+def _quantile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def percentiles(samples):
+    """``{stage: {"count", "mean", "p50", "p90", "p99"}}`` in seconds for a samples mapping."""
+    summary = {}
+    for name, values in samples.items():
+        ordered = sorted(values)
+        if not ordered:
+            continue
+        row = {"count": len(ordered), "mean": sum(ordered) / len(ordered)}
+        for q in QUANTILES:
+            row[f"p{int(q * 100)}"] = _quantile(ordered, q)
+        summary[name] = row
+    return summary
+
+
+def aggregate_percentiles():
+    """Process-wide percentiles over the last ``WINDOW`` reruns of every session."""
+    with _lock:
+        snapshot = {name: list(values) for name, values in _aggregate.items()}
+    return percentiles(snapshot)
+
+
+def _write_prometheus(path):
+    lines = [
+        "# HELP ctm_stage_seconds Wall time of each app stage per rerun.",
+        "# TYPE ctm_stage_seconds summary",
+    ]
+    for name, values in sorted(_aggregate.items()):
+        ordered = sorted(values)
+        label = name.replace("\\", "\\\\").replace('"', '\\"')
+        for q in QUANTILES:
+            lines.append(f'ctm_stage_seconds{{stage="{label}",quantile="{q}"}} {_quantile(ordered, q):.6f}')
+        count, total = _totals[name]
+        lines.append(f'ctm_stage_seconds_sum{{stage="{label}"}} {total:.6f}')
+        lines.append(f'ctm_stage_seconds_count{{stage="{label}"}} {count}')
+    # Replace atomically so a scrape never sees a half-written file
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(temporary, path)
@@ -0,0 +1,5 @@
+"""Streamlit views for the non-default app modes.
+
+These modules import streamlit at load time and are only imported by
+``streamlit_app.py`` when the corresponding mode is selected.
+"""
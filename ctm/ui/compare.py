@@ -0,0 +1,108 @@
+"""Compare mode: a workspace of named configurations shown side by side."""
+import streamlit as st
+
+from ctm.compare import (
+    BREAKDOWN_LABELS,
+    SUMMARY_COLUMNS,
+    add_configuration,
+    comparison_frame,
+    delta_frame,
+    new_workspace,
+    read_workspace,
+    workspace_keys,
+)
+from ctm.model import BUSBAR_OPTIONS, INPUT_COLUMNS
+from ctm.sweep import SWEEP_PARAMS
+from ctm.technology import electrical
+
+# The saved workspace and a version that re-seeds the editor when rows are added outside it
+WORKSPACE_KEY = "compare_workspace"
+EDITOR_VERSION_KEY = "compare_editor_version"
+
+
+def _replace_workspace(workspace):
+    st.session_state[WORKSPACE_KEY] = workspace
+    st.session_state[EDITOR_VERSION_KEY] = st.session_state.get(EDITOR_VERSION_KEY, 0) + 1
+
+
+def _column_config():
+    config = {"name": st.column_config.TextColumn("Name", required=True)}
+    for name in INPUT_COLUMNS:
+        label = SWEEP_PARAMS[name][0]
+        if name == "num_busbars":
+            config[name] = st.column_config.SelectboxColumn(label, options=[float(n) for n in BUSBAR_OPTIONS], required=True)
+        else:
+            config[name] = st.column_config.NumberColumn(label, required=True)
+    return config
+
+
+def render(base_params, template):
+    st.markdown("## Configuration Comparison")
+    st.caption(
+        "Save the sidebar configuration under a name, or upload a CSV with a name column and any model inputs. "
+        "Edit values in the table; only edited configurations are recomputed."
+    )
+
+    if WORKSPACE_KEY not in st.session_state:
+        st.session_state[WORKSPACE_KEY] = new_workspace()
+
+    col_name, col_save = st.columns([3, 1], vertical_alignment="bottom")
+    name = col_name.text_input("Configuration name", value=f"Config {len(st.session_state[WORKSPACE_KEY]) + 1}")
+    if col_save.button("Save Sidebar Configuration", use_container_width=True) and name.strip():
+        _replace_workspace(add_configuration(st.session_state.get("compare_edited", st.session_state[WORKSPACE_KEY]),
+                                             name.strip(), base_params))
+
+    uploaded = st.file_uploader("Import configurations", type=["csv"])
+    if uploaded is not None and st.session_state.get("compare_imported") != uploaded.file_id:
+        try:
+            _replace_workspace(read_workspace(uploaded, template["params"]))
+            st.session_state["compare_imported"] = uploaded.file_id
+        except ValueError as error:
+            st.error(f"Could not import configurations: {error}")
+
+    _workspace_view(electrical(template))
+
+
+@st.fragment
+def _workspace_view(cell):
+    # Runs as a fragment, so table edits and baseline changes rerun only this view
+    workspace = st.session_state[WORKSPACE_KEY]
+    edited = st.data_editor(
+        workspace,
+        num_rows="dynamic",
+        use_container_width=True,
+        hide_index=True,
+        column_config=_column_config(),
+        key=f"compare_editor_{st.session_state.get(EDITOR_VERSION_KEY, 0)}",
+    )
+    st.session_state["compare_edited"] = edited
+
+    entries = workspace_keys(edited)
+    names = [name for name, _ in entries]
+    if len(set(names)) != len(names):
+        st.warning("Configuration names must be unique.")
+        return
+    if not entries:
+        st.info("No configurations saved yet.")
+        return
+
+    st.download_button("Download Configurations (CSV)", edited.to_csv(index=False), file_name="CTM_Configurations.csv",
+                       mime="text/csv", use_container_width=True)
+
+    frame = comparison_frame(entries, **cell)
+    baseline = st.selectbox("Baseline", names)
+
+    st.markdown("### Loss Breakdown (%)")
+    st.dataframe(frame.round(3), use_container_width=True)
+
+    st.markdown("### Loss Stack")
+    st.bar_chart(frame[list(BREAKDOWN_LABELS.values())], horizontal=len(entries) > 12,
+                 height=max(400, 18 * len(entries)) if len(entries) > 12 else 400)
+
+    st.markdown(f"### Delta vs {baseline}")
+    deltas = delta_frame(frame, baseline)
+    st.dataframe(deltas.round(3), use_container_width=True)
+    st.bar_chart(deltas[[SUMMARY_COLUMNS["total_ctm_loss"], SUMMARY_COLUMNS["module_pmax"]]], stack=False,
+                 horizontal=len(entries) > 12)
+    st.download_button("Download Comparison (CSV)", frame.join(deltas, rsuffix=" Delta").to_csv(),
+                       file_name="CTM_Comparison.csv", mime="text/csv", use_container_width=True)
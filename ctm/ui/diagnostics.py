@@ -0,0 +1,26 @@
+"""Diagnostics panel: per-stage rerun timings, shown only when timing is on."""
+import pandas as pd
+import streamlit as st
+
+from ctm import timing
+
+
+def _percentile_table(summary):
+    rows = [
+        {"Stage": name, "Reruns": row["count"], "Mean (ms)": row["mean"] * 1e3,
+         "p50 (ms)": row["p50"] * 1e3, "p90 (ms)": row["p90"] * 1e3, "p99 (ms)": row["p99"] * 1e3}
+        for name, row in summary.items()
+    ]
+    return pd.DataFrame(rows).round(3)
+
+
+def render(session_samples):
+    with st.sidebar.expander("Diagnostics"):
+        st.caption("Stage timings of earlier reruns; the current rerun is recorded once it finishes.")
+        if not session_samples:
+            st.caption("No reruns recorded yet.")
+            return
+        st.markdown("**This session**")
+        st.dataframe(_percentile_table(timing.percentiles(session_samples)), hide_index=True)
+        st.markdown("**All sessions**")
+        st.dataframe(_percentile_table(timing.aggregate_percentiles()), hide_index=True)
@@ -0,0 +1,76 @@
+"""Energy Yield mode: time-series simulation from uploaded TMY/weather files."""
+import pandas as pd
+import streamlit as st
+
+from ctm.energy import CHUNK_ROWS, simulate_yield
+from ctm.model import compute_ctm_cached, params_key
+from ctm.technology import electrical
+
+
+def render(base_params, template):
+    st.markdown("## Time-Series Energy Yield")
+    st.caption(
+        "Weather file columns: plane-of-array irradiance (poa_global / G(i) / ghi, W/m²), air temperature "
+        "(temp_air / T2m, °C), optional wind_speed, timestamp and site. Hourly or 1-minute steps; one site per file."
+    )
+
+    weather_files = st.file_uploader("Weather data", type=["csv", "parquet"], accept_multiple_files=True)
+    col1, col2, col3 = st.columns(3)
+    # Keyed per template so switching templates loads that technology's coefficient
+    temperature_coefficient = col1.number_input("Pmax Temperature Coefficient (%/°C)", min_value=-0.6, max_value=0.0,
+                                                value=template["cell"]["temperature_coefficient"], step=0.01,
+                                                key=f"{template['key']}.temperature_coefficient")
+    timestep_minutes = col2.number_input("Timestep (min, 0 = from timestamps)", min_value=0, max_value=60, value=0, step=1)
+    chunk_rows = col3.number_input("Rows per chunk", min_value=10_000, max_value=5_000_000, value=CHUNK_ROWS, step=50_000)
+
+    if not weather_files or not st.button("Simulate Yield", use_container_width=True):
+        return
+
+    status = st.empty()
+    processed = [0]
+
+    def on_chunk(rows, aggregator):
+        processed[0] += rows
+        status.info(f"Processed {processed[0]:,} timesteps...")
+
+    cell = electrical(template)
+    try:
+        aggregator = simulate_yield(weather_files, base_params, int(chunk_rows),
+                                    timestep_minutes / 60 if timestep_minutes else None,
+                                    temperature_coefficient, on_chunk=on_chunk, cell=cell)
+    except (ValueError, KeyError) as error:
+        status.error(f"Could not simulate yield: {error}")
+        return
+    status.success(f"Simulated {processed[0]:,} timesteps")
+
+    result = compute_ctm_cached(params_key(base_params), **cell)
+    summary = aggregator.summary(result)
+    if summary.empty:
+        return
+
+    col_m1, col_m2, col_m3, col_m4 = st.columns(4)
+    col_m1.metric("Mean Annual Energy", f"{summary['energy'].mean():.0f} kWh/year")
+    col_m2.metric("Specific Yield", f"{summary['specific_yield'].mean():.0f} kWh/kWp")
+    col_m3.metric("Performance Ratio", f"{summary['performance_ratio'].mean() * 100:.1f}%")
+    col_m4.metric("Static Estimate", f"{result['annual_energy_total']:.0f} kWh/year",
+                  help="module_pmax x annual irradiance from the sidebar")
+
+    st.markdown("### Per Site and Year")
+    st.dataframe(summary.round(3), use_container_width=True, hide_index=True)
+
+    st.markdown("### Loss Attribution")
+    attribution = aggregator.attribution(result)
+    st.dataframe(attribution.round(3), use_container_width=True, hide_index=True)
+
+    st.markdown("### Monthly Energy")
+    monthly = pd.DataFrame(
+        {f"{site} {year}": aggregator.monthly(site, year, result) for site, year in zip(summary["site"], summary["year"])},
+        index=pd.Index(range(1, 13), name="Month"),
+    )
+    st.line_chart(monthly)
+
+    col_download1, col_download2 = st.columns(2)
+    col_download1.download_button("Download Yield Summary (CSV)", summary.to_csv(index=False),
+                                  file_name="CTM_Yield_Summary.csv", mime="text/csv", use_container_width=True)
+    col_download2.download_button("Download Loss Attribution (CSV)", attribution.to_csv(index=False),
+                                  file_name="CTM_Yield_Attribution.csv", mime="text/csv", use_container_width=True)
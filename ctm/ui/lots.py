@@ -0,0 +1,74 @@
+"""Lot Analysis mode: measured vs modeled CTM for uploaded production flash data."""
+import os
+import tempfile
+
+import pandas as pd
+import streamlit as st
+
+from ctm.lots import CHUNK_ROWS, analyze_lot
+from ctm.technology import electrical
+
+
+def render(base_params, template):
+    st.markdown("## Production Lot Analysis")
+    st.caption(
+        "Module file: module_id, module_pmax (optional: module_voc, module_isc, shift, bom, cell_power_total). "
+        "Cell file: module_id, cell_pmax. Model inputs not present as columns are taken from the sidebar."
+    )
+
+    col_modules, col_cells = st.columns(2)
+    module_file = col_modules.file_uploader("Module flash data", type=["csv", "parquet"])
+    cell_file = col_cells.file_uploader("Cell flash data (optional)", type=["csv", "parquet"])
+    chunk_rows = st.number_input("Rows per chunk", min_value=10_000, max_value=5_000_000, value=CHUNK_ROWS, step=50_000)
+    keep_results = st.checkbox("Prepare per-module results for download")
+
+    if module_file is None or not st.button("Analyze Lot", use_container_width=True):
+        return
+
+    status = st.empty()
+    summary_placeholder = st.empty()
+    processed = [0]
+
+    def on_chunk(results, aggregator):
+        processed[0] += len(results)
+        status.info(f"Processed {processed[0]:,} modules...")
+        summary_placeholder.dataframe(aggregator.summary(), use_container_width=True, hide_index=True)
+
+    output_path = None
+    if keep_results:
+        handle, output_path = tempfile.mkstemp(suffix=".csv")
+        os.close(handle)
+
+    try:
+        aggregator = analyze_lot(module_file, cell_file, base_params, output_path, int(chunk_rows), on_chunk=on_chunk,
+                                 cell=electrical(template))
+    except (ValueError, KeyError) as error:
+        status.error(f"Could not analyze lot: {error}")
+        return
+
+    if aggregator.dropped:
+        status.warning(f"Analyzed {processed[0]:,} modules; dropped {aggregator.dropped:,} without matching cell data "
+                       "or with a non-finite or non-positive cell power total")
+    else:
+        status.success(f"Analyzed {processed[0]:,} modules")
+    summary = aggregator.summary()
+    summary_placeholder.dataframe(summary, use_container_width=True, hide_index=True)
+
+    if processed[0]:
+        centers, counts = aggregator.histogram()
+        nonzero = counts.nonzero()[0]
+        window = slice(nonzero.min(), nonzero.max() + 1)
+        st.markdown("### Measured CTM Loss Distribution")
+        st.bar_chart(pd.DataFrame({"Modules": counts[window]}, index=pd.Index(centers[window].round(3), name="CTM Loss (%)")))
+
+    col_download1, col_download2 = st.columns(2)
+    with col_download1:
+        st.download_button("Download Lot Summary (CSV)", summary.to_csv(index=False), file_name="CTM_Lot_Summary.csv",
+                           mime="text/csv", use_container_width=True)
+    if output_path is not None:
+        with open(output_path, "rb") as f:
+            data = f.read()
+        os.remove(output_path)
+        with col_download2:
+            st.download_button("Download Module Results (CSV)", data, file_name="CTM_Lot_Results.csv",
+                               mime="text/csv", use_container_width=True)
@@ -0,0 +1,84 @@
+"""Mismatch Monte Carlo mode: binning-driven mismatch loss distribution."""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from ctm.mismatch import simulate_mismatch, summarize
+from ctm.model import compute_ctm_point
+from ctm.technology import electrical
+
+
+def _flash_values(uploaded):
+    df = pd.read_csv(uploaded)
+    numeric = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
+    if not numeric:
+        st.error("The flash-test file has no numeric columns.")
+        return None
+    column = st.selectbox("Cell power / current column", numeric)
+    values = df[column].dropna().to_numpy(dtype=np.float64)
+    values = values[values > 0]
+    st.caption(f"{len(values):,} cells, spread ±{(values.max() - values.min()) / 2 / values.mean() * 100:.2f}%")
+    return values
+
+
+def render(base_params, template):
+    st.markdown("## Mismatch Monte Carlo")
+    st.caption("Samples per-cell currents for the half-cut layout (parallel halves, 3 bypass diodes) and reports the electrical mismatch loss distribution.")
+
+    col1, col2, col3, col4 = st.columns(4)
+    n_trials = col1.number_input("Trials", min_value=1_000, max_value=1_000_000, value=100_000, step=10_000)
+    seed = col2.number_input("Seed", min_value=0, value=0, step=1)
+    distribution = col3.selectbox("Within-bin distribution", ["uniform", "normal"])
+    workers = col4.number_input("Worker processes", min_value=1, max_value=64, value=1, step=1)
+
+    source = st.radio("Cell distribution source", ["Binning tolerance", "Flash-test CSV"], horizontal=True)
+    flash_values = None
+    if source == "Flash-test CSV":
+        uploaded = st.file_uploader("Cell flash-test data", type=["csv"])
+        if uploaded is None:
+            return
+        flash_values = _flash_values(uploaded)
+        if flash_values is None:
+            return
+    else:
+        st.caption(f"Binning tolerance ±{base_params['cell_binning_tolerance']:.1f}% from the sidebar.")
+
+    if not st.button("Run Simulation", use_container_width=True):
+        return
+
+    cell = electrical(template)
+    with st.spinner("Simulating..."):
+        losses = simulate_mismatch(
+            num_cells=int(base_params["num_cells"]),
+            tolerance=base_params["cell_binning_tolerance"],
+            n_trials=int(n_trials),
+            seed=int(seed),
+            distribution=distribution,
+            flash_values=flash_values,
+            workers=int(workers),
+            cell=cell,
+        )
+    stats = summarize(losses)
+    formula = compute_ctm_point(**base_params, **cell)
+
+    col_m1, col_m2, col_m3, col_m4 = st.columns(4)
+    col_m1.metric("Mean Mismatch", f"{stats['mean']:.3f}%")
+    col_m2.metric("P5", f"{stats['p5']:.3f}%")
+    col_m3.metric("P95", f"{stats['p95']:.3f}%")
+    col_m4.metric("Formula Mismatch", f"{formula['mismatch_loss']:.3f}%")
+
+    counts, edges = np.histogram(losses, bins=60)
+    centers = (edges[:-1] + edges[1:]) / 2
+    st.bar_chart(pd.DataFrame({"Trials": counts}, index=pd.Index(np.round(centers, 4), name="Mismatch Loss (%)")))
+
+    st.markdown("### Module Results with Monte Carlo Mismatch")
+    rows = []
+    for label, value in [("Mean", stats["mean"]), ("P5", stats["p5"]), ("P95", stats["p95"])]:
+        result = compute_ctm_point(mismatch_loss=value, **base_params, **cell)
+        rows.append({
+            "Case": label,
+            "Mismatch (%)": round(value, 4),
+            "Total CTM Loss (%)": round(result["total_ctm_loss"], 3),
+            "Module Pmax (Wp)": round(result["module_pmax"], 2),
+        })
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
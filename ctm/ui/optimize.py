@@ -0,0 +1,85 @@
+"""BOM Optimizer mode: cheapest option set for a target module power."""
+import math
+
+import pandas as pd
+import streamlit as st
+
+from ctm.model import compute_ctm_cached, params_key
+from ctm.optimize import DEFAULT_OPTION_COSTS, MAX_EXHAUSTIVE, optimize_bom
+from ctm.sweep import SWEEP_PARAMS
+from ctm.technology import electrical
+
+
+def _default_catalog():
+    rows = [
+        {"Parameter": name, "Option": float(option), "Cost": float(cost)}
+        for name, options in DEFAULT_OPTION_COSTS.items()
+        for option, cost in options.items()
+    ]
+    return pd.DataFrame(rows)
+
+
+def render(base_params, template):
+    st.markdown("## BOM Optimizer")
+    st.caption(
+        "Searches every combination of the option catalog below (or a population-based search for very large "
+        "catalogs) and returns the Pareto front of BOM cost against module power. Inputs not in the catalog "
+        "keep their sidebar values."
+    )
+
+    catalog = st.data_editor(
+        _default_catalog(),
+        num_rows="dynamic",
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Parameter": st.column_config.SelectboxColumn(options=list(DEFAULT_OPTION_COSTS), required=True),
+            "Option": st.column_config.NumberColumn(required=True),
+            "Cost": st.column_config.NumberColumn("Cost per module", format="%.2f", required=True),
+        },
+    )
+
+    cell = electrical(template)
+    current = compute_ctm_cached(params_key(base_params), **cell)
+    col1, col2, col3 = st.columns(3)
+    # Rounded down: rounding up could ask for more than the 2.5% loss cap lets any design reach
+    target_pmax = col1.number_input("Target Module Pmax (Wp)", min_value=0.0,
+                                    value=math.floor(current["module_pmax"] * 10) / 10, step=1.0)
+    max_ctm_loss = col2.number_input("Max CTM Loss (%)", min_value=0.0, max_value=100.0, value=2.5, step=0.1)
+    workers = col3.number_input("Worker processes", min_value=1, max_value=64, value=1, step=1)
+
+    if not st.button("Optimize", use_container_width=True):
+        return
+
+    option_costs = {}
+    for row in catalog.dropna().itertuples(index=False):
+        option_costs.setdefault(row.Parameter, {})[float(row.Option)] = float(row.Cost)
+
+    try:
+        with st.spinner("Searching..."):
+            front, evaluated = optimize_bom(base_params, option_costs, target_pmax, max_ctm_loss,
+                                            MAX_EXHAUSTIVE, int(workers), cell=cell)
+    except ValueError as error:
+        st.error(f"Could not optimize: {error}")
+        return
+
+    feasible = front[front["meets_target"]]
+    col_m1, col_m2, col_m3 = st.columns(3)
+    col_m1.metric("Designs Scored", f"{evaluated:,}")
+    col_m2.metric("Pareto Designs", f"{len(front):,}")
+    if feasible.empty:
+        col_m3.metric("Cheapest Meeting Target", "none")
+        st.warning("No design on the front meets the target. The CTM loss is bounded to 1-2.5%, so module Pmax "
+                   "is set by cell power and cell count; raise those in the sidebar.")
+    else:
+        best = feasible.iloc[0]
+        col_m3.metric("Cheapest Meeting Target", f"{best['cost']:.2f}", f"{best['module_pmax']:.1f} Wp")
+
+    st.markdown("### Cost vs Loss Stack")
+    st.scatter_chart(front, x="cost", y="stack_ctm_loss", color="meets_target")
+
+    labels = {name: label for name, (label, _, _) in SWEEP_PARAMS.items()}
+    st.markdown("### Pareto Front")
+    st.dataframe(front.rename(columns=labels).round(4), use_container_width=True, hide_index=True)
+    st.download_button("Download Pareto Front (CSV)", front.to_csv(index=False), file_name="CTM_BOM_Pareto.csv",
+                       mime="text/csv", use_container_width=True)
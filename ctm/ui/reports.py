@@ -0,0 +1,49 @@
+"""PDF report button shared by the app views.
+
+The report renders on the ``ctm.report`` process pool. Instead of waiting
+on the future, a small fragment checks it every ``POLL_INTERVAL`` and reruns
+only itself. The page reruns once when the PDF is ready. The session stays
+responsive while the PDF builds, and no script thread is held for the render.
+"""
+from datetime import datetime
+
+import streamlit as st
+
+from ctm.report import submit_report
+
+POLL_INTERVAL = 0.25  # seconds
+
+
+@st.fragment(run_every=POLL_INTERVAL)
+def _wait_for_report(future):
+    if future.done():
+        st.rerun()
+    st.caption("Generating report...")
+
+
+def report_button(payload, file_prefix, key):
+    """"Generate PDF Report" button, then a download button once the PDF for ``payload`` is ready.
+
+    A pending or finished report is dropped when ``payload`` changes, so the
+    download always matches the inputs on screen.
+    """
+    state_key = f"_report_{key}"
+    pending = st.session_state.get(state_key)
+    if pending is not None and pending[0] != payload:
+        pending = st.session_state[state_key] = None
+
+    if st.button("Generate PDF Report", use_container_width=True, key=f"{key}_generate"):
+        pending = st.session_state[state_key] = (payload, submit_report(payload))
+    if pending is None:
+        return
+
+    future = pending[1]
+    if not future.done():
+        _wait_for_report(future)
+        return
+    if future.exception() is not None:
+        st.error(f"Report failed: {future.exception()}")
+        return
+    st.download_button("Download PDF Report", future.result(),
+                       file_name=f"{file_prefix}_{datetime.now().strftime('%d%m%Y_%H%M%S')}.pdf",
+                       mime="application/pdf", use_container_width=True, key=f"{key}_download")
@@ -0,0 +1,90 @@
+"""Optical Stack mode: wavelength-resolved glass/encapsulant comparison."""
+import pandas as pd
+import streamlit as st
+
+from ctm.spectral import (
+    AM15G,
+    ENCAPSULANT_LIBRARY,
+    GLASS_LIBRARY,
+    SPECTRUM_SOURCE,
+    WAVELENGTHS,
+    current_weights,
+    read_curves,
+    stack_table,
+)
+from ctm.technology import electrical, template_eqe
+
+TABLE_LABELS = {
+    "glass": "Glass",
+    "encapsulant": "Encapsulant",
+    "glass_transmission": "Glass T (%)",
+    "encapsulant_transmission": "Encapsulant T (%)",
+    "optical_coupling_gain": "Coupling Gain (%)",
+    "stack_current_loss": "Stack Current Loss (%)",
+    "glass_reflection_loss": "Glass Loss (%)",
+    "encapsulant_absorption_loss": "Encapsulant Loss (%)",
+    "stack_ctm_loss": "Uncapped CTM Loss (%)",
+    "stack_module_pmax": "Uncapped Module Pmax (Wp)",
+    "stack_annual_energy": "Uncapped Annual Energy (kWh/year)",
+}
+
+# Plot every Nth wavelength bin; the curves are smooth at this spacing
+PLOT_STRIDE = 10
+
+
+def _uploaded_curves(label, key):
+    uploaded = st.file_uploader(label, type=["csv"], key=key)
+    if uploaded is None:
+        return {}
+    try:
+        return read_curves(uploaded)
+    except (ValueError, KeyError) as error:
+        st.error(f"Could not read {uploaded.name}: {error}")
+        return {}
+
+
+def render(base_params, template):
+    st.markdown("## Optical Stack")
+    st.caption(
+        f"Glass and encapsulant transmission weighted by the cell photocurrent ({SPECTRUM_SOURCE} x wavelength x EQE) "
+        f"over {len(WAVELENGTHS):,} bins from {WAVELENGTHS[0]:.0f} to {WAVELENGTHS[-1]:.0f} nm. Curve files: a "
+        "wavelength_nm column and one transmission column per material (fraction or %). Built-in curves are illustrative."
+    )
+
+    col_upload1, col_upload2, col_upload3 = st.columns(3)
+    with col_upload1:
+        glass_curves = {**GLASS_LIBRARY, **_uploaded_curves("Glass curves", "spectral_glass")}
+    with col_upload2:
+        encapsulant_curves = {**ENCAPSULANT_LIBRARY, **_uploaded_curves("Encapsulant curves", "spectral_encapsulant")}
+    with col_upload3:
+        eqe_curves = _uploaded_curves("Cell EQE", "spectral_eqe")
+    # Without an upload, the EQE of the template selected in the sidebar
+    eqe = next(iter(eqe_curves.values()), None)
+    if eqe is None:
+        eqe = template_eqe(template["key"])
+
+    col_select1, col_select2 = st.columns(2)
+    glasses = col_select1.multiselect("Glass", list(glass_curves), default=list(glass_curves))
+    encapsulants = col_select2.multiselect("Encapsulant", list(encapsulant_curves), default=list(encapsulant_curves))
+    if not glasses or not encapsulants:
+        st.info("Select at least one glass and one encapsulant.")
+        return
+
+    table = stack_table(base_params, {name: glass_curves[name] for name in glasses},
+                        {name: encapsulant_curves[name] for name in encapsulants}, eqe=eqe,
+                        cell=electrical(template))
+    st.markdown("### Stacks")
+    st.dataframe(table.rename(columns=TABLE_LABELS).round(3), use_container_width=True, hide_index=True)
+    st.download_button("Download Stack Comparison (CSV)", table.to_csv(index=False), file_name="CTM_Optical_Stacks.csv",
+                       mime="text/csv", use_container_width=True)
+
+    st.markdown("### Spectra")
+    rows = slice(None, None, PLOT_STRIDE)
+    curves = pd.DataFrame(
+        {name: glass_curves[name][rows] for name in glasses} | {name: encapsulant_curves[name][rows] for name in encapsulants}
+        | {"Cell EQE": eqe[rows]},
+        index=pd.Index(WAVELENGTHS[rows], name="Wavelength (nm)"),
+    )
+    st.line_chart(curves)
+    weights = current_weights(AM15G, eqe)
+    st.area_chart(pd.DataFrame({"Photocurrent weight (relative)": weights[rows] / weights.max()}, index=curves.index))
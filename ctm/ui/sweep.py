@@ -0,0 +1,118 @@
+"""Sweep mode: heatmaps of key outputs over one or two swept inputs."""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from ctm.charts import heatmap_image
+from ctm.layout import LAYOUT_INPUTS
+from ctm.sweep import SWEEP_OUTPUTS, iter_sweep, sweep_axes, sweep_values
+from ctm.technology import electrical
+
+OUTPUT_LABELS = {
+    "total_ctm_loss": "Total CTM Loss (%)",
+    "module_pmax": "Module Pmax (Wp)",
+    "module_fill_factor": "Fill Factor",
+    "annual_energy_total": "Annual Energy (kWh/year)",
+    "weighted_shading_fraction": "Ribbon Shading, Rasterized (%)",
+}
+
+# Beyond this many distinct layouts the rasterized output would dominate the sweep
+MAX_LAYOUTS = 50_000
+
+# Redraw the partial heatmaps at most this many times while chunks stream in
+MAX_REDRAWS = 8
+
+
+def _axis_inputs(label, default_name, key, template, allow_none=False):
+    axes = sweep_axes(template)
+    options = ([None] if allow_none else []) + list(axes)
+    # Keyed per template so a template switch reloads its ranges
+    key = f"{template['key']}.{key}"
+    name = st.selectbox(
+        label,
+        options,
+        index=options.index(default_name if default_name in options else options[0]),
+        format_func=lambda n: "(none)" if n is None else axes[n][0],
+        key=f"{key}_name",
+    )
+    if name is None:
+        return None, None
+
+    _, low, high = axes[name]
+    col_start, col_stop, col_steps = st.columns(3)
+    start = col_start.number_input("From", value=float(low), key=f"{key}.{name}_start")
+    stop = col_stop.number_input("To", value=float(high), key=f"{key}.{name}_stop")
+    steps = col_steps.number_input("Steps", min_value=2, max_value=5000, value=100, step=10, key=f"{key}_steps",
+                                   disabled=name == "num_busbars")
+    return name, sweep_values(name, start, stop, int(steps), template["ranges"]["num_busbars"])
+
+
+def render(base_params, template):
+    st.markdown("## Parameter Sweep")
+    st.caption("Inputs not swept are taken from the sidebar configuration.")
+
+    col_x, col_y = st.columns(2)
+    with col_x:
+        x_name, x_values = _axis_inputs("X-axis parameter", "num_busbars", "sweep_x", template)
+    with col_y:
+        y_name, y_values = _axis_inputs("Y-axis parameter", "ribbon_width", "sweep_y", template, allow_none=True)
+
+    if y_name is not None and y_name == x_name:
+        st.warning("Pick two different parameters to sweep.")
+        return
+    if len(x_values) == 0 or (y_name is not None and len(y_values) == 0):
+        st.warning("The selected range contains no values.")
+        return
+
+    n_points = len(x_values) * (1 if y_name is None else len(y_values))
+    st.caption(f"{n_points:,} grid points")
+
+    n_layouts = (len(x_values) if x_name in LAYOUT_INPUTS else 1) * (len(y_values) if y_name in LAYOUT_INPUTS else 1)
+    outputs = SWEEP_OUTPUTS
+    # The layout engine draws front ribbons on half-cut layouts only
+    rasterizable = template["front_ribbons"] and template["layout"] == "half-cut"
+    if st.checkbox("Rasterized ribbon shading", disabled=not rasterizable or n_layouts > MAX_LAYOUTS,
+                   help=f"Adds the layout engine's shading fraction; up to {MAX_LAYOUTS:,} distinct layouts"):
+        outputs = SWEEP_OUTPUTS + ("weighted_shading_fraction",)
+
+    if not st.button("Run Sweep", use_container_width=True):
+        return
+
+    cell = electrical(template)
+    axes = sweep_axes(template)
+    x_label = axes[x_name][0]
+    if y_name is None:
+        grids = next(iter_sweep(base_params, x_name, x_values, outputs=outputs, cell=cell))[1]
+        df = pd.DataFrame({OUTPUT_LABELS[name]: grids[name][0] for name in outputs}, index=pd.Index(x_values, name=x_label))
+        for name in outputs:
+            st.markdown(f"### {OUTPUT_LABELS[name]}")
+            st.line_chart(df[OUTPUT_LABELS[name]])
+        return
+
+    y_label = axes[y_name][0]
+    grids = {name: np.full((len(y_values), len(x_values)), np.nan, dtype=np.float32) for name in outputs}
+    progress = st.progress(0.0, text="Evaluating sweep...")
+    columns = st.columns(len(outputs))
+    placeholders = [column.empty() for column in columns]
+
+    def draw():
+        for placeholder, name in zip(placeholders, outputs):
+            placeholder.image(heatmap_image(grids[name], x_values, y_values, x_label, y_label, OUTPUT_LABELS[name]),
+                              use_container_width=True)
+
+    rows_done = 0
+    redraw_every = max(1, len(y_values) // MAX_REDRAWS)
+    rows_since_draw = 0
+    for rows, block in iter_sweep(base_params, x_name, x_values, y_name, y_values, outputs, cell=cell):
+        for name in outputs:
+            grids[name][rows] = block[name]
+        n_rows = rows.stop - rows.start
+        rows_done += n_rows
+        rows_since_draw += n_rows
+        progress.progress(rows_done / len(y_values), text=f"Evaluated {rows_done:,} of {len(y_values):,} rows")
+        if rows_since_draw >= redraw_every and rows_done < len(y_values):
+            draw()
+            rows_since_draw = 0
+
+    progress.empty()
+    draw()
@@ -0,0 +1,115 @@
+"""Uncertainty mode: intervals on every loss term and a tornado chart from input tolerances."""
+import pandas as pd
+import streamlit as st
+
+from ctm.charts import tornado_vega_spec
+from ctm.model import compute_ctm_point
+from ctm.report import report_payload
+from ctm.sweep import SWEEP_PARAMS
+from ctm.tables import interval_text, loss_table_data
+from ctm.technology import electrical
+from ctm.ui.reports import report_button
+from ctm.uncertainty import (
+    DEFAULT_SAMPLES,
+    DISTRIBUTIONS,
+    TOLERANCE_DEFAULTS,
+    UNCERTAIN_INPUTS,
+    propagate,
+    report_fields,
+    tornado,
+)
+
+METHOD_LABELS = {"auto": "Auto", "linear": "Linearized", "lhs": "Latin Hypercube"}
+
+RESULT_LABELS = {
+    "module_pmax": "Module Pmax (Wp)",
+    "module_efficiency": "Module Efficiency (%)",
+    "total_ctm_loss": "Total CTM Loss (%)",
+    "module_voc": "Voc (V)",
+    "module_isc": "Isc (A)",
+    "module_vmpp": "Vmpp (V)",
+    "module_impp": "Impp (A)",
+    "module_fill_factor": "Fill Factor",
+    "annual_energy_total": "Annual Energy (kWh/year)",
+    "annual_energy_loss": "Annual Energy Loss (kWh/year)",
+}
+
+
+def _tolerance_editor():
+    defaults = pd.DataFrame([
+        {"Input": SWEEP_PARAMS[name][0], "Distribution": TOLERANCE_DEFAULTS.get(name, ("normal", 0.0))[0],
+         "Tolerance": TOLERANCE_DEFAULTS.get(name, ("normal", 0.0))[1]}
+        for name in UNCERTAIN_INPUTS
+    ])
+    edited = st.data_editor(
+        defaults,
+        column_config={
+            "Distribution": st.column_config.SelectboxColumn(options=list(DISTRIBUTIONS), required=True),
+            "Tolerance": st.column_config.NumberColumn(help="σ for normal, ± half-width for uniform and triangular",
+                                                      min_value=0.0, format="%.4g"),
+        },
+        disabled=["Input"],
+        hide_index=True,
+        use_container_width=True,
+        key="uncertainty_tolerances",
+    )
+    return {name: (row["Distribution"], float(row["Tolerance"] or 0.0))
+            for name, (_, row) in zip(UNCERTAIN_INPUTS, edited.iterrows())}
+
+
+def render(base_params, template):
+    st.markdown("## Uncertainty Propagation")
+    st.caption(
+        "Each input tolerance is propagated through every loss term and electrical parameter of the sidebar design. "
+        "Auto uses linearized sensitivities when the model is linear over the tolerances and Latin-hypercube "
+        "sampling otherwise. Cell and busbar counts are exact."
+    )
+
+    with st.expander("Input Tolerances", expanded=True):
+        tolerances = _tolerance_editor()
+
+    col1, col2, col3, col4 = st.columns(4)
+    method = col1.selectbox("Method", list(METHOD_LABELS), format_func=METHOD_LABELS.get)
+    n_samples = col2.number_input("Samples", min_value=1_000, max_value=1_000_000, value=DEFAULT_SAMPLES, step=10_000,
+                                  disabled=method == "linear")
+    level = col3.selectbox("Confidence", [0.90, 0.95, 0.99], index=1, format_func=lambda q: f"{q:.0%}")
+    seed = col4.number_input("Seed", min_value=0, value=0, step=1, disabled=method == "linear")
+
+    cell = electrical(template)
+    intervals, used = propagate(base_params, tolerances, method, int(n_samples), int(seed), level, cell)
+    bounds = {name: (row.low, row.high) for name, row in intervals.iterrows()}
+    result = compute_ctm_point(**base_params, **cell)
+    st.caption(f"{level:.0%} intervals by {METHOD_LABELS[used].lower()}"
+               + (f" over {int(n_samples):,} samples." if used == "lhs" else "."))
+
+    col_m1, col_m2, col_m3 = st.columns(3)
+    for column, name in zip((col_m1, col_m2, col_m3), ("module_pmax", "total_ctm_loss", "annual_energy_total")):
+        column.metric(RESULT_LABELS[name], f"{result[name]:,.2f}", interval_text(*bounds[name]), delta_color="off")
+
+    st.markdown("### Loss Breakdown")
+    st.dataframe(pd.DataFrame(loss_table_data(result, bounds)), use_container_width=True, hide_index=True)
+
+    st.markdown("### Module Results")
+    st.dataframe(pd.DataFrame([
+        {"Parameter": label, "Nominal": result[name], "Mean": intervals.loc[name, "mean"],
+         "Std": intervals.loc[name, "std"], "Low": intervals.loc[name, "low"], "High": intervals.loc[name, "high"]}
+        for name, label in RESULT_LABELS.items()
+    ]).round(4), use_container_width=True, hide_index=True)
+
+    st.markdown("### Largest Contributors")
+    output = st.selectbox("Output", list(RESULT_LABELS), format_func=RESULT_LABELS.get)
+    contributors = tornado(base_params, tolerances, output, level, cell=cell)
+    rows = tuple((SWEEP_PARAMS[row.input][0], row.low, row.high) for row in contributors.itertuples())
+    if rows:
+        st.vega_lite_chart(tornado_vega_spec(rows, result[output], RESULT_LABELS[output]), use_container_width=True)
+    else:
+        st.info(f"No input with a tolerance moves {RESULT_LABELS[output]}.")
+
+    col_download1, col_download2 = st.columns(2)
+    with col_download1:
+        payload = report_payload(result, module_type=template["name"])
+        payload.update(report_fields(intervals, contributors, output, level, used, RESULT_LABELS[output]))
+        report_button(payload, "CTM_Uncertainty", "uncertainty")
+    with col_download2:
+        st.download_button("Download Intervals (CSV)", intervals.to_csv(), file_name="CTM_Uncertainty.csv",
+                           mime="text/csv", use_container_width=True)
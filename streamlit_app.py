@@ -1,18 +1,63 @@
+import importlib
+import math
+
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
 from datetime import datetime
-from io import BytesIO
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from ctm import timing
+from ctm import compute_ctm_cached, params_key, loss_values as ctm_loss_values
+from ctm.cache import cache_stats
+from ctm.charts import layout_image, pie_image, pie_vega_spec, pie_values as loss_pie_values
+from ctm.layout import module_layout
+from ctm.network import BUSBAR_CONTACT_RESISTANCE, ZERO_BUSBAR_CONTACT_RESISTANCE, network_losses
+from ctm.report import report_payload
+from ctm.store import default_store
+from ctm.tables import iv_curve_table, loss_table, loss_table_csv
+from ctm.technology import (
+    DEFAULT_ALBEDO,
+    DEFAULT_TEMPLATE,
+    SLIDER_INPUTS,
+    bifacial_gain,
+    electrical,
+    load_template,
+    template_names,
+)
+from ctm.ui.reports import report_button
+
+# Views for modes other than the single-point calculator, imported on demand.
+# Each is called as ``render(params, template)`` with the sidebar template.
+APP_MODES = {
+    "Single Point": None,
+    "Sweep": "ctm.ui.sweep",
+    "Mismatch MC": "ctm.ui.mismatch",
+    "Lot Analysis": "ctm.ui.lots",
+    "Energy Yield": "ctm.ui.energy",
+    "BOM Optimizer": "ctm.ui.optimize",
+    "Compare": "ctm.ui.compare",
+    "Optical Stack": "ctm.ui.spectral",
+    "Lifetime": "ctm.ui.lifetime",
+    "Uncertainty": "ctm.ui.uncertainty",
+}
+
+# Opt-in per-stage timing: CTM_TIMING=1 or ?diagnostics=1 in the URL
+timer = timing.start_run(timing.ENABLED or "diagnostics" in st.query_params)
+
+
+def finish_timing():
+    ctx = get_script_run_ctx()
+    timing.finish(timer, st.session_state, ctx.session_id if ctx else None)
+    if timer.enabled:
+        importlib.import_module("ctm.ui.diagnostics").render(st.session_state.get("_ctm_timing"))
+
+
+# Only the selected template is read from disk; its lookup tables load on first use
+TEMPLATES = template_names()
+template_key = st.session_state.get("ctm_template", DEFAULT_TEMPLATE)
+template = load_template(template_key)
 
 st.set_page_config(
-    page_title="CTM Loss Calculator - Half-Cut Cell Modules",
+    page_title=f"CTM Loss Calculator - {template['name']} Modules",
     layout="wide",
     initial_sidebar_state="expanded"
 )
@@ -50,131 +95,126 @@ st.markdown("""
 
 st.markdown("<h1 class='title-main'>CTM Loss Calculator</h1>", unsafe_allow_html=True)
 st.markdown("<h3 style='text-align: center; color: #555;'>PV module Power Technologies</h3>", unsafe_allow_html=True)
-st.markdown("<h4 style='text-align: center; color: #777;'>Half-Cut Cell TOPCon Modules</h4>", unsafe_allow_html=True)
+st.markdown(f"<h4 style='text-align: center; color: #777;'>{template['name']} Modules</h4>", unsafe_allow_html=True)
 
 st.sidebar.header("Input Configuration")
 
+st.sidebar.selectbox("Module Template", list(TEMPLATES), format_func=TEMPLATES.get, key="ctm_template",
+                     help=template["description"])
+
+
+def template_input(label, name, disabled=False):
+    """Sidebar input with the template's default, range and help; keyed so a template switch reloads them."""
+    low, high, step = template["ranges"][name]
+    widget = st.sidebar.slider if name in SLIDER_INPUTS else st.sidebar.number_input
+    return widget(label, min_value=low, max_value=high, value=template["params"][name], step=step,
+                  help=template["help"].get(name), key=f"{template_key}.{name}", disabled=disabled)
+
+
+app_mode = st.sidebar.radio("Mode", list(APP_MODES), horizontal=True)
+
 if st.sidebar.button("Reset to Default Values", use_container_width=True):
     st.session_state.reset = True
 
 st.sidebar.subheader("1. Solar Cell Parameters")
-cell_power = st.sidebar.number_input("Cell Power (Wp)", min_value=2.0, max_value=10.0, value=4.15, step=0.05, help="Half-cut TOPCon cell")
-cell_efficiency = st.sidebar.number_input("Cell Efficiency (%)", min_value=20.0, max_value=27.0, value=24.7, step=0.1, help="TOPCon: 24.7%")
-num_cells = st.sidebar.number_input("Number of Cells", min_value=100, max_value=160, value=144, step=2, help="144 half-cut cells")
+cell_power = template_input("Cell Power (Wp)", "cell_power")
+cell_efficiency = template_input("Cell Efficiency (%)", "cell_efficiency")
+num_cells = template_input("Number of Cells", "num_cells")
 
 st.sidebar.subheader("2. Module Specifications")
-module_area = st.sidebar.number_input("Module Area (m²)", min_value=2.0, max_value=3.5, value=2.586, step=0.01, help="2278mm x 1134mm x 33mm")
-cell_length = st.sidebar.number_input("Cell Length (mm)", min_value=180.0, max_value=210.0, value=182.2, step=0.1, help="Half-cut: 182.2mm")
-cell_width = st.sidebar.number_input("Cell Width (mm)", min_value=85.0, max_value=95.0, value=91.1, step=0.1, help="Half-cut: 91.1mm")
+module_area = template_input("Module Area (m²)", "module_area")
+cell_length = template_input("Cell Length (mm)", "cell_length")
+cell_width = template_input("Cell Width (mm)", "cell_width")
 
 st.sidebar.subheader("3. Optical Loss Parameters")
-glass_transmission = st.sidebar.slider("Glass Transmission (%)", 88.0, 96.0, 94.0, 0.5, help="AR-coated: 94%")
-encapsulant_transmission = st.sidebar.slider("Encapsulant Transmission (%)", 88.0, 96.0, 94.0, 0.5, help="Encapsulant: 94%")
+glass_transmission = template_input("Glass Transmission (%)", "glass_transmission")
+encapsulant_transmission = template_input("Encapsulant Transmission (%)", "encapsulant_transmission")
 
 st.sidebar.subheader("4. Resistive Loss Parameters")
-num_busbars = st.sidebar.selectbox("Number of Busbars", [3, 5, 9, 10, 12, 16, 18, 20], index=3, help="MBB: 12 busbars")
-ribbon_width = st.sidebar.number_input("Ribbon Width (mm)", min_value=0.1, max_value=4.5, value=1.5, step=0.1)
-ribbon_thickness = st.sidebar.number_input("Ribbon Thickness (mm)", min_value=0.15, max_value=5.5, value=0.25, step=0.05)
+busbar_options = template["ranges"]["num_busbars"]
+num_busbars = st.sidebar.selectbox("Number of Busbars", busbar_options,
+                                   index=busbar_options.index(template["params"]["num_busbars"]),
+                                   help=template["help"].get("num_busbars"), key=f"{template_key}.num_busbars")
+# Back-contact and shingled cells have no front ribbons; the model leaves the ribbon terms out
+ribbon_width = template_input("Ribbon Width (mm)", "ribbon_width", disabled=not template["front_ribbons"])
+ribbon_thickness = template_input("Ribbon Thickness (mm)", "ribbon_thickness", disabled=not template["front_ribbons"])
 
 st.sidebar.subheader("5. Mismatch Parameters")
-cell_binning_tolerance = st.sidebar.slider("Cell Binning Tolerance (±%)", 0.0, 5.0, 1.5, 0.5, help="Tight sorting")
+cell_binning_tolerance = template_input("Cell Binning Tolerance (±%)", "cell_binning_tolerance")
 
 st.sidebar.subheader("6. Additional Parameters")
-junction_box_loss = st.sidebar.slider("Junction Box & Cable Loss (%)", 0.1, 2.0, 0.35, 0.1)
-annual_irradiance = st.sidebar.number_input("Annual Solar Irradiance (kWh/m²/year)", min_value=1000.0, max_value=2500.0, value=1500.0, step=50.0, help="Location specific")
+junction_box_loss = template_input("Junction Box & Cable Loss (%)", "junction_box_loss")
+annual_irradiance = template_input("Annual Solar Irradiance (kWh/m²/year)", "annual_irradiance")
+
+if template["bifaciality"]:
+    st.sidebar.subheader("7. Bifacial Parameters")
+    albedo = st.sidebar.slider("Ground Albedo", 0.1, 0.9, DEFAULT_ALBEDO, 0.05, help="Grass 0.2, sand 0.4, snow 0.8",
+                               key=f"{template_key}.albedo")
+    mounting_tilt = st.sidebar.slider("Tilt (°)", 0, 60, 25, 5, key=f"{template_key}.tilt")
+    mounting_clearance = st.sidebar.slider("Clearance (m)", 0.5, 2.5, 1.0, 0.25, help="Ground to module centre",
+                                           key=f"{template_key}.clearance")
+
+timer.mark("inputs")
 
 # ====================== CALCULATIONS ======================
 
-cell_area_m2 = (cell_length * cell_width) / 1e6
-cell_area_cm2 = (cell_length * cell_width) / 100
-
-# STEP 1: Calculate total cell power (changes with cell_power input)
-total_cell_power = cell_power * num_cells
-
-# STEP 2: Calculate geometric loss
-total_cell_area = num_cells * cell_area_m2
-inactive_area_fraction = 1 - (total_cell_area / module_area)
-
-geometric_loss = inactive_area_fraction * 100
-
-# STEP 3: Calculate OPTICAL LOSSES
-glass_reflection_loss = (1 - glass_transmission/100) * 100
-encapsulant_absorption_loss = (1 - encapsulant_transmission/100) * 100
-optical_coupling_gain = 1.5  # Reduced for more realistic 1-2% total
-ribbon_coverage = (ribbon_width * num_busbars) / (np.sqrt(cell_length * cell_width / 100))
-ribbon_shading_loss = max(0, ribbon_coverage * 0.55)  # Reduced for better initial loss
-net_optical_loss = glass_reflection_loss + encapsulant_absorption_loss + ribbon_shading_loss - optical_coupling_gain
-
-# STEP 4: Calculate RESISTIVE LOSSES
-finger_length_factor = 156 / num_busbars
-base_resistive_loss = 0.35  # Reduced for 1-2% total loss range
-resistive_loss = base_resistive_loss * (5 / num_busbars) ** 1.2
-ribbon_resistivity = 1.7e-8
-ribbon_area_calc = ribbon_width * ribbon_thickness / 1e6
-# ribbon_area_calc = ((ribbon_width/2 * ribbon_width/2) * 3.14) / 1e6
-ribbon_resistance_factor = (ribbon_resistivity * 0.156) / ribbon_area_calc
-ribbon_loss_contribution = 0.1 * (ribbon_resistance_factor / 0.0001)
-total_resistive_loss = resistive_loss + ribbon_loss_contribution
-
-# STEP 5: Calculate MISMATCH LOSS
-mismatch_loss = 0.15 + (cell_binning_tolerance / 2.0) * 0.1  # Reduced for 1-2% target
-
-# STEP 6: Additional losses
-jb_cable_loss = junction_box_loss
-
-# STEP 7: Calculate TOTAL CTM LOSS (target 1-2%)
-total_ctm_loss = geometric_loss + net_optical_loss + total_resistive_loss + mismatch_loss + jb_cable_loss
-total_ctm_loss = max(1.0, min(total_ctm_loss, 2.5))  # Constrain to 1-2.5%
-
-# STEP 8: Calculate module power from cell power and CTM loss
-ctm_ratio = 1 - (total_ctm_loss / 100)
-module_pmax = total_cell_power * ctm_ratio  # MODULE POWER CHANGES WITH CELL POWER!
-
-# STEP 9: Calculate module efficiency
-module_efficiency = (module_pmax / (module_area * 1000)) * 100
-
-# STEP 10: Calculate INTERDEPENDENT electrical parameters based on losses
-# Electrical parameters are interdependent with optical, resistive, and mismatch losses
-
-# Loss-dependent scaling factors
-loss_factor = 1 - (total_ctm_loss / 100)  # Same as CTM ratio
-
-# Base reference ratios (at optimal conditions)
-voc_pmax_ratio = 0.0879  # 51.86 / 590
-isc_pmax_ratio = 0.0245  # 14.49 / 590
-vmpp_voc_ratio = 0.856   # 42.88 / 51.86
-impp_isc_ratio = 0.950   # 13.76 / 14.49
-
-# Optical loss impact on voltage (higher transmission loss reduces Voc)
-optical_loss_factor = ((glass_transmission * encapsulant_transmission) / (94.0 * 94.0))
-voc_adjustment = optical_loss_factor * 0.98  # Voc reduced by optical losses
-
-# Resistive loss impact on current (higher resistance reduces Isc)
-resistive_loss_factor = 1 - (total_resistive_loss / 100)
-isc_adjustment = resistive_loss_factor * 0.98  # Isc reduced by resistive losses
-
-# Mismatch impact on both (mismatch reduces overall efficiency)
-mismatch_factor = 1 - (mismatch_loss / 100)
-
-# Combined interdependent electrical parameters
-module_voc = module_pmax * voc_pmax_ratio * voc_adjustment * mismatch_factor
-module_isc = module_pmax * isc_pmax_ratio * isc_adjustment * mismatch_factor
-module_vmpp = module_voc * vmpp_voc_ratio
-module_impp = module_isc * impp_isc_ratio
-
-annual_energy_total = (module_pmax / 1000) * annual_irradiance
-annual_energy_loss = annual_energy_total * (total_ctm_loss / 100)
-
-loss_values = {
-    "geometric": geometric_loss,
-    "glass": glass_reflection_loss,
-    "encapsulant": encapsulant_absorption_loss,
-    "ribbon": ribbon_shading_loss,
-    "coupling": optical_coupling_gain,
-    "resistive": total_resistive_loss,
-    "mismatch": mismatch_loss,
-    "jb": jb_cable_loss
+params = {
+    "cell_power": cell_power,
+    "cell_efficiency": cell_efficiency,
+    "num_cells": num_cells,
+    "module_area": module_area,
+    "cell_length": cell_length,
+    "cell_width": cell_width,
+    "glass_transmission": glass_transmission,
+    "encapsulant_transmission": encapsulant_transmission,
+    "num_busbars": num_busbars,
+    "ribbon_width": ribbon_width,
+    "ribbon_thickness": ribbon_thickness,
+    "cell_binning_tolerance": cell_binning_tolerance,
+    "junction_box_loss": junction_box_loss,
+    "annual_irradiance": annual_irradiance,
 }
+params_cache_key = params_key(params)
+cell_electrical = electrical(template)
+results = compute_ctm_cached(params_cache_key, **cell_electrical)
+
+# Store each new input vector once per session, not on every widget rerun
+results_store = default_store()
+if results_store is not None and st.session_state.get("recorded_key") != params_cache_key:
+    results_store.record(params, results, cell_type=template["cell_type"])
+    st.session_state.recorded_key = params_cache_key
+
+total_cell_power = results["total_cell_power"]
+geometric_loss = results["geometric_loss"]
+glass_reflection_loss = results["glass_reflection_loss"]
+encapsulant_absorption_loss = results["encapsulant_absorption_loss"]
+ribbon_shading_loss = results["ribbon_shading_loss"]
+optical_coupling_gain = results["optical_coupling_gain"]
+total_resistive_loss = results["total_resistive_loss"]
+mismatch_loss = results["mismatch_loss"]
+jb_cable_loss = results["jb_cable_loss"]
+total_ctm_loss = results["total_ctm_loss"]
+ctm_ratio = results["ctm_ratio"]
+module_pmax = results["module_pmax"]
+module_efficiency = results["module_efficiency"]
+module_voc = results["module_voc"]
+module_isc = results["module_isc"]
+module_vmpp = results["module_vmpp"]
+module_impp = results["module_impp"]
+module_fill_factor = results["module_fill_factor"]
+module_series_resistance = results["module_series_resistance"]
+annual_energy_total = results["annual_energy_total"]
+annual_energy_loss = results["annual_energy_loss"]
+
+loss_values = ctm_loss_values(results)
+timer.mark("calculations")
+
+mode_view = APP_MODES[app_mode]
+if mode_view is not None:
+    importlib.import_module(mode_view).render(params, template)
+    timer.mark(app_mode)
+    finish_timing()
+    st.stop()
 
 # ====================== DISPLAY RESULTS ======================
 
@@ -201,23 +241,77 @@ st.markdown("---")
 
 st.markdown("## Module Electrical Parameters (STC)")
 
+# NaN when the ribbons are too resistive for any I-V curve of the design to deliver its Pmax
+curve_feasible = math.isfinite(module_vmpp)
+if not curve_feasible:
+    st.warning(f"No I-V curve of this design delivers {module_pmax:.1f} Wp: the ribbons and busbars are too "
+               "resistive for the CTM loss budget. Add busbars or use a wider or thicker ribbon.")
+
 col_elec1, col_elec2, col_elec3, col_elec4, col_elec5 = st.columns(5)
 
 with col_elec1:
-    st.metric("Voc", f"{module_voc:.2f} V")
+    st.metric("Voc", f"{module_voc:.2f} V" if curve_feasible else "n/a")
 
 with col_elec2:
-    st.metric("Isc", f"{module_isc:.2f} A")
+    st.metric("Isc", f"{module_isc:.2f} A" if curve_feasible else "n/a")
 
 with col_elec3:
-    st.metric("Vmpp", f"{module_vmpp:.2f} V")
+    st.metric("Vmpp", f"{module_vmpp:.2f} V" if curve_feasible else "n/a")
 
 with col_elec4:
-    st.metric("Impp", f"{module_impp:.2f} A")
+    st.metric("Impp", f"{module_impp:.2f} A" if curve_feasible else "n/a")
 
 with col_elec5:
     st.metric("Pmax", f"{module_pmax:.1f} Wp")
 
+with st.expander("Module Layout"):
+    if template["layout"] != "half-cut":
+        st.info("The layout engine draws half-cut cells in ribbon strings; it does not model "
+                f"{template['layout']} modules.")
+    else:
+        front_ribbon_width = ribbon_width if template["front_ribbons"] else 0.0
+        layout = module_layout(num_cells, cell_length, cell_width, num_busbars, front_ribbon_width)
+        col_layout1, col_layout2 = st.columns([1, 2])
+        with col_layout1:
+            st.image(layout_image(num_cells, cell_length, cell_width, num_busbars, front_ribbon_width))
+        with col_layout2:
+            st.metric("Layout Outline", f"{layout['layout_length']:.0f} x {layout['layout_width']:.0f} mm",
+                      f"{layout['layout_area']:.3f} m² vs {module_area:.3f} m² input", delta_color="off")
+            st.metric("Active Cell Area", f"{layout['active_area']:.3f} m²",
+                      f"{layout['layout_geometric_loss']:.2f}% inactive", delta_color="off")
+            st.metric("Ribbon Shading (rasterized)", f"{layout['weighted_shading_fraction']:.2f}%",
+                      f"{layout['ribbon_shading_fraction']:.2f}% under uniform light", delta_color="off",
+                      help="Share of irradiance-weighted active area under the ribbons, before any light is redirected "
+                           "onto the cell")
+            st.metric("Frame Shadow", f"{layout['frame_shading_loss']:.2f}%", delta_color="off")
+
+with st.expander("Resistive Network"):
+    if not template["front_ribbons"]:
+        st.info("The network engine models the front finger grid and ribbons; these cells have no front ribbons.")
+    else:
+        zero_busbar = st.toggle("Zero-busbar (0BB) contacts",
+                                help="Wires soldered straight onto the fingers, no printed busbar pads")
+        network = network_losses(cell_power, num_cells, cell_length, cell_width, num_busbars, ribbon_width,
+                                 ribbon_thickness,
+                                 ZERO_BUSBAR_CONTACT_RESISTANCE if zero_busbar else BUSBAR_CONTACT_RESISTANCE)
+        col_network1, col_network2, col_network3, col_network4 = st.columns(4)
+        col_network1.metric("Cell I²R", f"{float(network['cell_resistive_loss']) * 1000:.1f} mW",
+                            f"{float(network['cell_resistive_fraction']):.2f}% of cell power", delta_color="off")
+        col_network2.metric("String I²R", f"{float(network['string_resistive_loss']):.2f} W", delta_color="off")
+        col_network3.metric("Module I²R", f"{float(network['module_resistive_loss']):.1f} W", delta_color="off")
+        col_network4.metric("Equivalent Rs", f"{float(network['network_series_resistance']):.3f} Ω·cm²",
+                            delta_color="off")
+        branches = {"finger_loss": "Fingers", "emitter_loss": "Emitter", "contact_loss": "Contacts",
+                    "ribbon_loss": "Ribbons", "interconnect_loss": "Cell gaps"}
+        st.bar_chart({"Branch": list(branches.values()),
+                      "mW per cell": [float(network[name]) * 1000 for name in branches]},
+                     x="Branch", y="mW per cell", horizontal=True)
+
+if curve_feasible:
+    with st.expander(f"I-V Curve (FF {module_fill_factor * 100:.1f}%, Rs {module_series_resistance:.3f} Ω)"):
+        st.line_chart(iv_curve_table(params_cache_key, **cell_electrical), x="Voltage (V)",
+                      y=["Current (A)", "Power (W)"])
+
 st.markdown("---")
 
 st.markdown("## Annual Energy Analysis")
@@ -233,48 +327,22 @@ with col_energy2:
 with col_energy3:
     st.metric("Annual Energy Loss (CTM)", f"{annual_energy_loss:.0f} kWh/year", f"({total_ctm_loss:.2f}%)")
 
+if template["bifaciality"]:
+    rear_gain = bifacial_gain(template_key, albedo, mounting_tilt, mounting_clearance)
+    col_bifacial1, col_bifacial2 = st.columns(2)
+    col_bifacial1.metric("Bifacial Rear-Side Gain", f"{rear_gain:.1f}%",
+                         f"bifaciality {template['bifaciality']:.0%}", delta_color="off")
+    col_bifacial2.metric("Annual Energy with Rear Side", f"{annual_energy_total * (1 + rear_gain / 100):.0f} kWh/year",
+                         f"+{annual_energy_total * rear_gain / 100:.0f} kWh/year")
+
 st.markdown("---")
+timer.mark("display")
 
 st.markdown("## Loss Breakdown Analysis")
 
-loss_data = {
-    "Loss Category": [
-        "Geometric",
-        "Glass Reflection",
-        "Encapsulant Absorption",
-        "Ribbon Shading",
-        "Coupling Gain",
-        "Resistive",
-        "Mismatch",
-        "JB & Cable",
-        "TOTAL CTM LOSS"
-    ],
-    "Loss (%)": [
-        f"{geometric_loss:.2f}",
-        f"{glass_reflection_loss:.2f}",
-        f"{encapsulant_absorption_loss:.2f}",
-        f"{ribbon_shading_loss:.2f}",
-        f"-{optical_coupling_gain:.2f}",
-        f"{total_resistive_loss:.2f}",
-        f"{mismatch_loss:.2f}",
-        f"{jb_cable_loss:.2f}",
-        f"{total_ctm_loss:.2f}"
-    ],
-    "Power Impact (W)": [
-        f"{-total_cell_power * geometric_loss/100:.2f}",
-        f"{-total_cell_power * glass_reflection_loss/100:.2f}",
-        f"{-total_cell_power * encapsulant_absorption_loss/100:.2f}",
-        f"{-total_cell_power * ribbon_shading_loss/100:.2f}",
-        f"+{total_cell_power * optical_coupling_gain/100:.2f}",
-        f"{-total_cell_power * total_resistive_loss/100:.2f}",
-        f"{-total_cell_power * mismatch_loss/100:.2f}",
-        f"{-total_cell_power * jb_cable_loss/100:.2f}",
-        f"{-(total_cell_power - module_pmax):.2f}"
-    ]
-}
-
-df_losses = pd.DataFrame(loss_data)
+df_losses = loss_table(params_cache_key)
 st.dataframe(df_losses, use_container_width=True, hide_index=True)
+timer.mark("loss table")
 
 st.markdown("---")
 
@@ -284,251 +352,17 @@ col_viz = st.columns([1])[0]
 with col_viz:
     st.markdown("### Loss Distribution")
 
-    pie_labels = ["Geometric", "Glass", "Encapsulant", "Ribbon Shading", "Resistive", "Mismatch", "JB & Cable"]
-    pie_values_raw = [
-        max(0.01, geometric_loss),
-        max(0.01, glass_reflection_loss),
-        max(0.01, encapsulant_absorption_loss),
-        max(0.01, ribbon_shading_loss),
-        max(0.01, total_resistive_loss),
-        max(0.01, mismatch_loss),
-        max(0.01, jb_cable_loss)
-    ]
-
-    pie_sum = sum(pie_values_raw)
-    if pie_sum > 0:
-        pie_values = [v/pie_sum * total_ctm_loss for v in pie_values_raw]
-
-        fig2, ax2 = plt.subplots(figsize=(10, 7))
-
-        colors_pie = ["#FF4444", "#FF8800", "#FFBB33", "#00CC44", "#FF1493", "#00CCFF", "#9966FF"]
-
-        wedges, texts, autotexts = ax2.pie(
-            pie_values,
-            labels=pie_labels,
-            autopct="%1.1f%%",
-            colors=colors_pie,
-            startangle=45,
-            textprops={"fontsize": 10, "weight": "bold"},
-            wedgeprops={"edgecolor": "white", "linewidth": 2.5},
-            explode=[0.08] * len(pie_labels),
-            pctdistance=0.85
-        )
-
-        for text in texts:
-            text.set_fontsize(11)
-            text.set_weight("bold")
-            text.set_color("#000000")
-
-        for autotext in autotexts:
-            autotext.set_color("white")
-            autotext.set_fontsize(9)
-            autotext.set_weight("bold")
-            autotext.set_bbox(dict(boxstyle="round,pad=0.4", facecolor="black", alpha=0.6, edgecolor="none"))
-
-        ax2.set_title("CTM Loss Distribution", fontsize=13, fontweight="bold", pad=20)
-        plt.tight_layout()
-        st.pyplot(fig2, use_container_width=True)
-
-st.markdown("---")
-
-# PDF REPORT GENERATION - DATE/TIME AT DOWNLOAD TIME
-def create_pdf_report(total_cell_power, module_pmax, module_efficiency, df_losses, loss_values, total_ctm_loss, ctm_ratio, module_voc, module_isc, module_vmpp, module_impp, annual_energy_total, annual_energy_loss):
-
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=0.5*inch, leftMargin=0.5*inch, topMargin=0.5*inch, bottomMargin=0.5*inch)
-
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        "CustomTitle",
-        parent=styles["Heading1"],
-        fontSize=24,
-        textColor=colors.HexColor("#1f77b4"),
-        spaceAfter=10,
-        alignment=TA_CENTER,
-        fontName="Helvetica-Bold"
-    )
-
-    heading_style = ParagraphStyle(
-        "CustomHeading",
-        parent=styles["Heading2"],
-        fontSize=14,
-        textColor=colors.HexColor("#1f77b4"),
-        spaceAfter=8,
-        spaceBefore=8,
-        fontName="Helvetica-Bold"
-    )
-
-    body_style = ParagraphStyle(
-        "CustomBody",
-        parent=styles["Normal"],
-        fontSize=10,
-        alignment=TA_JUSTIFY,
-        spaceAfter=6
-    )
+    chart_renderer = st.radio("Chart Renderer", ["Image", "Interactive"], horizontal=True, help="Interactive renders in the browser with no server-side rasterization")
 
-    disclaimer_style = ParagraphStyle(
-        "Disclaimer",
-        parent=styles["Normal"],
-        fontSize=9,
-        alignment=TA_JUSTIFY,
-        spaceAfter=6,
-        textColor=colors.HexColor("#CC0000")
-    )
+    pie_values = loss_pie_values(loss_values, total_ctm_loss)
+    if pie_values is not None:
+        if chart_renderer == "Interactive":
+            st.vega_lite_chart(pie_vega_spec(pie_values), use_container_width=True)
+        else:
+            st.image(pie_image(pie_values), use_container_width=True)
+timer.mark("chart")
 
-    story = []
-
-    story.append(Paragraph("CELL-TO-MODULE (CTM) LOSS ANALYSIS REPORT", title_style))
-    story.append(Spacer(1, 0.05*inch))
-    story.append(Paragraph("DEMO REPORT", heading_style))
-    story.append(Spacer(1, 0.1*inch))
-
-    company_text = "PV module Power Technologies<br/>144 Half-Cut Cell TOPCon Module"
-    story.append(Paragraph(company_text, body_style))
-
-    # CURRENT DATE AND TIME AT REPORT GENERATION (DOWNLOAD TIME)
-    current_datetime = datetime.now()
-    report_date = f"Report Generated: {current_datetime.strftime('%d %B %Y')}"
-    story.append(Paragraph(report_date, body_style))
-    story.append(Spacer(1, 0.2*inch))
-
-    story.append(Paragraph("EXECUTIVE SUMMARY", heading_style))
-    summary_text = f"This report presents a detailed Cell-to-Module (CTM) loss analysis for 144 half-cut cell TOPCon modules. Total CTM loss: <b>{total_ctm_loss:.2f}%</b>, resulting in module power of <b>{module_pmax:.1f} Wp</b> from cell power of <b>{total_cell_power:.0f} Wp</b>. Annual energy loss due to CTM: <b>{annual_energy_loss:.0f} kWh/year</b>."
-    story.append(Paragraph(summary_text, body_style))
-    story.append(Spacer(1, 0.15*inch))
-
-    story.append(Paragraph("KEY RESULTS", heading_style))
-    results_data = [
-        ["Parameter", "Value", "Unit"],
-        ["Total Cell Power", f"{total_cell_power:.1f}", "Wp"],
-        ["Module Pmax", f"{module_pmax:.1f}", "Wp"],
-        ["Power Loss", f"{total_cell_power - module_pmax:.1f}", "Wp"],
-        ["Module Efficiency", f"{module_efficiency:.2f}", "%"],
-        ["CTM Ratio", f"{ctm_ratio*100:.2f}", "%"],
-        ["Total CTM Loss", f"{total_ctm_loss:.2f}", "%"]
-    ]
-
-    results_table = Table(results_data, colWidths=[2.5*inch, 1.5*inch, 1.0*inch])
-    results_table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1f77b4")),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("FONTSIZE", (0, 0), (-1, 0), 11),
-        ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-        ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
-        ("GRID", (0, 0), (-1, -1), 1, colors.black),
-        ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
-        ("FONTSIZE", (0, 1), (-1, -1), 10),
-    ]))
-
-    story.append(results_table)
-    story.append(Spacer(1, 0.15*inch))
-
-    story.append(Paragraph("ELECTRICAL PARAMETERS (STC)", heading_style))
-    elec_data = [
-        ["Parameter", "Value", "Unit"],
-        ["Voc", f"{module_voc:.2f}", "V"],
-        ["Isc", f"{module_isc:.2f}", "A"],
-        ["Vmpp", f"{module_vmpp:.2f}", "V"],
-        ["Impp", f"{module_impp:.2f}", "A"],
-        ["Pmax", f"{module_pmax:.1f}", "Wp"]
-    ]
-
-    elec_table = Table(elec_data, colWidths=[2.5*inch, 1.5*inch, 1.0*inch])
-    elec_table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1f77b4")),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("FONTSIZE", (0, 0), (-1, 0), 11),
-        ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-        ("BACKGROUND", (0, 1), (-1, -1), colors.lightblue),
-        ("GRID", (0, 0), (-1, -1), 1, colors.black),
-        ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
-        ("FONTSIZE", (0, 1), (-1, -1), 10),
-    ]))
-
-    story.append(elec_table)
-    story.append(Spacer(1, 0.15*inch))
-
-    story.append(Paragraph("ANNUAL ENERGY ANALYSIS", heading_style))
-    energy_data = [
-        ["Parameter", "Value", "Unit"],
-        ["Annual Energy Output", f"{annual_energy_total:.0f}", "kWh/year"],
-        ["Annual Energy Loss (CTM)", f"{annual_energy_loss:.0f}", "kWh/year"],
-        ["Loss Percentage", f"{total_ctm_loss:.2f}", "%"]
-    ]
-
-    energy_table = Table(energy_data, colWidths=[2.5*inch, 1.5*inch, 1.0*inch])
-    energy_table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1f77b4")),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("FONTSIZE", (0, 0), (-1, 0), 11),
-        ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-        ("BACKGROUND", (0, 1), (-1, -1), colors.lightyellow),
-        ("GRID", (0, 0), (-1, -1), 1, colors.black),
-        ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
-        ("FONTSIZE", (0, 1), (-1, -1), 10),
-    ]))
-
-    story.append(energy_table)
-    story.append(Spacer(1, 0.15*inch))
-
-    story.append(Paragraph("DETAILED LOSS BREAKDOWN", heading_style))
-
-    loss_breakdown_data = [
-        ["Loss Category", "Loss (%)", "Power Impact (W)"],
-        ["Geometric (Inactive Area)", f"{loss_values['geometric']:.2f}", f"{-total_cell_power * loss_values['geometric']/100:.2f}"],
-        ["Optical - Glass Reflection", f"{loss_values['glass']:.2f}", f"{-total_cell_power * loss_values['glass']/100:.2f}"],
-        ["Optical - Encapsulant Absorption", f"{loss_values['encapsulant']:.2f}", f"{-total_cell_power * loss_values['encapsulant']/100:.2f}"],
-        ["Optical - Ribbon Shading", f"{loss_values['ribbon']:.2f}", f"{-total_cell_power * loss_values['ribbon']/100:.2f}"],
-        ["Optical Coupling Gain", f"-{loss_values['coupling']:.2f}", f"+{total_cell_power * loss_values['coupling']/100:.2f}"],
-        ["Resistive (Cell + Ribbon)", f"{loss_values['resistive']:.2f}", f"{-total_cell_power * loss_values['resistive']/100:.2f}"],
-        ["Mismatch (Binning)", f"{loss_values['mismatch']:.2f}", f"{-total_cell_power * loss_values['mismatch']/100:.2f}"],
-        ["Junction Box & Cables", f"{loss_values['jb']:.2f}", f"{-total_cell_power * loss_values['jb']/100:.2f}"],
-        ["TOTAL", f"{total_ctm_loss:.2f}", f"{-(total_cell_power - module_pmax):.2f}"]
-    ]
-
-    loss_table = Table(loss_breakdown_data, colWidths=[3.0*inch, 1.5*inch, 1.5*inch])
-    loss_table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1f77b4")),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("FONTSIZE", (0, 0), (-1, 0), 10),
-        ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-        ("BACKGROUND", (0, 1), (-1, -2), colors.lightgrey),
-        ("BACKGROUND", (0, -1), (-1, -1), colors.HexColor("#FFD700")),
-        ("FONTNAME", (0, -1), (-1, -1), "Helvetica-Bold"),
-        ("GRID", (0, 0), (-1, -1), 1, colors.black),
-        ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
-        ("FONTSIZE", (0, 1), (-1, -1), 9),
-    ]))
-
-    story.append(loss_table)
-    story.append(Spacer(1, 0.3*inch))
-
-    story.append(PageBreak())
-    story.append(Paragraph("DISCLAIMER", heading_style))
-
-    disclaimer_full = "This is a DEMO REPORT for reference purposes only. This report has been generated using the CTM Loss Calculator tool and is intended for educational and technical understanding only."
-
-    story.append(Paragraph(disclaimer_full, disclaimer_style))
-    story.append(Spacer(1, 0.3*inch))
-
-    # Footer signature
-    story.append(Paragraph("_" * 80, body_style))
-    story.append(Spacer(1, 0.1*inch))
-
-    signature_text = "<b>CTM Loss Calculator</b> | Reference: Special thanks to <b>Gokul Raam G</b>"
-    story.append(Paragraph(signature_text, body_style))
-
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
+st.markdown("---")
 
 st.markdown("---")
 st.markdown("## Download Report")
@@ -536,19 +370,12 @@ st.markdown("## Download Report")
 col_download1, col_download2 = st.columns([1, 1])
 
 with col_download1:
-    if st.button("Generate PDF Report", use_container_width=True):
-        pdf_buffer = create_pdf_report(total_cell_power, module_pmax, module_efficiency, df_losses, loss_values, total_ctm_loss, ctm_ratio, module_voc, module_isc, module_vmpp, module_impp, annual_energy_total, annual_energy_loss)
-
-        st.download_button(
-            label="Download PDF Report",
-            data=pdf_buffer,
-            file_name=f"CTM_Analysis_{datetime.now().strftime('%d%m%Y_%H%M%S')}.pdf",
-            mime="application/pdf",
-            use_container_width=True
-        )
+    # Built in a worker process and polled, so a slow build doesn't hold up this or other sessions
+    report_button(report_payload(results, module_type=template["name"]), "CTM_Analysis", "single_point")
+timer.mark("report")
 
 with col_download2:
-    csv_data = df_losses.to_csv(index=False)
+    csv_data = loss_table_csv(params_cache_key)
     st.download_button(
         label="Download Loss Data (CSV)",
         data=csv_data,
@@ -556,6 +383,13 @@ with col_download2:
         mime="text/csv",
         use_container_width=True
     )
+timer.mark("csv export")
+
+with st.sidebar.expander("Cache Statistics"):
+    for cache_name, counters in cache_stats().items():
+        st.caption(f"{cache_name.rsplit('.', 1)[-1]}: {counters['hits']} hits / {counters['misses']} misses ({counters['size']}/{counters['maxsize']})")
+
+finish_timing()
 
 st.markdown("---")
 
@@ -0,0 +1,97 @@
+import csv
+import json
+import subprocess
+import sys
+
+import pytest
+
+from ctm.cli import main
+from ctm.model import compute_ctm_point
+from ctm.technology import electrical, load_template
+
+
+def run(capsys, *argv):
+    code = main(list(argv))
+    out, err = capsys.readouterr()
+    return code, out, err
+
+
+def test_calc_defaults_print_one_json_object(capsys):
+    code, out, _ = run(capsys, "calc")
+    assert code == 0
+    assert json.loads(out)["module_pmax"] == pytest.approx(compute_ctm_point()["module_pmax"])
+
+
+def test_calc_set_overrides_every_design(capsys):
+    code, out, _ = run(capsys, "calc", "--set", "num_busbars=16", "--set", "ribbon_width=1.2")
+    assert code == 0
+    expected = compute_ctm_point(num_busbars=16, ribbon_width=1.2)
+    assert json.loads(out)["module_pmax"] == pytest.approx(expected["module_pmax"])
+
+
+@pytest.mark.parametrize("assignment", ["num_busbars", "no_such_input=1", "cell_power=abc"])
+def test_bad_assignment_is_a_usage_error(capsys, assignment):
+    with pytest.raises(SystemExit) as error:
+        main(["calc", "--set", assignment])
+    assert error.value.code == 2
+    assert "argument --set" in capsys.readouterr().err
+
+
+def test_csv_designs_keep_extra_columns_and_match_the_point_model(tmp_path, capsys):
+    params = tmp_path / "designs.csv"
+    params.write_text("sku,cell_power,num_busbars\nA,4.0,12\nB,4.3,16\n")
+    output = tmp_path / "results.csv"
+    assert run(capsys, "calc", "--params", str(params), "-o", str(output))[0] == 0
+    with open(output, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["sku"] for row in rows] == ["A", "B"]
+    expected = compute_ctm_point(cell_power=4.3, num_busbars=16)["module_pmax"]
+    assert float(rows[1]["module_pmax"]) == pytest.approx(expected)
+
+
+def test_template_supplies_defaults_and_warns_out_of_range(capsys):
+    template = load_template("hjt-132")
+    code, out, err = run(capsys, "calc", "--template", "hjt-132", "--set", "cell_power=0.5")
+    assert code == 0
+    expected = compute_ctm_point(**{**template["params"], "cell_power": 0.5}, **electrical(template))
+    assert json.loads(out)["module_pmax"] == pytest.approx(expected["module_pmax"])
+    assert "cell_power=0.5 outside" in err
+
+
+@pytest.mark.parametrize("argv, message", [
+    (["calc", "--template", "no-such-template"], "unknown template"),
+    (["calc", "--params", "missing.json"], "missing.json"),
+])
+def test_errors_exit_1_with_the_command_prefix(capsys, argv, message):
+    code, _, err = run(capsys, *argv)
+    assert code == 1
+    assert err.startswith("ctm calc: ") and message in err
+
+
+def test_empty_design_list_exits_1(tmp_path, capsys):
+    params = tmp_path / "empty.json"
+    params.write_text("[]")
+    assert run(capsys, "calc", "--params", str(params))[0] == 1
+
+
+def test_record_stores_the_runs(tmp_path, capsys):
+    pytest.importorskip("pandas")
+    from ctm.store import ResultsStore
+
+    params = tmp_path / "designs.json"
+    params.write_text(json.dumps([{"cell_power": 4.0}, {"cell_power": 4.2}]))
+    db = str(tmp_path / "runs.db")
+    assert run(capsys, "calc", "--params", str(params), "--template", "perc-144", "--record", db)[0] == 0
+    assert ResultsStore(db).count(source="calc", cell_type="PERC") == 2
+
+
+def test_delegated_command_runs(capsys):
+    code, out, _ = run(capsys, "templates")
+    assert code == 0
+    assert "topcon-144" in out
+
+
+def test_single_design_does_not_import_numpy():
+    script = "import sys; from ctm.cli import main; main(['calc']); print('numpy' in sys.modules, file=sys.stderr)"
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    assert result.stderr.strip() == "False"
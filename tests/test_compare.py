@@ -0,0 +1,61 @@
+import io
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from ctm.compare import (BREAKDOWN_LABELS, SUMMARY_COLUMNS, add_configuration, comparison_frame, delta_frame,
+                         new_workspace, read_workspace, workspace_keys)
+from ctm.model import DEFAULT_PARAMS, INPUT_COLUMNS, compute_ctm_point, stack_ctm_loss
+from ctm.technology import electrical, load_template
+
+
+def workspace(*configurations):
+    frame = new_workspace()
+    for name, params in configurations:
+        frame = add_configuration(frame, name, params)
+    return frame
+
+
+def test_adding_a_name_again_replaces_it():
+    frame = workspace(("A", DEFAULT_PARAMS), ("B", {"num_busbars": 16}), ("A", {"cell_power": 4.3}))
+    assert frame["name"].tolist() == ["B", "A"]
+    assert frame.set_index("name").loc["A", "cell_power"] == 4.3
+    # Inputs a configuration leaves out take the model defaults
+    assert frame.set_index("name").loc["B", "cell_power"] == DEFAULT_PARAMS["cell_power"]
+
+
+def test_read_workspace_fills_defaults_and_rejects_bad_files():
+    frame = read_workspace(io.StringIO("name,cell_power\nA,4.0\nB,4.2\n"), defaults={**DEFAULT_PARAMS, "num_busbars": 16})
+    assert list(frame.columns) == ["name", *INPUT_COLUMNS]
+    assert frame["num_busbars"].tolist() == [16.0, 16.0]
+    for text, message in [("cell_power\n4.0\n", "'name' column"), ("name,sku\nA,1\n", "unknown column"),
+                          ("name\nA\nA\n", "unique")]:
+        with pytest.raises(ValueError, match=message):
+            read_workspace(io.StringIO(text))
+
+
+def test_incomplete_rows_are_left_out():
+    frame = workspace(("A", DEFAULT_PARAMS), ("B", DEFAULT_PARAMS))
+    frame.loc[1, "cell_power"] = float("nan")
+    assert [name for name, _ in workspace_keys(frame)] == ["A"]
+
+
+def test_breakdown_stacks_to_the_unclamped_loss_and_deltas_are_relative():
+    frame = comparison_frame(workspace_keys(workspace(("base", DEFAULT_PARAMS), ("16BB", {"num_busbars": 16}))))
+    assert list(frame.columns) == [*BREAKDOWN_LABELS.values(), *SUMMARY_COLUMNS.values()]
+    for name, params in (("base", {}), ("16BB", {"num_busbars": 16})):
+        result = compute_ctm_point(**params)
+        assert frame.loc[name, list(BREAKDOWN_LABELS.values())].sum() == pytest.approx(stack_ctm_loss(result))
+        assert frame.loc[name, "Module Pmax (Wp)"] == pytest.approx(result["module_pmax"])
+    deltas = delta_frame(frame, "base")
+    assert (deltas.loc["base"] == 0).all()
+    assert deltas.loc["16BB", "Resistive"] < 0
+
+
+def test_template_cell_reaches_the_breakdown():
+    template = load_template("ibc-108")
+    entries = workspace_keys(workspace(("ibc", template["params"])))
+    frame = comparison_frame(entries, **electrical(template))
+    assert frame.loc["ibc", "Ribbon Shading"] == 0
+    assert comparison_frame(entries).loc["ibc", "Ribbon Shading"] > 0
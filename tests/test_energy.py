@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from ctm.energy import TEMPERATURE_COEFFICIENT, main, simulate_yield, template_temperature_coefficient
+from ctm.model import DEFAULT_PARAMS, compute_ctm_cached, params_key
+from ctm.technology import electrical, load_template, template_names
+
+
+@pytest.fixture
+def weather(tmp_path):
+    """Two synthetic days of hourly plane-of-array irradiance and air temperature."""
+    hours = np.arange(48)
+    irradiance = np.maximum(np.sin((hours % 24 - 6) / 12 * np.pi), 0) * 950
+    path = tmp_path / "site.csv"
+    pd.DataFrame({
+        "timestamp": pd.date_range("2025-06-01", periods=48, freq="h").strftime("%Y-%m-%d %H:%M"),
+        "poa_global": irradiance,
+        "temp_air": 20 + 10 * np.sin((hours % 24 - 9) / 24 * 2 * np.pi),
+        "wind_speed": 2.0,
+    }).to_csv(path, index=False)
+    return path
+
+
+def summary(weather, params=DEFAULT_PARAMS, cell=None, **kwargs):
+    result = compute_ctm_cached(params_key(params), **(cell or {}))
+    return simulate_yield(weather, params, cell=cell, **kwargs).summary(result).iloc[0]
+
+
+def test_energy_chain_adds_up(weather):
+    row = summary(weather)
+    assert row["hours"] == 48
+    assert row["cell_energy"] - row["ctm_loss"] - row["low_irradiance_loss"] - row["temperature_loss"] == \
+        pytest.approx(row["energy"])
+    assert summary(weather, temperature_coefficient=0.0)["temperature_loss"] == pytest.approx(0.0, abs=1e-9)
+
+
+def test_chunking_does_not_change_totals(weather):
+    whole, chunked = summary(weather), summary(weather, chunk_rows=7)
+    for name in ("insolation_kwh_m2", "energy", "temperature_loss", "mean_cell_temperature"):
+        assert chunked[name] == pytest.approx(whole[name], rel=1e-12)
+
+
+@pytest.mark.parametrize("key", sorted(template_names()))
+def test_templates_carry_their_temperature_coefficient(key):
+    coefficient = template_temperature_coefficient(key)
+    assert coefficient == load_template(key)["cell"]["temperature_coefficient"]
+    assert -0.6 <= coefficient < 0
+
+
+def test_temperature_loss_scales_with_the_coefficient(weather):
+    template = load_template("hjt-132")
+    cell = electrical(template)
+    hjt = summary(weather, template["params"], cell, temperature_coefficient=template_temperature_coefficient("hjt-132"))
+    topcon = summary(weather, template["params"], cell, temperature_coefficient=TEMPERATURE_COEFFICIENT)
+    assert hjt["temperature_loss"] / topcon["temperature_loss"] == pytest.approx(-0.24 / TEMPERATURE_COEFFICIENT)
+
+
+def test_cli_uses_the_template_coefficient(weather, tmp_path):
+    template = load_template("hjt-132")
+    out = tmp_path / "summary.csv"
+    assert main(["--weather", str(weather), "--template", "hjt-132", "--summary", str(out)]) == 0
+    expected = summary(weather, template["params"], electrical(template),
+                       temperature_coefficient=template["cell"]["temperature_coefficient"])
+    assert pd.read_csv(out).iloc[0]["energy"] == pytest.approx(expected["energy"], rel=1e-9)
+
+    assert main(["--weather", str(weather), "--template", "hjt-132", "--temperature-coefficient", "-0.30",
+                 "--summary", str(out)]) == 0
+    overridden = summary(weather, template["params"], electrical(template), temperature_coefficient=-0.30)
+    assert pd.read_csv(out).iloc[0]["energy"] == pytest.approx(overridden["energy"], rel=1e-9)
+
+
+def test_cli_reports_missing_weather(tmp_path, capsys):
+    assert main(["--weather", str(tmp_path / "missing.csv")]) == 1
+    assert capsys.readouterr().err.startswith("ctm yield: ")
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from ctm.iv import MAX_PHOTOCURRENT_GAIN, diode_parameters, iv_curve, photocurrent_for_power
+from ctm.model import BUSBAR_OPTIONS, DEFAULT_PARAMS, compute_ctm, compute_ctm_point
+from ctm.sweep import SWEEP_PARAMS
+from ctm.technology import electrical, load_template, template_names
+
+IV_INPUTS = ("cell_power", "num_cells", "cell_length", "cell_width", "num_busbars", "ribbon_width",
+             "ribbon_thickness")
+
+
+def test_maximum_power_point_delivers_module_pmax():
+    rng = np.random.default_rng(0)
+    designs = {
+        "cell_power": rng.uniform(4.0, 9.0, 200),
+        "num_cells": rng.choice([108.0, 120.0, 132.0, 144.0], 200),
+        "num_busbars": rng.choice([9.0, 12.0, 16.0, 18.0], 200),
+        "ribbon_width": rng.uniform(0.2, 1.0, 200),
+    }
+    results = compute_ctm(designs)
+    np.testing.assert_allclose(results["module_vmpp"] * results["module_impp"], results["module_pmax"], rtol=1e-6)
+    assert np.all(results["module_vmpp"] < results["module_voc"])
+    assert np.all(results["module_impp"] < results["module_isc"])
+
+
+@pytest.mark.parametrize("key", sorted(template_names()))
+def test_template_cells_deliver_module_pmax(key):
+    template = load_template(key)
+    result = compute_ctm_point(**template["params"], **electrical(template))
+    assert result["module_vmpp"] * result["module_impp"] == pytest.approx(result["module_pmax"], rel=1e-6)
+
+
+def test_iv_curve_peaks_at_module_pmax():
+    result = compute_ctm_point()
+    voltage, current = iv_curve(result["module_pmax"], *(DEFAULT_PARAMS[name] for name in IV_INPUTS), points=20001)
+    assert voltage[0] == pytest.approx(0.0, abs=1e-9)
+    assert current[-1] == pytest.approx(0.0, abs=1e-6)
+    assert current[0] == pytest.approx(result["module_isc"], rel=1e-9)
+    assert voltage[-1] == pytest.approx(result["module_voc"], rel=1e-9)
+    assert (voltage * current).max() == pytest.approx(result["module_pmax"], rel=1e-6)
+
+
+def test_sweep_ranges_deliver_module_pmax_or_flag_the_design():
+    rng = np.random.default_rng(1)
+    n = 100_000
+    designs = {name: rng.uniform(low, high, n) for name, (_, low, high) in SWEEP_PARAMS.items()}
+    designs["num_busbars"] = rng.choice(BUSBAR_OPTIONS, n).astype(float)
+    designs["num_cells"] = rng.choice([108.0, 120.0, 132.0, 144.0, 156.0], n)
+    results = compute_ctm(designs)
+
+    il_cells, i0, a, rs, rsh = diode_parameters(np, *(designs[name] for name in IV_INPUTS))
+    il, _, _ = photocurrent_for_power(np, results["module_pmax"], il_cells, i0, a, rs, rsh)
+    capped = il >= il_cells * MAX_PHOTOCURRENT_GAIN * (1 - 1e-12)
+    flagged = np.isnan(results["module_vmpp"])
+    assert capped.any()
+    # Every design either matches its Pmax or is flagged; only the photocurrent cap flags one
+    assert np.array_equal(flagged, capped)
+    for name in ("module_voc", "module_isc", "module_impp", "module_fill_factor"):
+        assert np.array_equal(np.isnan(results[name]), flagged)
+    np.testing.assert_allclose((results["module_vmpp"] * results["module_impp"])[~flagged],
+                               results["module_pmax"][~flagged], rtol=1e-6)
+
+
+def test_resistive_ribbon_design_is_flagged():
+    result = compute_ctm_point(cell_power=9.99, num_busbars=3, ribbon_width=0.127, ribbon_thickness=0.318)
+    assert np.isnan(result["module_vmpp"]) and np.isnan(result["module_voc"])
+    assert np.isfinite(result["module_pmax"]) and np.isfinite(result["module_series_resistance"])
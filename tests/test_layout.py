@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from ctm.layout import (CELL, GLASS, INTERCONNECT, LAYOUT_OUTPUTS, PREVIEW_RESOLUTION, RIBBON, layout_mask,
+                        layout_metrics, module_layout)
+from ctm.model import DEFAULT_PARAMS
+
+GEOMETRY = tuple(DEFAULT_PARAMS[name] for name in ("num_cells", "cell_length", "cell_width", "num_busbars",
+                                                    "ribbon_width"))
+
+
+def test_default_layout_is_the_sidebar_module():
+    layout = module_layout(*GEOMETRY)
+    assert layout["layout_width"] == pytest.approx(1134.0)
+    assert layout["layout_length"] == pytest.approx(2278.0)
+    assert layout["layout_area"] == pytest.approx(1.134 * 2.278)
+
+
+@pytest.mark.parametrize("num_cells", [144, 143, 120])
+@pytest.mark.parametrize("resolution", [0.5, 0.3])
+def test_areas_are_exact_at_any_resolution(num_cells, resolution):
+    _, cell_length, cell_width, num_busbars, ribbon_width = GEOMETRY
+    layout = module_layout(num_cells, cell_length, cell_width, num_busbars, ribbon_width, resolution)
+    assert layout["active_area"] == pytest.approx(num_cells * cell_length * cell_width / 1e6, rel=1e-9)
+    # Every cell carries num_busbars ribbons across its full width
+    assert layout["ribbon_shading_fraction"] == pytest.approx(num_busbars * ribbon_width / cell_length * 100, rel=1e-9)
+
+
+def test_frame_shadow_weights_the_edge_cells():
+    layout = module_layout(*GEOMETRY)
+    assert 0 < layout["frame_shading_loss"] < 5
+    assert layout["weighted_shading_fraction"] == pytest.approx(layout["ribbon_shading_fraction"], rel=0.05)
+
+
+def test_no_ribbon_width_means_no_shading():
+    num_cells, cell_length, cell_width, num_busbars, _ = GEOMETRY
+    layout = module_layout(num_cells, cell_length, cell_width, num_busbars, 0.0)
+    assert layout["ribbon_shading_fraction"] == 0 and layout["weighted_shading_fraction"] == 0
+    assert layout["active_area"] == pytest.approx(module_layout(*GEOMETRY)["active_area"])
+
+
+def test_vectorized_metrics_match_single_layouts():
+    num_cells = np.array([[120.0], [144.0]])
+    ribbon_width = np.array([0.8, 1.5, 2.0])
+    metrics = layout_metrics(num_cells, 182.2, 91.1, 12, ribbon_width)
+    assert set(metrics) == set(LAYOUT_OUTPUTS)
+    for i, cells in enumerate(num_cells[:, 0]):
+        for j, width in enumerate(ribbon_width):
+            single = module_layout(cells, 182.2, 91.1, 12, width)
+            for name in LAYOUT_OUTPUTS:
+                assert metrics[name][i, j] == pytest.approx(single[name], rel=1e-9)
+
+
+def test_preview_mask_codes():
+    mask = layout_mask(*GEOMETRY)
+    assert set(np.unique(mask)) == {GLASS, CELL, RIBBON, INTERCONNECT}
+    layout = module_layout(*GEOMETRY)
+    active_pixels = np.isin(mask, (CELL, RIBBON)).sum() * PREVIEW_RESOLUTION ** 2 / 1e6
+    assert active_pixels == pytest.approx(layout["active_area"], rel=0.02)
+    assert (mask[0] == GLASS).all() and (mask[:, 0] == GLASS).all()
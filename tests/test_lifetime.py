@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from ctm.lifetime import (LETID_ONSET_YEARS, LETID_RECOVERY_YEARS, SHARD_SIZE, _letid_shape, draw_fleet, main,
+                          simulate_lifetime)
+from ctm.model import DEFAULT_PARAMS, compute_ctm_point
+
+NO_SPREAD = {"lid": 0.0, "lid_spread": 0.0, "letid": 0.0, "letid_spread": 0.0, "rate": 0.5, "rate_spread": 0.0}
+
+
+def test_same_seed_reproduces_the_projection():
+    first, first_summary = simulate_lifetime(DEFAULT_PARAMS, 5000, 10, seed=4)
+    again, again_summary = simulate_lifetime(DEFAULT_PARAMS, 5000, 10, seed=4)
+    pd.testing.assert_frame_equal(first, again)
+    assert first_summary == again_summary
+    other, _ = simulate_lifetime(DEFAULT_PARAMS, 5000, 10, seed=5)
+    assert not np.allclose(first["pmax_p90"], other["pmax_p90"])
+
+
+def test_fleet_shards_do_not_depend_on_the_fleet_size():
+    small = draw_fleet(SHARD_SIZE, seed=2)
+    large = draw_fleet(SHARD_SIZE + 1000, seed=2)
+    for part, whole in zip(small, large):
+        np.testing.assert_array_equal(part, whole[:SHARD_SIZE])
+        assert (whole >= 0).all()
+
+
+def test_letid_peaks_at_one_and_regenerates():
+    peak = LETID_ONSET_YEARS * np.log1p(LETID_RECOVERY_YEARS / LETID_ONSET_YEARS)
+    assert _letid_shape(0.0) == 0
+    assert _letid_shape(peak) == pytest.approx(1.0)
+    assert _letid_shape(30.0) < _letid_shape(peak)
+
+
+def test_linear_wear_alone_is_exact():
+    yearly, summary = simulate_lifetime(DEFAULT_PARAMS, 100, 25, degradation=NO_SPREAD)
+    result = compute_ctm_point(**DEFAULT_PARAMS)
+    years = yearly["year"].to_numpy()
+    np.testing.assert_allclose(yearly["pmax_mean"], result["module_pmax"] * (1 - 0.005 * years))
+    np.testing.assert_allclose(yearly["pmax_p90"], yearly["pmax_p50"])
+    np.testing.assert_allclose(yearly["energy_mean"], result["annual_energy_total"] * (1 - 0.005 * (years - 0.5)))
+    assert summary["lifetime_energy_mean"] == pytest.approx(yearly["energy_mean"].sum())
+
+
+def test_percentiles_and_loss_split():
+    yearly, summary = simulate_lifetime(DEFAULT_PARAMS, 20_000, 30, seed=1)
+    assert (yearly["pmax_p90"] <= yearly["pmax_p50"]).all()
+    assert summary["lifetime_energy_p90"] <= summary["lifetime_energy_p50"]
+    assert summary["end_of_life_pmax_p90"] < compute_ctm_point(**DEFAULT_PARAMS)["module_pmax"]
+    assert 0 < summary["ctm_loss_share"] < 100
+    assert summary["fleet_lifetime_energy"] == pytest.approx(summary["lifetime_energy_mean"] * 20_000 / 1000)
+
+
+def test_cli_writes_yearly_and_summary_files(tmp_path, capsys):
+    output, summary = tmp_path / "yearly.csv", tmp_path / "summary.csv"
+    argv = ["--modules", "1000", "--years", "5", "--seed", "3", "-o", str(output), "--summary", str(summary)]
+    assert main(argv) == 0
+    assert len(pd.read_csv(output)) == 5
+    assert pd.read_csv(summary)["modules"].iloc[0] == 1000
+
+
+def test_cli_errors_exit_1(tmp_path, capsys):
+    assert main(["--modules", "0"]) == 1
+    assert main(["--years", "2", "--modules", "10", "-o", str(tmp_path / "missing" / "yearly.csv")]) == 1
+    assert all(line.startswith("ctm lifetime: ") for line in capsys.readouterr().err.splitlines())
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from ctm.lots import analyze_chunk, analyze_lot, cell_power_totals, main
+from ctm.model import DEFAULT_PARAMS, compute_ctm_point
+
+
+@pytest.fixture
+def lot(tmp_path):
+    """Four modules of 144 cells at 4.1 W, plus one module with no cells and one with a zero cell total."""
+    modules = pd.DataFrame({
+        "module_id": ["M1", "M2", "M3", "M4", "M5", "M6"],
+        "module_pmax": [580.0, 582.0, 579.0, 581.0, 580.0, 580.0],
+        "shift": ["A", "A", "B", "B", "B", "A"],
+        "bom": ["X", "Y", "X", "Y", "X", "Y"],
+    })
+    ids = np.repeat(["M1", "M2", "M3", "M4", "M6"], 144)
+    cells = pd.DataFrame({"module_id": ids, "cell_pmax": np.where(ids == "M6", 0.0, 4.1)})
+    modules_path, cells_path = tmp_path / "modules.csv", tmp_path / "cells.csv"
+    modules.to_csv(modules_path, index=False)
+    cells.to_csv(cells_path, index=False)
+    return modules_path, cells_path
+
+
+def test_cell_totals_join_every_cell_of_a_module_across_chunks(lot):
+    _, cells_path = lot
+    totals = cell_power_totals(cells_path, chunk_rows=100)
+    assert sorted(totals.index) == ["M1", "M2", "M3", "M4", "M6"]
+    assert totals["count"].tolist() == [144] * 5
+    assert totals.loc["M1", "sum"] == pytest.approx(144 * 4.1)
+
+
+def test_unscored_modules_are_counted_per_group(lot):
+    modules_path, cells_path = lot
+    aggregator = analyze_lot(modules_path, cells_path, chunk_rows=4)
+    assert aggregator.dropped == 2
+    summary = aggregator.summary().set_index(["group", "value"])
+    assert summary.loc[("lot", "all"), "modules"] == 4
+    assert summary.loc[("lot", "all"), "dropped_modules"] == 2
+    assert summary.loc[("shift", "A"), "dropped_modules"] == 1
+    assert summary.loc[("shift", "B"), "dropped_modules"] == 1
+    assert summary.loc[("bom", "X"), "modules"] == 2
+
+
+def test_measured_loss_matches_the_flash_data(lot):
+    modules_path, cells_path = lot
+    modules = pd.read_csv(modules_path)
+    results, dropped = analyze_chunk(modules, cell_power_totals(cells_path))
+    assert dropped["module_id"].tolist() == ["M5", "M6"]
+    assert results["measured_ctm_loss"].to_numpy() == pytest.approx((1 - modules["module_pmax"][:4] / (144 * 4.1)) * 100)
+    modeled = compute_ctm_point(**{**DEFAULT_PARAMS, "cell_power": 4.1, "num_cells": 144})
+    assert results["modeled_module_pmax"].iloc[0] == pytest.approx(modeled["module_pmax"])
+
+
+def test_chunking_does_not_change_the_summary(lot):
+    modules_path, cells_path = lot
+    whole = analyze_lot(modules_path, cells_path).summary()
+    chunked = analyze_lot(modules_path, cells_path, chunk_rows=1).summary()
+    key = ["group", "value"]
+    pd.testing.assert_frame_equal(whole.sort_values(key, ignore_index=True), chunked.sort_values(key, ignore_index=True))
+
+
+def test_cli_reports_dropped_modules_on_stderr(lot, tmp_path, capsys):
+    modules_path, cells_path = lot
+    summary = tmp_path / "summary.csv"
+    assert main(["--modules", str(modules_path), "--cells", str(cells_path), "--summary", str(summary)]) == 0
+    assert "dropped 2 module(s)" in capsys.readouterr().err
+    assert "dropped_modules" in pd.read_csv(summary).columns
+
+
+def test_cli_without_cell_data_fails_cleanly(lot, capsys):
+    modules_path, _ = lot
+    assert main(["--modules", str(modules_path)]) == 1
+    assert capsys.readouterr().err.startswith("ctm lot: ")
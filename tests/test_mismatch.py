@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from ctm.mismatch import SHARD_SIZE, module_mismatch, sample_cell_currents, simulate_mismatch, summarize
+from ctm.technology import electrical, load_template
+
+N_TRIALS = 2 * SHARD_SIZE + 100
+
+
+def test_same_seed_reproduces_the_sample():
+    first = simulate_mismatch(num_cells=144, tolerance=1.5, n_trials=N_TRIALS, seed=7)
+    np.testing.assert_array_equal(first, simulate_mismatch(num_cells=144, tolerance=1.5, n_trials=N_TRIALS, seed=7))
+    assert not np.array_equal(first, simulate_mismatch(num_cells=144, tolerance=1.5, n_trials=N_TRIALS, seed=8))
+    assert first.shape == (N_TRIALS,)
+
+
+def test_workers_do_not_change_the_sample():
+    serial = simulate_mismatch(num_cells=120, tolerance=2.0, n_trials=N_TRIALS, seed=3, workers=1)
+    parallel = simulate_mismatch(num_cells=120, tolerance=2.0, n_trials=N_TRIALS, seed=3, workers=2)
+    np.testing.assert_array_equal(serial, parallel)
+
+
+def test_matched_cells_lose_nothing():
+    losses = simulate_mismatch(num_cells=144, tolerance=0.0, n_trials=200)
+    assert np.abs(losses).max() < 1e-6
+    flashed = simulate_mismatch(num_cells=144, n_trials=200, flash_values=[4.1] * 10)
+    assert np.abs(flashed).max() < 1e-6
+
+
+def test_loss_grows_with_the_binning_tolerance():
+    means = [summarize(simulate_mismatch(num_cells=144, tolerance=tolerance, n_trials=2000, seed=1))["mean"]
+             for tolerance in (0.5, 1.5, 3.0)]
+    assert 0 < means[0] < means[1] < means[2]
+
+
+def test_one_weak_cell_costs_at_most_its_substring():
+    currents = np.ones((1, 144))
+    currents[0, 10] = 0.5
+    loss = module_mismatch(currents)[0]
+    # The weak pair either limits the string or its substring is bypassed
+    assert 0 < loss < 100 / 3 + 1
+
+
+def test_template_cell_changes_the_loss():
+    rng = np.random.default_rng(0)
+    currents = sample_cell_currents(rng, 500, 132, 2.0)
+    cell = electrical(load_template("hjt-132"))
+    hjt = module_mismatch(currents, cell_voc=cell["cell_voc"], ideality=cell["ideality"])
+    assert not np.allclose(hjt, module_mismatch(currents))
+    # The simulation accepts the full template cell, front-ribbon flag included
+    assert simulate_mismatch(num_cells=132, n_trials=10, cell=cell).shape == (10,)
+
+
+def test_summary_percentiles_are_ordered():
+    summary = summarize(simulate_mismatch(num_cells=144, tolerance=1.5, n_trials=1000))
+    assert summary["p5"] <= summary["p50"] <= summary["p95"]
+    assert summary["trials"] == 1000
+
+
+def test_invalid_inputs_are_rejected():
+    with pytest.raises(ValueError, match="even number"):
+        simulate_mismatch(num_cells=143, n_trials=10)
+    with pytest.raises(ValueError, match="distribution"):
+        sample_cell_currents(np.random.default_rng(0), 1, 2, 1.0, "triangular")
@@ -0,0 +1,111 @@
+import math
+
+import numpy as np
+import pytest
+
+from ctm.model import (
+    DEFAULT_PARAMS,
+    INPUT_COLUMNS,
+    OUTPUT_COLUMNS,
+    compute_ctm,
+    compute_ctm_cached,
+    compute_ctm_point,
+    params_key,
+    stack_ctm_loss,
+)
+from ctm.sweep import SWEEP_PARAMS, sweep_values
+
+
+def baseline_ctm(cell_power, cell_efficiency, num_cells, module_area, cell_length, cell_width, glass_transmission,
+                 encapsulant_transmission, num_busbars, ribbon_width, ribbon_thickness, cell_binning_tolerance,
+                 junction_box_loss, annual_irradiance):
+    """STEP 1-9 as scalar code, transcribed from the original single-design app."""
+    cell_area_m2 = (cell_length * cell_width) / 1e6
+    total_cell_power = cell_power * num_cells
+    geometric_loss = (1 - (num_cells * cell_area_m2 / module_area)) * 100
+    glass_reflection_loss = (1 - glass_transmission / 100) * 100
+    encapsulant_absorption_loss = (1 - encapsulant_transmission / 100) * 100
+    ribbon_coverage = (ribbon_width * num_busbars) / (math.sqrt(cell_length * cell_width / 100))
+    ribbon_shading_loss = max(0, ribbon_coverage * 0.55)
+    net_optical_loss = glass_reflection_loss + encapsulant_absorption_loss + ribbon_shading_loss - 1.5
+    resistive_loss = 0.35 * (5 / num_busbars) ** 1.2
+    ribbon_resistance_factor = (1.7e-8 * 0.156) / (ribbon_width * ribbon_thickness / 1e6)
+    total_resistive_loss = resistive_loss + 0.1 * (ribbon_resistance_factor / 0.0001)
+    mismatch_loss = 0.15 + (cell_binning_tolerance / 2.0) * 0.1
+    total_ctm_loss = (geometric_loss + net_optical_loss + total_resistive_loss + mismatch_loss
+                      + junction_box_loss)
+    total_ctm_loss = max(1.0, min(total_ctm_loss, 2.5))
+    module_pmax = total_cell_power * (1 - total_ctm_loss / 100)
+    annual_energy_total = (module_pmax / 1000) * annual_irradiance
+    return {
+        "total_cell_power": total_cell_power,
+        "geometric_loss": geometric_loss,
+        "glass_reflection_loss": glass_reflection_loss,
+        "encapsulant_absorption_loss": encapsulant_absorption_loss,
+        "ribbon_shading_loss": ribbon_shading_loss,
+        "net_optical_loss": net_optical_loss,
+        "total_resistive_loss": total_resistive_loss,
+        "mismatch_loss": mismatch_loss,
+        "total_ctm_loss": total_ctm_loss,
+        "ctm_ratio": 1 - total_ctm_loss / 100,
+        "module_pmax": module_pmax,
+        "module_efficiency": (module_pmax / (module_area * 1000)) * 100,
+        "annual_energy_total": annual_energy_total,
+        "annual_energy_loss": annual_energy_total * (total_ctm_loss / 100),
+    }
+
+
+def random_designs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    designs = {}
+    for name, (_, low, high) in SWEEP_PARAMS.items():
+        if name in ("num_cells", "num_busbars"):
+            designs[name] = rng.choice(sweep_values(name, low, high, 31), n)
+        else:
+            designs[name] = rng.uniform(low, high, n)
+    return designs
+
+
+def test_compute_ctm_matches_baseline_formulas():
+    designs = random_designs(500)
+    results = compute_ctm(designs)
+    losses = stack_ctm_loss(results)
+    # The sample covers both clamp bounds and the unclamped range between them
+    assert (losses < 1.0).any() and (losses > 2.5).any() and ((losses > 1.0) & (losses < 2.5)).any()
+    for i in range(500):
+        expected = baseline_ctm(**{name: float(designs[name][i]) for name in INPUT_COLUMNS})
+        for name, value in expected.items():
+            assert results[name][i] == pytest.approx(value, rel=1e-12, abs=1e-12), name
+
+
+def test_vectorized_matches_scalar_and_cached():
+    designs = random_designs(50, seed=1)
+    results = compute_ctm(designs)
+    for i in range(50):
+        params = {name: float(designs[name][i]) for name in INPUT_COLUMNS}
+        point = compute_ctm_point(**params)
+        cached = compute_ctm_cached(params_key(params))
+        for name in OUTPUT_COLUMNS:
+            # Designs whose I-V curve cannot deliver their Pmax have NaN electrical outputs
+            assert results[name][i] == pytest.approx(point[name], rel=1e-9, nan_ok=True), name
+            assert cached[name] == pytest.approx(point[name], rel=0, abs=0, nan_ok=True), name
+
+
+def test_dataframe_designs_get_output_columns():
+    pd = pytest.importorskip("pandas")
+
+    frame = pd.DataFrame(random_designs(20, seed=2))
+    result = compute_ctm(frame)
+    assert list(result.columns) == [*frame.columns, *OUTPUT_COLUMNS]
+    assert np.array_equal(result["module_pmax"].to_numpy(), compute_ctm(random_designs(20, seed=2))["module_pmax"])
+
+
+def test_defaults_and_overrides():
+    assert compute_ctm_point() == compute_ctm_point(**DEFAULT_PARAMS)
+    broadcast = compute_ctm(num_busbars=np.array([9.0, 12.0, 16.0]))
+    assert broadcast["module_pmax"].shape == (3,)
+    assert compute_ctm_point(mismatch_loss=0.5)["mismatch_loss"] == 0.5
+    with pytest.raises(TypeError):
+        compute_ctm_point(busbars=12)
+    with pytest.raises(TypeError):
+        params_key({"busbars": 12})
@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("scipy")
+
+from ctm.iv import CELL_GAP
+from ctm.network import (
+    BUSBAR_CONTACT_RESISTANCE,
+    EMITTER_SHEET_RESISTANCE,
+    FINGER_LINE_RESISTANCE,
+    FINGER_PITCH,
+    FINGER_SEGMENTS,
+    LOSS_CATEGORIES,
+    ZERO_BUSBAR_CONTACT_RESISTANCE,
+    cell_grid,
+    network_losses,
+    strip_losses,
+)
+
+
+def dense_strip(busbar_pitch, cell_width, contact_resistance, ribbon_conductance, profile):
+    """Per-category branch I²R and injected power of one strip, from one dense nodal solve.
+
+    Built branch by branch from the strip's geometry, independently of the
+    factorized and reduced solve in ``ctm.network``. Node -1 is the next cell.
+    """
+    rows = max(1, int(round(cell_width / FINGER_PITCH)))
+    columns = FINGER_SEGMENTS + 1
+    dx, pitch = busbar_pitch / 2 / FINGER_SEGMENTS, cell_width / rows
+    node_area = dx * pitch / 100
+
+    def grid_node(row, i):
+        return row * columns + i
+
+    def ribbon_node(k):
+        return rows * columns + k
+
+    branches = []
+    for row in range(rows):
+        for i in range(FINGER_SEGMENTS):
+            branches.append((grid_node(row, i), grid_node(row, i + 1), 1 / (FINGER_LINE_RESISTANCE * dx / 10), 0))
+    for row in range(rows - 1):
+        for i in range(columns):
+            width = dx / 10 / (2 if i in (0, columns - 1) else 1)
+            branches.append((grid_node(row, i), grid_node(row + 1, i), width / (pitch / 10) / EMITTER_SHEET_RESISTANCE,
+                             1))
+    for row in range(rows):
+        branches.append((grid_node(row, 0), ribbon_node(row), 1 / (2 * contact_resistance), 2))
+    for k in range(rows):
+        length = pitch / 2 if k == rows - 1 else pitch
+        branches.append((ribbon_node(k), ribbon_node(k + 1), ribbon_conductance / length, 3))
+    branches.append((ribbon_node(rows), -1, ribbon_conductance / CELL_GAP, 4))
+
+    n = rows * columns + rows + 1
+    matrix = np.zeros((n, n))
+    for a, b, g, _ in branches:
+        matrix[a, a] += g
+        if b >= 0:
+            matrix[b, b] += g
+            matrix[a, b] -= g
+            matrix[b, a] -= g
+    injected = np.zeros(n)
+    for row in range(rows):
+        for i in range(columns):
+            injected[grid_node(row, i)] = profile[row] * node_area / (2 if i in (0, columns - 1) else 1)
+    voltages = np.linalg.solve(matrix, injected)
+
+    losses = np.zeros(len(LOSS_CATEGORIES))
+    for a, b, g, category in branches:
+        drop = voltages[a] - (voltages[b] if b >= 0 else 0.0)
+        losses[category] += g * drop ** 2
+    return losses, injected @ voltages, rows, pitch, node_area
+
+
+@pytest.mark.parametrize("busbar_pitch, cell_width, contact_resistance, ribbon_conductance", [
+    (182 / 12, 91.0, BUSBAR_CONTACT_RESISTANCE, 2.5),
+    (182 / 16, 105.0, BUSBAR_CONTACT_RESISTANCE, 0.8),
+    (210 / 20, 105.0, ZERO_BUSBAR_CONTACT_RESISTANCE, 0.3),
+])
+def test_strip_losses_match_dense_solve(busbar_pitch, cell_width, contact_resistance, ribbon_conductance):
+    grid = cell_grid(busbar_pitch, cell_width, contact_resistance)
+    rows = grid[6]
+    rng = np.random.default_rng(0)
+    profiles = np.vstack([np.ones(rows), rng.uniform(0.5, 1.5, rows)])
+    losses = strip_losses(grid, np.array([ribbon_conductance, 2 * ribbon_conductance]), profiles)
+    assert losses.shape == (2, 2, len(LOSS_CATEGORIES))
+
+    for r, conductance in enumerate((ribbon_conductance, 2 * ribbon_conductance)):
+        for p, profile in enumerate(profiles):
+            expected, power, rows, pitch, node_area = dense_strip(busbar_pitch, cell_width, contact_resistance,
+                                                                  conductance, profile)
+            # The analytic lateral emitter term is not part of the branch network
+            lateral = EMITTER_SHEET_RESISTANCE * (pitch / 10) ** 2 / 12 * FINGER_SEGMENTS * node_area
+            actual = losses[r, p].copy()
+            actual[1] -= lateral * (profile ** 2).sum()
+            np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-15)
+            assert actual.sum() == pytest.approx(power, rel=1e-9)
+
+
+def test_network_losses_scale_with_current_density_squared():
+    base = network_losses(5.5, 144, 182.0, 91.0, 12, 0.3, 0.12)
+    doubled = network_losses(11.0, 144, 182.0, 91.0, 12, 0.3, 0.12)
+    for name in LOSS_CATEGORIES:
+        assert doubled[name] == pytest.approx(4 * base[name], rel=1e-12)
+    assert doubled["network_series_resistance"] == pytest.approx(base["network_series_resistance"], rel=1e-12)
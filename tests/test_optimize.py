@@ -0,0 +1,79 @@
+import itertools
+import math
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pandas")
+
+from ctm.model import DEFAULT_PARAMS, compute_ctm_point, stack_ctm_loss
+from ctm.optimize import main, optimize_bom, pareto_mask
+
+SMALL_CATALOG = {
+    "num_busbars": {9: 0.10, 12: 0.18, 16: 0.30},
+    "ribbon_width": {0.3: 0.10, 0.9: 0.30, 1.5: 0.50},
+    "glass_transmission": {91.0: 0.0, 94.0: 0.90},
+    "cell_binning_tolerance": {1.0: 0.60, 5.0: 0.0},
+}
+
+
+def brute_force(option_costs, base_params=DEFAULT_PARAMS):
+    names = list(option_costs)
+    designs = []
+    for choice in itertools.product(*(option_costs[name].items() for name in names)):
+        params = {**base_params, **{name: value for name, (value, _) in zip(names, choice)}}
+        result = compute_ctm_point(**params)
+        designs.append((sum(cost for _, cost in choice), result["module_pmax"], stack_ctm_loss(result)))
+    return designs
+
+
+def test_pareto_mask_keeps_non_dominated():
+    cost = np.array([1.0, 2.0, 2.0, 3.0, 4.0])
+    loss = np.array([5.0, 3.0, 4.0, 3.0, 1.0])
+    assert pareto_mask(cost, loss).tolist() == [True, True, False, False, True]
+
+
+def test_front_matches_brute_force():
+    front, evaluated = optimize_bom(DEFAULT_PARAMS, SMALL_CATALOG, workers=1)
+    designs = brute_force(SMALL_CATALOG)
+    assert evaluated == len(designs) == 36
+    for cost, _, stack in designs:
+        # No design is strictly better than the front in both cost and loss
+        better = (front["cost"] <= cost) & (front["stack_ctm_loss"] <= stack + 1e-12)
+        assert better.any()
+    assert list(front["cost"]) == sorted(front["cost"])
+
+
+def test_cheapest_design_meeting_the_target():
+    designs = brute_force(SMALL_CATALOG)
+    target = sorted(pmax for _, pmax, _ in designs)[len(designs) // 2]
+    front, _ = optimize_bom(DEFAULT_PARAMS, SMALL_CATALOG, target_pmax=target, workers=1)
+    best = front[front["meets_target"]].iloc[0]
+    assert best["cost"] == pytest.approx(min(cost for cost, pmax, _ in designs if pmax >= target))
+    assert best["module_pmax"] >= target
+
+    front, _ = optimize_bom(DEFAULT_PARAMS, SMALL_CATALOG, target_pmax=max(p for _, p, _ in designs) + 0.1, workers=1)
+    assert not front["meets_target"].any()
+
+
+def test_default_ui_target_is_reachable():
+    # The Optimizer mode defaults its target to the sidebar design's Pmax, rounded down to 0.1 W
+    pmax = compute_ctm_point()["module_pmax"]
+    front, _ = optimize_bom(DEFAULT_PARAMS, target_pmax=math.floor(pmax * 10) / 10, workers=1)
+    assert front["meets_target"].any()
+
+
+def test_population_search_is_seeded():
+    first, evaluated = optimize_bom(DEFAULT_PARAMS, max_evaluations=2000, workers=1, seed=3)
+    second, _ = optimize_bom(DEFAULT_PARAMS, max_evaluations=2000, workers=1, seed=3)
+    assert evaluated < 24_000  # the full default catalog
+    assert first.equals(second)
+
+
+def test_cli_exit_codes(tmp_path, capsys):
+    output = tmp_path / "front.csv"
+    assert main(["--target-pmax", "500", "--workers", "1", "-o", str(output)]) == 0
+    assert "cheapest meeting the target" in capsys.readouterr().err
+    assert output.read_text().startswith("num_busbars,")
+    assert main(["--costs", str(tmp_path / "missing.json")]) == 1
+    assert capsys.readouterr().err.startswith("ctm optimize: ")
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from ctm.cli import main, report_filenames
+from ctm.model import compute_ctm_point
+
+report = pytest.importorskip("ctm.report")
+pytest.importorskip("reportlab")
+
+
+def test_unique_labels_keep_their_names():
+    names, duplicates = report_filenames(["A-1", "B 2"])
+    assert names == ["CTM_Analysis_A-1.pdf", "CTM_Analysis_B_2.pdf"]
+    assert duplicates == []
+
+
+def test_clashing_labels_get_their_row_number():
+    # "a/b" and "a_b" sanitize to the same name
+    names, duplicates = report_filenames(["sku", "a/b", "sku", "a_b", "other"])
+    assert names == ["CTM_Analysis_sku_1.pdf", "CTM_Analysis_a_b_2.pdf", "CTM_Analysis_sku_3.pdf",
+                     "CTM_Analysis_a_b_4.pdf", "CTM_Analysis_other.pdf"]
+    assert duplicates == ["CTM_Analysis_sku.pdf", "CTM_Analysis_a_b.pdf"]
+
+
+def test_suffixed_names_never_meet_another_label():
+    names, _ = report_filenames(["x", "x", "x_1"])
+    assert len(set(names)) == 3
+
+
+def test_cli_writes_one_pdf_per_design_despite_duplicate_labels(tmp_path, capsys):
+    params = tmp_path / "designs.json"
+    params.write_text(json.dumps([{"sku": "P1", "cell_power": 4.1}, {"sku": "P1", "cell_power": 4.2},
+                                  {"sku": "P2"}]))
+    out_dir = tmp_path / "reports"
+    assert main(["report", "--params", str(params), "--out-dir", str(out_dir), "--workers", "1"]) == 0
+    written = sorted(path.name for path in out_dir.iterdir())
+    assert written == ["CTM_Analysis_P1_1.pdf", "CTM_Analysis_P1_2.pdf", "CTM_Analysis_P2.pdf"]
+    assert all((out_dir / name).read_bytes().startswith(b"%PDF") for name in written)
+    assert "CTM_Analysis_P1.pdf" in capsys.readouterr().err
+
+
+def test_missing_params_file_exits_with_an_error(tmp_path, capsys):
+    assert main(["report", "--params", str(tmp_path / "missing.csv"), "--out-dir", str(tmp_path)]) == 1
+    assert capsys.readouterr().err.startswith("ctm report: ")
+
+
+def test_payload_carries_the_label_and_template_name():
+    payloads = report.payloads_for_designs([{"cell_power": 4.0}], ["SKU-1"], "HJT")
+    assert payloads[0]["label"] == "SKU-1"
+    assert payloads[0]["module_type"] == "HJT"
+    assert payloads[0]["module_pmax"] == pytest.approx(compute_ctm_point(cell_power=4.0)["module_pmax"])
+
+
+def test_infeasible_design_still_renders():
+    result = compute_ctm_point(cell_power=9.99, num_busbars=3, ribbon_width=0.127, ribbon_thickness=0.318)
+    assert report.render_report(report.report_payload(result)).startswith(b"%PDF")
@@ -0,0 +1,67 @@
+import asyncio
+import json
+
+import pytest
+
+from ctm.model import OUTPUT_COLUMNS, compute_ctm_point
+from ctm.service import CTMService
+
+
+def request(method, path, body=b""):
+    """``(status, decoded JSON)`` of one request through a fresh app."""
+    async def call():
+        app = CTMService(workers=1)
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        try:
+            await app({"type": "http", "method": method, "path": path}, receive, send)
+        finally:
+            app.close()
+        return sent[0]["status"], json.loads(sent[1]["body"])
+
+    return asyncio.run(call())
+
+
+def test_point_matches_model():
+    status, outputs = request("POST", "/ctm", b'{"num_busbars": 12}')
+    assert status == 200
+    expected = compute_ctm_point(num_busbars=12)
+    assert outputs == pytest.approx({name: expected[name] for name in OUTPUT_COLUMNS})
+
+
+@pytest.mark.parametrize("body", [
+    b'{"cell_power": NaN}',
+    b'{"cell_power": Infinity}',
+    b'{"cell_power": -Infinity}',
+    b'{"module_area": 1e400}',
+    b'{"module_area": 0}',
+    b'{"cell_power": "five"}',
+    b'{"busbars": 12}',
+    b'{"template": "nope"}',
+    b'{"template": 3}',
+    b'[1, 2]',
+    b'{"cell_power": ',
+])
+def test_point_rejects_bad_input(body):
+    status, response = request("POST", "/ctm", body)
+    assert status == 400
+    assert "error" in response
+
+
+@pytest.mark.parametrize("body", [b'[]', b'{}', b'[{"cell_power": NaN}]', b'[{}, 3]', b'{"designs": "x"}'])
+def test_batch_rejects_bad_input(body):
+    status, response = request("POST", "/ctm/batch", body)
+    assert status == 400
+    assert "error" in response
+
+
+def test_unknown_route_and_method():
+    assert request("GET", "/nope")[0] == 404
+    assert request("GET", "/ctm")[0] == 405
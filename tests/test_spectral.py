@@ -0,0 +1,68 @@
+import io
+
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from ctm.model import DEFAULT_PARAMS
+from ctm.spectral import (ENCAPSULANT_LIBRARY, GLASS_LIBRARY, WAVELENGTHS, current_weights, read_curves,
+                          stack_optics, stack_table)
+from ctm.technology import electrical, load_template, template_eqe
+
+
+def test_current_weights_are_a_distribution():
+    weights = current_weights()
+    assert weights.shape == WAVELENGTHS.shape
+    assert weights.min() >= 0
+    assert weights.sum() == pytest.approx(1.0)
+
+
+def test_flat_curves_give_their_own_transmission():
+    flat = np.ones_like(WAVELENGTHS)
+    optics = stack_optics(0.9 * flat, 0.95 * flat, reflectance=np.zeros_like(WAVELENGTHS))
+    assert optics["glass_transmission"][0, 0] == pytest.approx(90.0)
+    assert optics["encapsulant_transmission"][0, 0] == pytest.approx(95.0)
+    assert optics["optical_coupling_gain"][0, 0] == pytest.approx(0.0, abs=1e-12)
+    assert optics["stack_current_loss"][0, 0] == pytest.approx((1 - 0.9 * 0.95) * 100)
+
+
+def test_every_pair_matches_its_own_evaluation():
+    glass, encapsulant = np.array(list(GLASS_LIBRARY.values())), np.array(list(ENCAPSULANT_LIBRARY.values()))
+    optics = stack_optics(glass, encapsulant)
+    assert optics["encapsulant_transmission"].shape == (len(glass), len(encapsulant))
+    for i, g in enumerate(glass):
+        for j, e in enumerate(encapsulant):
+            single = stack_optics(g, e)
+            for name, values in optics.items():
+                assert values[i, j] == pytest.approx(single[name][0, 0], rel=1e-12)
+    # Recaptured reflection lifts every stack
+    assert (optics["optical_coupling_gain"] > 0).all()
+
+
+def test_read_curves_converts_percent_and_holds_the_ends_flat():
+    curves = read_curves(io.StringIO("wavelength_nm,glass,film\n400,90,0.5\n800,92,0.7\n"))
+    assert curves["glass"][0] == pytest.approx(0.90) and curves["glass"][-1] == pytest.approx(0.92)
+    assert curves["film"][np.searchsorted(WAVELENGTHS, 600)] == pytest.approx(0.6)
+    with pytest.raises(ValueError, match="no curve columns"):
+        read_curves(io.StringIO("wavelength_nm\n400\n"))
+
+
+def test_stack_table_ranks_every_combination():
+    table = stack_table(DEFAULT_PARAMS, GLASS_LIBRARY, ENCAPSULANT_LIBRARY)
+    assert len(table) == len(GLASS_LIBRARY) * len(ENCAPSULANT_LIBRARY)
+    assert table["stack_current_loss"].is_monotonic_increasing
+    # The uncapped loss stack tells the stacks apart
+    assert table["stack_module_pmax"].nunique() == len(table)
+    uncoated = table[table["glass"] == "Uncoated glass 3.2 mm"]
+    assert (uncoated["stack_ctm_loss"].min() > table[table["glass"] != "Uncoated glass 3.2 mm"]["stack_ctm_loss"]).all()
+
+
+def test_template_eqe_and_cell_feed_the_table():
+    template = load_template("hjt-132")
+    eqe = template_eqe("hjt-132")
+    assert eqe.shape == WAVELENGTHS.shape and 0 < eqe.max() <= 1
+    table = stack_table(template["params"], GLASS_LIBRARY, ENCAPSULANT_LIBRARY, eqe=eqe, cell=electrical(template))
+    default = stack_table(template["params"], GLASS_LIBRARY, ENCAPSULANT_LIBRARY)
+    assert not np.allclose(table.sort_values(["glass", "encapsulant"])["stack_current_loss"],
+                           default.sort_values(["glass", "encapsulant"])["stack_current_loss"])
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+pa = pytest.importorskip("pyarrow")
+
+import ctm.store
+from ctm.model import DEFAULT_PARAMS, compute_ctm, compute_ctm_point
+from ctm.store import RUN_COLUMNS, ResultsStore, default_store, main
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Three TOPCon runs with 12 busbars on 1 Jan 2026, one HJT run with 16 on 2 Jan."""
+    store = ResultsStore(str(tmp_path / "runs.db"))
+    designs = {**{name: np.full(3, value, dtype=np.float64) for name, value in DEFAULT_PARAMS.items()},
+               "cell_power": np.array([4.0, 4.1, 4.2]), "num_busbars": np.full(3, 12.0)}
+    store.record_many(designs, compute_ctm(designs), source="calc", ts="2026-01-01T12:00:00+00:00")
+    params = {**DEFAULT_PARAMS, "num_busbars": 16}
+    store.record(params, compute_ctm_point(**params), cell_type="HJT", ts="2026-01-02T12:00:00+00:00")
+    return store
+
+
+def test_query_filters_and_types(store):
+    assert store.count() == 4
+    assert store.count(cell_type="TOPCon", num_busbars=12) == 3
+    assert store.count(since="2026-01-02") == 1
+    assert store.count(source="app") == 1
+    frame = store.query(["ts", "cell_power", "module_pmax"], cell_type="TOPCon")
+    assert frame["cell_power"].tolist() == [4.0, 4.1, 4.2]
+    assert frame["module_pmax"].dtype == np.float64
+    assert str(frame["ts"].dt.tz) == "UTC"
+    assert len(store.query(limit=2)) == 2
+
+
+def test_unknown_column_is_rejected(store):
+    with pytest.raises(ValueError, match="unknown column"):
+        store.query(["no_such_column"])
+
+
+def test_arrow_table_round_trips_the_query(store):
+    frame = store.query()
+    table = store.to_arrow()
+    assert table.column_names == list(RUN_COLUMNS)
+    assert table.num_rows == 4
+    pd.testing.assert_frame_equal(table.to_pandas(), frame)
+
+
+@pytest.mark.parametrize("suffix", [".arrow", ".parquet", ".csv"])
+def test_export_round_trips(store, tmp_path, suffix):
+    path = str(tmp_path / f"runs{suffix}")
+    assert store.export(path, ["cell_power", "num_busbars", "module_pmax"], num_busbars=12) == 3
+    if suffix == ".arrow":
+        import pyarrow.feather as feather
+
+        table = feather.read_table(path, memory_map=True)
+    elif suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path)
+    else:
+        import pyarrow.csv as pacsv
+
+        table = pacsv.read_csv(path)
+    assert table.column("cell_power").to_pylist() == [4.0, 4.1, 4.2]
+
+
+def test_recording_is_off_unless_a_path_is_set(monkeypatch, tmp_path):
+    monkeypatch.setattr(ctm.store, "STORE_PATH", None)
+    default_store.cache_clear()
+    assert default_store() is None
+    path = str(tmp_path / "app.db")
+    monkeypatch.setattr(ctm.store, "STORE_PATH", path)
+    default_store.cache_clear()
+    try:
+        assert default_store().path == path
+    finally:
+        default_store.cache_clear()
+
+
+def test_cli_counts_and_rejects_a_missing_database(store, tmp_path, capsys):
+    assert main(["--db", store.path, "--count", "--cell-type", "HJT"]) == 0
+    assert capsys.readouterr().out.strip() == "1"
+    assert main(["--db", str(tmp_path / "missing.db"), "--count"]) == 1
+    assert "does not exist" in capsys.readouterr().err
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from ctm.model import compute_ctm
+from ctm.sweep import RIBBON_INPUTS, SWEEP_PARAMS, sweep_axes, sweep_grid, sweep_values
+from ctm.technology import electrical, load_template, template_names
+
+
+@pytest.mark.parametrize("key", sorted(template_names()))
+def test_axes_follow_the_template_ranges(key):
+    template = load_template(key)
+    axes = sweep_axes(template)
+    for name, (label, low, high) in axes.items():
+        assert label == SWEEP_PARAMS[name][0]
+        limits = template["ranges"][name]
+        if name == "num_busbars":
+            assert (low, high) == (min(limits), max(limits))
+        else:
+            assert (low, high) == tuple(limits[:2])
+        assert low <= template["params"][name] <= high
+    assert all(name in axes for name in RIBBON_INPUTS) == template["front_ribbons"]
+
+
+def test_shingled_axes_cover_its_strip_count():
+    _, low, high = sweep_axes(load_template("shingled"))["num_cells"]
+    assert low <= 376 <= high
+    assert SWEEP_PARAMS["num_cells"][2] < 376
+
+
+def test_busbar_values_snap_to_the_template_options():
+    options = load_template("hjt-132")["ranges"]["num_busbars"]
+    values = sweep_values("num_busbars", 0, 100, 2, options)
+    assert values.tolist() == sorted(float(n) for n in options)
+    assert sweep_values("num_cells", 100, 110, 4).tolist() == [100.0, 104.0, 106.0, 110.0]
+
+
+def test_grid_matches_the_model_with_the_template_cell():
+    template = load_template("hjt-132")
+    axes = sweep_axes(template)
+    x = sweep_values("cell_power", *axes["cell_power"][1:], 5)
+    y = sweep_values("glass_transmission", *axes["glass_transmission"][1:], 3)
+    cell = electrical(template)
+    grids = sweep_grid(template["params"], "cell_power", x, "glass_transmission", y, workers=1, cell=cell)
+    expected = compute_ctm({**template["params"], "cell_power": x[np.newaxis, :],
+                            "glass_transmission": y[:, np.newaxis]}, **cell)
+    np.testing.assert_allclose(grids["module_pmax"], expected["module_pmax"], rtol=1e-6)
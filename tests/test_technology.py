@@ -0,0 +1,72 @@
+import copy
+
+import numpy as np
+import pytest
+
+from ctm.model import DEFAULT_PARAMS, INPUT_COLUMNS, compute_ctm, compute_ctm_point
+from ctm.technology import (DEFAULT_TEMPLATE, LAYOUTS, electrical, load_template, out_of_range, template_names,
+                            validate_template)
+
+
+def test_template_names_list_the_default_first():
+    names = template_names()
+    assert next(iter(names)) == DEFAULT_TEMPLATE
+    assert {"topcon-144", "perc-144", "hjt-132", "ibc-108", "shingled", "topcon-144-bifacial"} <= set(names)
+
+
+@pytest.mark.parametrize("key", sorted(template_names()))
+def test_templates_are_complete_and_in_range(key):
+    template = load_template(key)
+    assert template["key"] == key
+    assert set(template["params"]) == set(INPUT_COLUMNS)
+    assert out_of_range(template, template["params"]) == []
+    assert template["layout"] in LAYOUTS
+    assert electrical(template)["front_ribbons"] == (1.0 if template["front_ribbons"] else 0.0)
+
+
+def test_unknown_template_is_rejected():
+    with pytest.raises(ValueError, match="unknown template"):
+        load_template("no-such-template")
+
+
+@pytest.mark.parametrize("change, message", [
+    (lambda t: t["params"].pop("cell_power"), "no default or range for cell_power"),
+    (lambda t: t["params"].update(cell_power=99.0), "defaults out of range"),
+    (lambda t: t["cell"].pop("temperature_coefficient"), "no cell temperature_coefficient"),
+    (lambda t: t.update(front_ribbons="no"), "front_ribbons must be true or false"),
+    (lambda t: t.update(layout="tiled"), "layout must be one of"),
+])
+def test_validation_names_the_problem(change, message):
+    template = copy.deepcopy(load_template(DEFAULT_TEMPLATE))
+    change(template)
+    with pytest.raises(ValueError, match=message):
+        validate_template("broken", template)
+
+
+def test_back_contact_and_shingled_templates_have_no_front_ribbons():
+    assert not load_template("ibc-108")["front_ribbons"]
+    assert not load_template("shingled")["front_ribbons"]
+    assert load_template("shingled")["layout"] == "shingled"
+    assert load_template(DEFAULT_TEMPLATE)["front_ribbons"]
+
+
+def test_no_front_ribbons_drops_the_ribbon_terms():
+    with_ribbons = compute_ctm_point()
+    without = compute_ctm_point(front_ribbons=0)
+    assert with_ribbons["ribbon_shading_loss"] > 0
+    assert without["ribbon_shading_loss"] == 0
+    assert without["total_resistive_loss"] < with_ribbons["total_resistive_loss"]
+    assert without["module_series_resistance"] < with_ribbons["module_series_resistance"]
+    # The ribbon inputs no longer matter
+    other = compute_ctm_point(front_ribbons=0, ribbon_width=0.4, ribbon_thickness=0.1)
+    for name in ("ribbon_shading_loss", "total_resistive_loss", "module_pmax", "module_series_resistance"):
+        assert other[name] == pytest.approx(without[name])
+
+
+def test_front_ribbons_flag_vectorizes():
+    flags = np.array([1.0, 0.0])
+    results = compute_ctm(front_ribbons=flags)
+    assert results["ribbon_shading_loss"][0] == pytest.approx(compute_ctm_point()["ribbon_shading_loss"])
+    assert results["ribbon_shading_loss"][1] == 0
+    assert results["module_pmax"].shape == (2,)
+    assert DEFAULT_PARAMS["ribbon_width"] > 0
@@ -0,0 +1,74 @@
+import json
+import threading
+
+import pytest
+
+from ctm import timing
+from ctm.model import compute_ctm_point
+
+
+def test_disabled_timing_is_a_shared_no_op():
+    timer = timing.start_run(enabled=False)
+    assert timer is timing.NULL_TIMER
+    assert timing.step_lap() is timing._noop
+    timer.mark("inputs")
+    compute_ctm_point()
+    session = {}
+    timing.finish(timer, session)
+    assert timer.stages == {} and session == {}
+
+
+def test_marks_and_model_steps_are_charged():
+    timer = timing.start_run(enabled=True)
+    timer.mark("inputs")
+    compute_ctm_point()
+    timer.mark("model")
+    timing.finish(timer)
+    assert {"inputs", "model"} <= set(timer.stages)
+    assert {f"model: STEP {n}" for n in range(1, 11)} <= set(timer.stages)
+    assert all(value >= 0 for value in timer.stages.values())
+
+
+def test_other_threads_are_not_timed():
+    timing.start_run(enabled=True)
+    laps = []
+    thread = threading.Thread(target=lambda: laps.append(timing.step_lap()))
+    thread.start()
+    thread.join()
+    assert laps == [timing._noop]
+    timing.start_run(enabled=False)
+
+
+def test_finish_keeps_session_samples_and_excludes_model_steps_from_the_total():
+    timer = timing.start_run(enabled=True)
+    timer.stages = {"inputs": 0.25, "chart": 0.5, "model: STEP 1": 10.0}
+    session = {}
+    timing.finish(timer, session)
+    samples = session["_ctm_timing"]
+    assert list(samples["total"]) == [0.75]
+    assert timing.percentiles(samples)["model: STEP 1"]["count"] == 1
+    assert timing.step_lap() is timing._noop
+
+
+def test_percentiles():
+    summary = timing.percentiles({"stage": [float(n) for n in range(100)], "empty": []})
+    assert summary["stage"]["p50"] == 50 and summary["stage"]["p99"] == 99
+    assert summary["stage"]["mean"] == pytest.approx(49.5)
+    assert "empty" not in summary
+
+
+def test_sinks(tmp_path, monkeypatch):
+    jsonl, prom = tmp_path / "timing.jsonl", tmp_path / "ctm.prom"
+    monkeypatch.setattr(timing, "JSONL_PATH", str(jsonl))
+    monkeypatch.setattr(timing, "PROM_PATH", str(prom))
+    for _ in range(2):
+        timer = timing.start_run(enabled=True)
+        timer.stages = {'odd "stage"': 0.5}
+        timing.finish(timer, session_id="abc")
+    records = [json.loads(line) for line in jsonl.read_text().splitlines()]
+    assert len(records) == 2 and records[0]["session"] == "abc"
+    assert records[0]["stages"]["total"] == 0.5
+    text = prom.read_text()
+    assert '# TYPE ctm_stage_seconds summary' in text
+    assert 'ctm_stage_seconds{stage="odd \\"stage\\"",quantile="0.5"} 0.500000' in text
+    assert not list(tmp_path.glob("*.tmp"))
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("scipy")
+pytest.importorskip("pandas")
+
+from ctm.model import DEFAULT_PARAMS
+from ctm.uncertainty import propagate, tornado
+
+# Every output here is linear in cell power and annual irradiance taken one at a time
+LINEAR_CASES = [
+    ({"cell_power": ("normal", 0.05)}, ["total_cell_power", "module_pmax", "module_efficiency", "annual_energy_total"]),
+    ({"annual_irradiance": ("normal", 80.0)}, ["annual_energy_total", "annual_energy_loss"]),
+    ({"cell_power": ("uniform", 0.05)}, ["total_cell_power", "module_pmax", "annual_energy_loss"]),
+]
+
+
+@pytest.mark.parametrize("tolerances, outputs", LINEAR_CASES)
+def test_lhs_matches_linearized_intervals(tolerances, outputs):
+    linear, method = propagate(DEFAULT_PARAMS, tolerances, method="linear")
+    assert method == "linear"
+    lhs, method = propagate(DEFAULT_PARAMS, tolerances, method="lhs", n_samples=200_000, seed=1)
+    assert method == "lhs"
+    distribution = next(iter(tolerances.values()))[0]
+    for name in outputs:
+        row, sampled = linear.loc[name], lhs.loc[name]
+        assert sampled["std"] == pytest.approx(row["std"], rel=5e-3), name
+        assert sampled["mean"] == pytest.approx(row["nominal"], abs=row["std"] * 1e-2), name
+        if distribution == "normal":
+            assert sampled["low"] == pytest.approx(row["low"], abs=row["std"] * 1e-2), name
+            assert sampled["high"] == pytest.approx(row["high"], abs=row["std"] * 1e-2), name
+
+
+def test_auto_picks_linear_for_linear_case():
+    _, method = propagate(DEFAULT_PARAMS, {"cell_power": ("normal", 0.05)})
+    assert method == "linear"
+
+
+def test_fixed_inputs_have_zero_width():
+    intervals, method = propagate(DEFAULT_PARAMS, {"cell_power": ("normal", 0.0)})
+    assert method == "linear"
+    assert np.all(intervals["std"] == 0)
+    assert np.all(intervals["low"] == intervals["nominal"])
+
+
+def test_tornado_ranks_by_swing():
+    table = tornado(DEFAULT_PARAMS, output="module_pmax")
+    assert list(table["swing"]) == sorted(table["swing"], reverse=True)
+    assert table.iloc[0]["input"] == "cell_power"